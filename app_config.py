@@ -3,6 +3,65 @@ import os
 # S3 config - uses environment variable with fallback to production bucket
 S3_BUCKET = os.environ.get("S3_BUCKET", "pp-client-data")
 
+# TA intake: stream the punch export with openpyxl read-only mode and keep only the
+# columns normalization needs (see helper/excel_reader.py). Opt-in: the reduced frame
+# can no longer be archived as the raw ta.csv, so with streaming on the upload archives
+# a server-side copy of the raw workbook (csv/<pay date>/ta.xlsx) instead.
+TA_STREAMING_READ = os.environ.get("TA_STREAMING_READ", "false").lower() == "true"
+
+# Intake cache: parsed TA/WFN uploads are stored as Parquet under INTAKE_CACHE_PREFIX,
+# keyed by client, S3 ETag and a hash of the client's systems (+ streamed intake
+# columns), so re-runs of the same upload skip Excel parsing. Every upload / config
+# change leaves a new object there; a bucket lifecycle rule on the prefix expires them
+# (see docs/aws-cli-commands.md).
+INTAKE_CACHE_ENABLED = os.environ.get("INTAKE_CACHE_ENABLED", "true").lower() == "true"
+INTAKE_CACHE_PREFIX = "intake-cache/"
+
+# Employee reprocessing: the WFN / waiver lookups the TA stages read are stored per pay
+# period (processed/<pay date>/ta_context/) so one employee can be re-run without intake.
+TA_CONTEXT_WFN_COLUMNS = [
+    "IDX",
+    "Break Credit Hours",
+    "Hire Date",
+    "Regular Rate Paid",
+    "Overtime Hours",
+    "Double Time Hours",
+]
+TA_CONTEXT_WAIVER_COLUMNS = ["ID", "Has_Waiver_Bool"]
+
+# Sharded TA processing: the normalized punch frame is hash-partitioned by ID into
+# TA_SHARD_WORKERS shards that run the per-employee stages concurrently (1 = one frame).
+# TA_SHARD_EXECUTOR is "thread" or "process"; Lambda has no /dev/shm, so a process
+# pool that cannot start falls back to threads.
+TA_SHARD_WORKERS = int(os.environ.get("TA_SHARD_WORKERS", "1"))
+TA_SHARD_EXECUTOR = os.environ.get("TA_SHARD_EXECUTOR", "thread").lower()
+
+# DB bulk loads: punches are streamed into the staging table with COPY FROM STDIN (CSV,
+# DB_COPY_CHUNK_ROWS rows serialized at a time). Set to "false" to fall back to batched
+# execute_values INSERTs.
+DB_COPY_LOAD = os.environ.get("DB_COPY_LOAD", "true").lower() == "true"
+DB_COPY_CHUNK_ROWS = int(os.environ.get("DB_COPY_CHUNK_ROWS", "10000"))
+
+# DB connection pool (helper/db_utils.py): up to DB_POOL_SIZE idle connections are kept
+# between calls and warm Lambda invocations; each is checked with SELECT 1 before it is
+# handed out again.
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "4"))
+
+# Hot fixed-shape queries (query-ta-records pages, carryover lookup) run as server-side
+# prepared statements on the pooled connections. Set to "false" behind a transaction-mode
+# pooler (e.g. PgBouncer), where session state is not kept.
+DB_PREPARED_STATEMENTS = (
+    os.environ.get("DB_PREPARED_STATEMENTS", "true").lower() == "true"
+)
+
+# Stage profiling (summary.timing.stages): each stage's peak memory delta is its peak over
+# the RSS it started at ("rss", near-zero overhead; the kernel high-water mark is reset per
+# stage through /proc/self/clear_refs, and where that is not permitted the RSS at stage end
+# is used instead) or the tracemalloc peak over the stage ("tracemalloc", exact allocation
+# peaks but slows the stages down). "off" skips it. Both peaks are process-wide, so stages
+# overlapping a stage of another thread (concurrent intake, threaded shards) report null.
+STAGE_PROFILE_MEMORY = os.environ.get("STAGE_PROFILE_MEMORY", "rss").lower()
+
 # API configuration
 CORS_HEADERS = {
     "Access-Control-Allow-Origin": "*",
@@ -223,6 +282,36 @@ EXCLUDE_FROM_PULLDOWN = {
     "Date/Time",
 }
 
+# For DB UI (query-ta-records): rows per page of raw punches / daily totals (the
+# frontend may ask for up to QUERY_MAX_PAGE_SIZE), and the daily_df columns returned.
+QUERY_PAGE_SIZE = int(os.environ.get("QUERY_PAGE_SIZE", "300"))
+QUERY_MAX_PAGE_SIZE = int(os.environ.get("QUERY_MAX_PAGE_SIZE", "2000"))
+DAILY_QUERY_COLUMNS = [
+    "ID",
+    "Employee",
+    "Location",
+    "Attributed_Workday",
+    "Fiscal_Pay_Date",
+    "Workweek_ID",
+    "Hours_Worked",
+    "Regular_Hrs",
+    "OT_Hrs",
+    "DT_Hrs",
+    "Days_Worked_In_Week",
+    "Is_Consecutive_Day_Rule",
+    "First_Day_of_Streak",
+    "Consec_OT_Hours",
+    "Consec_DT_Hours",
+    "Cum_Reg_Hrs",
+    "Weekly_OT_Spillover",
+    "OT_Hours_Pay_Period",
+    "DT_Hours_Pay_Period",
+    "OT_Hours_Paid",
+    "DT_Hours_Paid",
+    "OT_Variance_(hrs)",
+    "DT_Variance_(hrs)",
+]
+
 # Columns to keep for DB storage and QueryUI pulldown menu
 COLUMN_TO_KEEP_DB = {
     "Base": ["ID", "Employee", "In Punch", "Out Punch"],
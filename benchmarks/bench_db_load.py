@@ -0,0 +1,116 @@
+"""
+Staging-table load benchmark for save_ta_to_db / save_daily_df_to_db: batched
+execute_values INSERTs (one Python tuple per row, NaN swapped for None on an
+object copy of the frame) against helper.db_utils.copy_df_to_table (COPY FROM
+STDIN, CSV serialized in DB_COPY_CHUNK_ROWS chunks, NULLs written by the
+serializer).
+
+Both methods load the projected COLUMN_TO_KEEP_DB punches ("ta") or the daily
+totals ("daily") of a synthetic pay period into temp tables of one transaction,
+which is rolled back at the end; the two tables must hold exactly the same rows.
+
+Needs a reachable PostgreSQL (DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD).
+Carryover streaks are faked.
+
+Run from the repo root:
+    python -m benchmarks.bench_db_load [punches] [ta|daily]
+"""
+
+import sys, time, tracemalloc
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+import app_config
+import utility
+from helper import db_utils
+from ta import ta_process, ta_weekly_rules
+from benchmarks import synthetic
+from benchmarks.bench_sharding import fake_carryover_streaks, prepare_inputs
+
+
+def make_frames(punches: int):
+    """Processed punches and daily totals, as save_ta_to_db / save_daily_df_to_db load them."""
+    ta_weekly_rules.get_carryover_streaks = fake_carryover_streaks
+    df, processed_waiver_df, processed_wfn_df, pay_date = prepare_inputs(punches)
+    df = utility.to_categorical(df, ta_process.TA_CATEGORICAL_COLUMNS)
+    df, daily_df, _ = ta_process._run_ta_stages(
+        df,
+        synthetic.CLIENT_PARAMS,
+        synthetic.MIN_WAGE,
+        pay_date,
+        synthetic.CLIENT_ID,
+        processed_waiver_df,
+        processed_wfn_df,
+    )
+    cols = [col for cols in app_config.COLUMN_TO_KEEP_DB.values() for col in cols]
+    df["Last Updated"] = np.datetime64("now")
+    df["Pay Date"] = pay_date
+    daily_df = utility.categorical_to_object(daily_df.copy())
+    daily_df["Last_Updated"] = pd.Timestamp.now(tz="America/Los_Angeles")
+    return {"ta": utility.categorical_to_object(df[cols].copy()), "daily": daily_df}
+
+
+def legacy_load(cur, df, table_name):
+    # Former NULL handling: save_ta_to_db replaced NaN, save_daily_df_to_db used where()
+    if table_name.endswith("_ta"):
+        data = [tuple(x) for x in df.replace({np.nan: None}).to_numpy()]
+    else:
+        data = [tuple(x) for x in df.where(pd.notnull(df), None).to_numpy()]
+    cols_str = ", ".join([f'"{c}"' for c in df.columns])
+    insert_query = f'INSERT INTO "{table_name}" ({cols_str}) VALUES %s'
+    execute_values(cur, insert_query, data, page_size=2000)
+
+
+def measure(load, cur, df, table_name):
+    """Returns (wall seconds, peak traced MB); timed and traced in separate loads."""
+    cols_sql = db_utils._build_temp_cols_sql({}, df)
+    cur.execute(f'CREATE TEMP TABLE "{table_name}" ({cols_sql});')
+
+    start = time.perf_counter()
+    load(cur, df, table_name)
+    elapsed = time.perf_counter() - start
+
+    cur.execute(f'TRUNCATE "{table_name}";')
+    tracemalloc.start()
+    load(cur, df, table_name)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024**2
+
+
+def main(punches: int = 100_000, frame: str = "ta"):
+    df = make_frames(punches)[frame]
+    conn = db_utils.get_db_connection()
+    if not conn:
+        sys.exit(db_utils.get_last_db_connection_error())
+
+    try:
+        with conn.cursor() as cur:
+            legacy_s, legacy_mb = measure(
+                legacy_load, cur, df, f"bench_load_insert_{frame}"
+            )
+            copy_s, copy_mb = measure(
+                db_utils.copy_df_to_table, cur, df, f"bench_load_copy_{frame}"
+            )
+            cur.execute(
+                f"SELECT (SELECT count(*) FROM (TABLE bench_load_insert_{frame} "
+                f"EXCEPT ALL TABLE bench_load_copy_{frame}) a), (SELECT count(*) "
+                f"FROM (TABLE bench_load_copy_{frame} EXCEPT ALL TABLE "
+                f"bench_load_insert_{frame}) b);"
+            )
+            assert cur.fetchone() == (0, 0), "COPY load differs from the INSERT load"
+    finally:
+        conn.rollback()
+        db_utils.release_db_connection(conn)
+
+    print(f"rows:        {len(df):,} {frame} rows x {len(df.columns)} columns")
+    print(f"execute_values: {legacy_s:,.2f} s, peak {legacy_mb:,.1f} MB")
+    print(f"COPY (csv):     {copy_s:,.2f} s, peak {copy_mb:,.1f} MB")
+    print(f"speedup:        {legacy_s / copy_s:,.1f}x")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100_000,
+        sys.argv[2] if len(sys.argv) > 2 else "ta",
+    )
@@ -0,0 +1,108 @@
+"""
+Per-stage memory report for the compact TA dtypes (ta_process.TA_CATEGORICAL_COLUMNS).
+
+Runs the TA stages (ta_process._run_ta_stages) on a synthetic pay period twice,
+once with plain object text columns and once with the categorical identifiers
+process_data_ta now applies after normalization, and reports the deep memory of
+each stage's output frame plus the wall time. Both runs must return the same values.
+
+Carryover streaks are faked (no database needed).
+
+Run from the repo root:
+    python -m benchmarks.bench_dtypes [punches]
+"""
+
+import sys, time
+import pandas as pd
+import utility
+from ta import ta_process, ta_utility, ta_weekly_rules
+from benchmarks import synthetic
+from benchmarks.bench_sharding import fake_carryover_streaks, prepare_inputs
+
+# (module, stage function) pairs run by _run_ta_stages, in order
+STAGES = [
+    (ta_utility, "add_time_helper_cols"),
+    (ta_utility, "add_col_from_another_df_if_present"),
+    (ta_utility, "add_waiver_check"),
+    (ta_utility, "add_break_time"),
+    (ta_utility, "add_shift_segmentation"),
+    (ta_utility, "add_split_shift"),
+    (ta_utility, "add_report_time_warning"),
+    (ta_utility, "create_daily_df"),
+    (ta_weekly_rules, "apply_weekly_rules"),
+    (ta_utility, "apply_pay_period_totals"),
+    (ta_utility, "apply_ot_and_dt_paid_from_wfn"),
+    (ta_utility, "filter_target_pay_period"),
+    (ta_utility, "add_consec_day_reporting"),
+    (ta_utility, "create_anomalies_new"),
+]
+
+
+def frame_mb(df):
+    return df.memory_usage(deep=True).sum() / 1024**2
+
+
+def run_with_report(df, processed_waiver_df, processed_wfn_df, pay_date):
+    """Runs the stages, recording the deep memory of every stage's output frame."""
+    report = {}
+    originals = {}
+
+    def recording(name, func):
+        def wrapper(*args, **kwargs):
+            result = func(*args, **kwargs)
+            report[name] = report.get(name, 0.0) + frame_mb(result)
+            return result
+
+        return wrapper
+
+    for module, name in STAGES:
+        originals[(module, name)] = getattr(module, name)
+        setattr(module, name, recording(name, originals[(module, name)]))
+    try:
+        start = time.perf_counter()
+        outputs = ta_process._run_ta_stages(
+            df,
+            synthetic.CLIENT_PARAMS,
+            synthetic.MIN_WAGE,
+            pay_date,
+            synthetic.CLIENT_ID,
+            processed_waiver_df,
+            processed_wfn_df,
+        )
+        elapsed = time.perf_counter() - start
+    finally:
+        for (module, name), func in originals.items():
+            setattr(module, name, func)
+    return outputs, report, elapsed
+
+
+def main(punches: int = 200_000):
+    ta_weekly_rules.get_carryover_streaks = fake_carryover_streaks
+    df, processed_waiver_df, processed_wfn_df, pay_date = prepare_inputs(punches)
+
+    plain_df = df.copy()
+    compact_df = utility.to_categorical(df.copy(), ta_process.TA_CATEGORICAL_COLUMNS)
+    print(f"punches:     {len(df):,} ({df['ID'].nunique():,} employees)")
+    print(f"normalized:  {frame_mb(plain_df):,.1f} MB → {frame_mb(compact_df):,.1f} MB")
+
+    plain, plain_report, plain_s = run_with_report(
+        plain_df, processed_waiver_df, processed_wfn_df, pay_date
+    )
+    compact, compact_report, compact_s = run_with_report(
+        compact_df, processed_waiver_df, processed_wfn_df, pay_date
+    )
+
+    for expected, actual in zip(plain, compact):
+        pd.testing.assert_frame_equal(
+            expected, utility.categorical_to_object(actual.copy()), check_exact=True
+        )
+
+    print(f"\n{'stage':<36}{'object MB':>12}{'compact MB':>12}{'saved':>8}")
+    for _, name in STAGES:
+        before, after = plain_report[name], compact_report[name]
+        print(f"{name:<36}{before:>12,.1f}{after:>12,.1f}{1 - after / before:>8.0%}")
+    print(f"\nwall time:   {plain_s:,.2f} s object, {compact_s:,.2f} s compact")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
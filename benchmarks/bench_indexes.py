@@ -0,0 +1,198 @@
+"""
+Index check for the query-ta-records and carryover access paths: loads a synthetic
+pay period into a scratch client's tables through the real save workers (which
+provision TA_INDEXES / DAILY_INDEXES), ANALYZEs them, then runs the actual
+handle_query_ta_records and get_carryover_streaks calls with every query they
+issue captured through EXPLAIN (FORMAT JSON, ANALYZE).
+
+Each access path must be served by one of its expected indexes; a sequential scan
+of the client table fails the check. Exits 1 on any failure. The scratch tables are
+dropped at the end.
+
+Needs a reachable PostgreSQL (DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD).
+
+Run from the repo root:
+    python -m benchmarks.bench_indexes [punches]
+"""
+
+import sys
+import pandas as pd
+import psycopg2
+from helper import db_utils
+from benchmarks import synthetic
+from benchmarks.bench_db_load import make_frames
+
+CLIENT_ID = "bench_idx"
+TA_TABLE = f"{CLIENT_ID}_ta"
+DAILY_TABLE = f"{CLIENT_ID}_daily_df"
+TA_IN_PUNCH = f"idx_{CLIENT_ID}_in_punch"
+TA_UNIQUE = f"uq_{TA_TABLE}"
+DAILY_WORKDAY = f"idx_{DAILY_TABLE}_workday"
+DAILY_PKEY = f"{DAILY_TABLE}_pkey"
+
+_label = None
+_plans = []  # (label, sql, plan json)
+
+
+class ExplainCursor(psycopg2.extensions.cursor):
+    """
+    Records the plan of every SELECT on the client tables, and of every prepared
+    statement EXECUTEd (see db_utils._execute_prepared), before running it.
+    """
+
+    def execute(self, query, vars=None):
+        text = self.mogrify(query, vars).decode()
+        statement = text.lstrip().upper()
+        is_select = statement.startswith("SELECT") and CLIENT_ID in text
+        if _label and (is_select or statement.startswith("EXECUTE")):
+            super().execute("EXPLAIN (FORMAT JSON, ANALYZE) " + text)
+            _plans.append((_label, text, self.fetchone()[0][0]["Plan"]))
+        return super().execute(query, vars)
+
+
+def scans(plan):
+    """(node type, relation, index name) of every scan node in the plan tree."""
+    found = []
+    if "Relation Name" in plan or "Index Name" in plan:
+        found.append(
+            (plan["Node Type"], plan.get("Relation Name"), plan.get("Index Name"))
+        )
+    for child in plan.get("Plans", []):
+        found += scans(child)
+    return found
+
+
+def run_access_paths():
+    """The UI / carryover calls, each under the label its plans are checked against."""
+    global _label
+    employee = "2JT0001000"
+    _label = "raw + daily, first page"
+    page = db_utils.handle_query_ta_records(CLIENT_ID, None, None, None, [], None, 300)
+    _label = "raw + daily, keyset page"
+    db_utils.handle_query_ta_records(
+        CLIENT_ID, None, None, None, [], page["next_cursor"], 300
+    )
+    _label = "raw + daily, date range"
+    db_utils.handle_query_ta_records(
+        CLIENT_ID, None, "2026-01-12", "2026-01-16", [], None, 300
+    )
+    _label = "raw + daily, one employee"
+    db_utils.handle_query_ta_records(
+        CLIENT_ID, employee, "2026-01-12", "2026-01-16", [], None, 300
+    )
+    _label = "carryover streaks"
+    db_utils.get_carryover_streaks(
+        CLIENT_ID, synthetic.PAY_DATE, synthetic.CLIENT_PARAMS
+    )
+    _label = None
+
+
+# label -> {table: acceptable indexes}
+RANGE_INDEXES = {TA_TABLE: {TA_IN_PUNCH}, DAILY_TABLE: {DAILY_WORKDAY}}
+EXPECTED = {
+    "raw + daily, first page": RANGE_INDEXES,
+    "raw + daily, keyset page": RANGE_INDEXES,
+    "raw + daily, date range": RANGE_INDEXES,
+    "raw + daily, one employee": {
+        TA_TABLE: {TA_UNIQUE, TA_IN_PUNCH},
+        DAILY_TABLE: {DAILY_PKEY, DAILY_WORKDAY},
+    },
+    "carryover streaks": {DAILY_TABLE: {DAILY_WORKDAY}},
+}
+
+
+def check_plans():
+    """
+    Human-readable failures. A table passes when its scans use only expected indexes
+    (bitmap heap scans ride on them) and none of them is a sequential scan.
+    """
+    failures = []
+    for label, expected in EXPECTED.items():
+        nodes = {table: [] for table in expected}
+        for plan_label, _, plan in _plans:
+            if plan_label != label:
+                continue
+            for node, relation, index in scans(plan):
+                # Bitmap Index Scan nodes name the index but not the table
+                table = relation or next(
+                    (t for t, names in expected.items() if index in names), None
+                )
+                if table in nodes:
+                    nodes[table].append((node, index))
+
+        for table, table_nodes in nodes.items():
+            used = {index for _, index in table_nodes if index}
+            seq_scan = any(node == "Seq Scan" for node, _ in table_nodes)
+            ok = bool(used) and used <= expected[table] and not seq_scan
+            desc = ", ".join(
+                f"{node} on {index}" if index else node for node, index in table_nodes
+            )
+            print(f"{'ok  ' if ok else 'FAIL'} {label:<28}{table:<22}{desc or '-'}")
+            if not ok:
+                failures.append(f"{label} / {table}: {desc or 'not queried'}")
+    return failures
+
+
+def drop_tables(conn):
+    with conn, conn.cursor() as cur:
+        cur.execute(f'DROP TABLE IF EXISTS "{TA_TABLE}", "{DAILY_TABLE}";')
+    db_utils._forget_table_schema(TA_TABLE)
+    db_utils._forget_table_schema(DAILY_TABLE)
+
+
+def load_tables(conn, punches: int):
+    """Saves a synthetic period as CLIENT_ID through the save workers, then ANALYZEs."""
+    frames = make_frames(punches)
+    pay_date = pd.Timestamp(synthetic.PAY_DATE)
+    db_utils.worker_save_ta(frames["ta"], CLIENT_ID, pay_date)
+    db_utils.worker_save_daily(frames["daily"], CLIENT_ID, pay_date)
+    with conn, conn.cursor() as cur:
+        cur.execute(f'ANALYZE "{TA_TABLE}"; ANALYZE "{DAILY_TABLE}";')
+        cur.execute(
+            f'SELECT (SELECT count(*) FROM "{TA_TABLE}"), '
+            f'(SELECT count(*) FROM "{DAILY_TABLE}");'
+        )
+        ta_rows, daily_rows = cur.fetchone()
+    print(f"rows: {ta_rows:,} punches, {daily_rows:,} daily totals\n")
+
+
+def main(punches: int = 100_000):
+    conn = db_utils.get_db_connection()
+    if not conn:
+        sys.exit(db_utils.get_last_db_connection_error())
+    drop_tables(conn)
+
+    try:
+        # 1. Load through the save workers (they provision the managed indexes)
+        load_tables(conn, punches)
+
+        # 2. Run the access paths with their queries explained
+        original_get, explaining = db_utils.get_db_connection, []
+
+        def explaining_connection():
+            explain_conn = original_get()
+            explain_conn.cursor_factory = ExplainCursor
+            explaining.append(explain_conn)
+            return explain_conn
+
+        db_utils.get_db_connection = explaining_connection
+        try:
+            run_access_paths()
+        finally:
+            db_utils.get_db_connection = original_get
+            for explain_conn in explaining:  # back in the pool as plain connections
+                explain_conn.cursor_factory = psycopg2.extensions.cursor
+        failures = check_plans()
+    finally:
+        drop_tables(conn)
+        db_utils.release_db_connection(conn)
+
+    if failures:
+        print("\nINDEX NOT USED:\n  " + "\n  ".join(failures))
+        return 1
+    print("\nEvery access path is served by its index.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000))
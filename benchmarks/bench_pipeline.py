@@ -0,0 +1,243 @@
+"""
+End-to-end throughput benchmark with a stored-baseline regression check.
+
+Runs helper.file_processor.handle_file_upload (waiver → WFN → TA → generate_results)
+on synthetic pay periods (benchmarks/synthetic.py) at each scale, with S3 and the
+database stubbed, and reads the per-stage breakdown the pipeline records into
+summary.timing.stages (see helper.aux.profile_stage). For each scale:
+  1. `repeats` timed runs with memory profiling off; each stage keeps its fastest run.
+  2. One run with tracemalloc for the per-stage peak memory (skip with --no-memory).
+  3. Compare with benchmarks/baselines/pipeline.json: row counts must match exactly,
+     wall time and peak memory may not grow past the tolerances.
+Exits 1 on any regression. Baselines are machine-specific: refresh them with
+--update-baseline after an intended change or on new hardware.
+
+Run from the repo root:
+    python -m benchmarks.bench_pipeline [--scales 1000 10000 100000] [--repeats 5]
+        [--time-tolerance 1.0] [--no-memory] [--update-baseline]
+"""
+
+import argparse, contextlib, io, json, os, platform, sys, time
+from client_config import CLIENT_CONFIGS
+from helper import aux, file_processor
+from ta import ta_process, ta_weekly_rules
+from benchmarks import synthetic
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "pipeline.json")
+DEFAULT_SCALES = [1_000, 10_000, 100_000]
+
+# A stage regresses when it is slower / larger than baseline * (1 + tolerance)
+# and the difference is above the floor (keeps tiny stages from flapping). Wall time
+# on shared machines swings ~50% run to run, so time only fails past 2x by default.
+TIME_TOLERANCE = 1.0
+TIME_FLOOR_MS = 25.0
+MEMORY_TOLERANCE = 0.25
+MEMORY_FLOOR_MB = 8.0
+
+
+def install_stubs(punches: int):
+    """Serves a synthetic pay period from the S3 reads; S3 writes and the DB are no-ops."""
+    employees = synthetic.employees_for_punches(punches)
+    ta_df, wfn_df, waiver_df = synthetic.make_pay_period(employees)
+    carryover = synthetic.make_carryover_streaks(employees)
+    systems = CLIENT_CONFIGS[synthetic.CLIENT_ID]
+
+    # Named like the functions they replace: stage names come from __name__
+    def read_ta_excel_from_s3(key, clientId, engine=None):
+        ta_system = systems["ta_systems"][synthetic.TA_SYSTEM]
+        return ta_df.copy(), synthetic.TA_SYSTEM, ta_system
+
+    def read_wfn_excel_from_s3(key, clientId, engine=None):
+        wfn_system = systems["wfn_systems"][synthetic.WFN_SYSTEM]
+        return wfn_df.copy(), synthetic.WFN_SYSTEM, wfn_system
+
+    def read_waiver_excel_from_s3(key, header=0, engine=None):
+        return waiver_df.copy()
+
+    def no_op(*args, **kwargs):
+        return None
+
+    file_processor.read_ta_excel_from_s3 = read_ta_excel_from_s3
+    file_processor.read_wfn_excel_from_s3 = read_wfn_excel_from_s3
+    file_processor.read_waiver_excel_from_s3 = read_waiver_excel_from_s3
+    file_processor.save_csv_to_s3 = no_op
+    file_processor.archive_raw_upload_to_s3 = no_op
+    file_processor.save_waiver_json_s3 = no_op
+    file_processor.save_ta_context_to_s3 = no_op
+    file_processor.put_result_to_s3 = no_op
+    file_processor.delete_annotations = lambda client_id, pay_date: "stubbed"
+    ta_process.get_db_connection = no_op  # _save_to_database reports "skipped"
+    ta_weekly_rules.get_carryover_streaks = lambda clientId, pay_date, params: carryover
+
+
+def run_pipeline(memory_mode: str):
+    """One handle_file_upload run. Returns (total ms, summary rows, stage records)."""
+    aux.STAGE_PROFILE_MEMORY = memory_mode
+    body = {
+        "action": "upload",
+        "clientId": synthetic.CLIENT_ID,
+        "payDate": synthetic.PAY_DATE,
+        "client_config": synthetic.CLIENT_PARAMS,
+        "waiver_key": "bench/waiver.xlsx",
+        "wfn_key": "bench/wfn.xlsx",
+        "ta_key": "bench/ta.xlsx",
+        "ignore_warnings": True,
+    }
+    event = {"body": json.dumps(body)}
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # the pipeline's progress prints
+        result = file_processor.handle_file_upload(event, aux.parse_event_params(event))
+    total_ms = round((time.perf_counter() - start) * 1000, 2)
+    summary = result["summary"]
+    return total_ms, summary["rows"], summary["timing"]["stages"]
+
+
+def stage_summary(records):
+    """
+    {"parent.stage": {rows, wall_ms, peak_mem_delta_mb}}; repeated stages (shards,
+    both WFN lookups) are summed, memory keeps the largest.
+    """
+    stages = {}
+    for record in records:
+        name = ".".join(filter(None, (record["parent"], record["stage"])))
+        stage = stages.setdefault(
+            name, {"rows": 0, "wall_ms": 0.0, "peak_mem_delta_mb": None}
+        )
+        stage["rows"] += record["rows"] or 0
+        stage["wall_ms"] = round(stage["wall_ms"] + record["wall_ms"], 2)
+        if record["peak_mem_delta_mb"] is not None:
+            stage["peak_mem_delta_mb"] = max(
+                stage["peak_mem_delta_mb"] or 0.0, record["peak_mem_delta_mb"]
+            )
+    return stages
+
+
+def measure(punches: int, repeats: int, memory: bool):
+    install_stubs(punches)
+    runs = [run_pipeline("off") for _ in range(repeats)]
+    total_ms = min(total for total, _, _ in runs)
+    rows = runs[0][1]
+    stages = stage_summary(runs[0][2])
+    for _, _, records in runs[1:]:
+        for name, stage in stage_summary(records).items():
+            stages[name]["wall_ms"] = min(stages[name]["wall_ms"], stage["wall_ms"])
+    if memory:
+        for name, stage in stage_summary(run_pipeline("tracemalloc")[2]).items():
+            stages[name]["peak_mem_delta_mb"] = stage["peak_mem_delta_mb"]
+    return {"total_ms": total_ms, "rows": rows, "stages": stages}
+
+
+def _exceeds(current, baseline, tolerance, floor):
+    return current > baseline * (1 + tolerance) and current - baseline > floor
+
+
+def find_regressions(current, baseline, time_tolerance=TIME_TOLERANCE):
+    """Human-readable regressions of one scale against its baseline entry."""
+    regressions = []
+    if current["rows"] != baseline["rows"]:
+        regressions.append(f"summary rows {current['rows']} != {baseline['rows']}")
+    total_ms, base_total_ms = current["total_ms"], baseline["total_ms"]
+    if _exceeds(total_ms, base_total_ms, time_tolerance, TIME_FLOOR_MS):
+        regressions.append(
+            f"total {total_ms:,.0f} ms vs {base_total_ms:,.0f} ms"
+        )
+    for name, stage in current["stages"].items():
+        base = baseline["stages"].get(name)
+        if base is None:
+            continue  # new stage: nothing to compare until the baseline is refreshed
+        if stage["rows"] != base["rows"]:
+            regressions.append(f"{name}: rows {stage['rows']} != {base['rows']}")
+        if _exceeds(stage["wall_ms"], base["wall_ms"], time_tolerance, TIME_FLOOR_MS):
+            regressions.append(
+                f"{name}: {stage['wall_ms']:,.0f} ms vs {base['wall_ms']:,.0f} ms"
+            )
+        mem, base_mem = stage["peak_mem_delta_mb"], base["peak_mem_delta_mb"]
+        if mem is not None and base_mem is not None:
+            if _exceeds(mem, base_mem, MEMORY_TOLERANCE, MEMORY_FLOOR_MB):
+                regressions.append(f"{name}: {mem:,.1f} MB vs {base_mem:,.1f} MB")
+    return regressions
+
+
+def print_report(punches, current, baseline):
+    base_stages = baseline["stages"] if baseline else {}
+    print(f"\n{punches:,} punches: {current['total_ms']:,.0f} ms end to end")
+    print(f"{'stage':<52}{'rows':>10}{'ms':>10}{'base ms':>10}{'MB':>8}{'base MB':>9}")
+    for name, stage in current["stages"].items():
+        base = base_stages.get(name, {})
+        print(
+            f"{name:<52}{stage['rows']:>10,}{stage['wall_ms']:>10,.1f}"
+            f"{_fmt(base.get('wall_ms'), 10, '.1f')}"
+            f"{_fmt(stage['peak_mem_delta_mb'], 8, '.1f')}"
+            f"{_fmt(base.get('peak_mem_delta_mb'), 9, '.1f')}"
+        )
+
+
+def _fmt(value, width, spec):
+    return f"{'-':>{width}}" if value is None else f"{value:>{width}{spec}}"
+
+
+def load_baseline():
+    if not os.path.exists(BASELINE_PATH):
+        return {}
+    with open(BASELINE_PATH) as f:
+        return json.load(f)
+
+
+def main(
+    scales=DEFAULT_SCALES,
+    repeats=5,
+    memory=True,
+    update_baseline=False,
+    time_tolerance=TIME_TOLERANCE,
+):
+    baseline = load_baseline()
+    baseline_scales = baseline.get("scales", {})
+    results, failures = {}, []
+
+    for punches in scales:
+        current = measure(punches, repeats, memory)
+        results[str(punches)] = current
+        base = baseline_scales.get(str(punches))
+        print_report(punches, current, base)
+        if base and not update_baseline:
+            failures += [
+                f"{punches:,}: {regression}"
+                for regression in find_regressions(current, base, time_tolerance)
+            ]
+
+    if update_baseline:
+        baseline = {
+            "machine": f"{platform.machine()}, {os.cpu_count()} cores, "
+            f"Python {platform.python_version()}",
+            "scales": {**baseline_scales, **results},
+        }
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\nBaseline updated: {BASELINE_PATH}")
+        return 0
+
+    if failures:
+        print("\nREGRESSIONS:\n  " + "\n  ".join(failures))
+        return 1
+    print("\nNo regressions against the stored baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE)
+    parser.add_argument("--no-memory", action="store_true")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+    sys.exit(
+        main(
+            args.scales,
+            args.repeats,
+            not args.no_memory,
+            args.update_baseline,
+            args.time_tolerance,
+        )
+    )
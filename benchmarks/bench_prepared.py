@@ -0,0 +1,72 @@
+"""
+Latency of the interactive query path on a warm pooled connection, with the hot
+queries sent as plain SQL against named server-side prepared statements
+(app_config.DB_PREPARED_STATEMENTS, see db_utils._execute_prepared).
+
+One call = a per-employee handle_query_ta_records page (raw punches + daily totals
+for a date range) plus the get_carryover_streaks lookup, on the bench_indexes
+scratch tables. Both modes must return the same rows; reports the median of
+`calls` calls each.
+
+Needs a reachable PostgreSQL (DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD).
+
+Run from the repo root:
+    python -m benchmarks.bench_prepared [punches] [calls]
+"""
+
+import statistics, sys, time
+import app_config
+from helper import db_utils
+from benchmarks import synthetic
+from benchmarks.bench_indexes import CLIENT_ID, drop_tables, load_tables
+
+EMPLOYEE = "2JT0001000"
+
+
+def one_call():
+    page = db_utils.handle_query_ta_records(
+        CLIENT_ID, EMPLOYEE, "2026-01-12", "2026-01-20", ["Location"], None, 50
+    )
+    streaks = db_utils.get_carryover_streaks(
+        CLIENT_ID, synthetic.PAY_DATE, synthetic.CLIENT_PARAMS
+    )
+    return page, streaks
+
+
+def measure(prepared: bool, calls: int):
+    """(median ms per call, last result)."""
+    app_config.DB_PREPARED_STATEMENTS = prepared
+    result = one_call()  # warm-up: pooled connection, PREPAREs
+    times = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        result = one_call()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000, result
+
+
+def main(punches: int = 20_000, calls: int = 500):
+    conn = db_utils.get_db_connection()
+    if not conn:
+        sys.exit(db_utils.get_last_db_connection_error())
+    drop_tables(conn)
+
+    try:
+        load_tables(conn, punches)
+        plain_ms, plain = measure(False, calls)
+        prepared_ms, prepared = measure(True, calls)
+        assert plain == prepared, "prepared statements returned different rows"
+    finally:
+        drop_tables(conn)
+        db_utils.release_db_connection(conn)
+
+    print(f"plain SQL:           {plain_ms:,.3f} ms per call (median of {calls})")
+    print(f"prepared statements: {prepared_ms:,.3f} ms per call")
+    print(f"speedup:             {plain_ms / prepared_ms:,.2f}x")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 20_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 500,
+    )
@@ -0,0 +1,103 @@
+"""
+Scaling benchmark for sharded TA processing (ta.ta_process._run_ta_stages_sharded).
+
+Builds a synthetic pay period (default ~1M punches), normalizes it like
+process_data_ta, then times the per-employee stages as one frame and hash-sharded
+by ID across 2, 4, ... workers (up to the machine's cores), checking every
+sharded run returns exactly the single-frame result.
+
+Carryover streaks are faked (no database needed).
+
+Run from the repo root:
+    python -m benchmarks.bench_sharding [punches] [thread|process]
+"""
+
+import os, sys, time
+import pandas as pd
+import utility
+from client_config import CLIENT_CONFIGS, TA_TARGET_SCHEMA
+from ta import ta_process, ta_weekly_rules
+from waiver.waiver_process import process_waiver
+from wfn.wfn_process import process_data_wfn
+from benchmarks import synthetic
+
+
+def fake_carryover_streaks(clientId, pay_date, client_params):
+    return {}
+
+
+def prepare_inputs(punches: int):
+    """Normalized punches plus processed WFN / waiver frames, as process_data_ta sees them."""
+    employees = synthetic.employees_for_punches(punches)
+    ta_df, wfn_df, waiver_df = synthetic.make_pay_period(employees)
+    systems = CLIENT_CONFIGS[synthetic.CLIENT_ID]
+    pay_date = pd.to_datetime(synthetic.PAY_DATE)
+
+    processed_wfn_df, _ = process_data_wfn(
+        wfn_df,
+        synthetic.CLIENT_PARAMS,
+        systems["wfn_systems"][synthetic.WFN_SYSTEM],
+        synthetic.MIN_WAGE,
+        synthetic.STATE_MIN_WAGE,
+        synthetic.PAY_PERIODS_PER_YEAR,
+        pay_date,
+        system_name=synthetic.WFN_SYSTEM,
+    )
+    plan = utility.get_normalization_plan(
+        synthetic.TA_SYSTEM,
+        systems["ta_systems"][synthetic.TA_SYSTEM],
+        TA_TARGET_SCHEMA,
+        ta_process.TA_DATETIME_COLUMNS,
+    )
+    df = utility.apply_plan_filters(utility.apply_plan_mappings(ta_df, plan), plan)
+    return df, process_waiver(waiver_df), processed_wfn_df, pay_date
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main(punches: int = 1_000_000, executor_kind: str = "process"):
+    ta_weekly_rules.get_carryover_streaks = fake_carryover_streaks
+    df, processed_waiver_df, processed_wfn_df, pay_date = prepare_inputs(punches)
+    args = (
+        df,
+        synthetic.CLIENT_PARAMS,
+        synthetic.MIN_WAGE,
+        pay_date,
+        synthetic.CLIENT_ID,
+        processed_waiver_df,
+        processed_wfn_df,
+    )
+
+    cores = os.cpu_count() or 1
+    print(f"punches:     {len(df):,} ({df['ID'].nunique():,} employees), {cores} cores")
+
+    # Each stage run mutates its input frame, so every run gets a fresh copy
+    expected, single_s = timed(ta_process._run_ta_stages, *(df.copy(), *args[1:]))
+    print(f"1 frame:     {single_s:,.2f} s")
+
+    workers = 2
+    while workers <= max(cores, 2):
+        result, sharded_s = timed(
+            ta_process._run_ta_stages_sharded,
+            *(df.copy(), *args[1:]),
+            workers=workers,
+            executor_kind=executor_kind,
+        )
+        for actual, reference in zip(result, expected):
+            pd.testing.assert_frame_equal(actual, reference, check_exact=True)
+        print(
+            f"{workers} shards:    {sharded_s:,.2f} s ({executor_kind}), "
+            f"speedup {single_s / sharded_s:,.2f}x"
+        )
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000,
+        sys.argv[2] if len(sys.argv) > 2 else "process",
+    )
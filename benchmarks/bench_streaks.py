@@ -0,0 +1,103 @@
+"""
+Micro-benchmark for the consecutive-day streak engine in ta.ta_weekly_rules
+(step 6 of apply_weekly_rules).
+
+Times the former per-employee loop (groupby("ID") + pd.Timestamp per row, frozen
+in tests/legacy_ta_weekly_rules.py) against the vectorized
+ta_weekly_rules._compute_streaks on a large synthetic pay period. The randomized
+equivalence check lives in tests/test_weekly_rules.py.
+
+Run from the repo root:
+    python -m benchmarks.bench_streaks [employees]
+"""
+
+import sys, time
+import numpy as np
+import pandas as pd
+from ta import ta_weekly_rules
+from tests import legacy_ta_weekly_rules
+
+PERIOD_START = pd.Timestamp("2026-01-04")
+PERIOD_DAYS = 14
+
+
+def legacy_streaks(df, cba_by_id, carryover_by_id, workweek_start_dow, prior_period_date):
+    parts = []
+    for emp_id, emp_group in df.groupby("ID", sort=False):
+        cba = cba_by_id[emp_id]
+        parts.append(
+            legacy_ta_weekly_rules._compute_streaks_for_employee(
+                emp_group,
+                cba,
+                carryover_by_id[emp_id] if cba else 0,
+                workweek_start_dow,
+                prior_period_date,
+            )
+        )
+    return pd.concat(parts).to_numpy() if parts else np.empty(0, dtype=np.int64)
+
+
+def vectorized_streaks(df, cba_by_id, carryover_by_id, workweek_start_dow, prior_period_date):
+    ids = df["ID"].to_numpy()
+    group_starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]]) if len(df) else []
+    emp_ids = ids[group_starts]
+    cba = np.array([cba_by_id[e] for e in emp_ids], dtype=bool)
+    carry = np.array(
+        [carryover_by_id[e] if c else 0 for e, c in zip(emp_ids, cba)], dtype=np.int64
+    )
+    return ta_weekly_rules._compute_streaks(
+        ta_weekly_rules._to_day_numbers(df["Attributed_Workday"]),
+        group_starts,
+        cba,
+        carry,
+        workweek_start_dow,
+        ta_weekly_rules._to_day_numbers(prior_period_date),
+    )
+
+
+def make_case(rng, employees, duplicates=False):
+    """One sorted daily frame plus per-employee CBA flags and carryover."""
+    rows = []
+    for emp in range(employees):
+        days = np.flatnonzero(rng.random(PERIOD_DAYS) < rng.uniform(0.2, 1.0))
+        if duplicates and len(days):
+            days = np.sort(np.r_[days, rng.choice(days, size=rng.integers(0, 3))])
+        for day in days:
+            # Random time of day: streaks must only depend on the calendar date
+            rows.append(
+                (
+                    f"E{emp:05d}",
+                    PERIOD_START
+                    + pd.Timedelta(days=int(day))
+                    + pd.Timedelta(minutes=int(rng.integers(0, 1440))),
+                )
+            )
+    df = pd.DataFrame(rows, columns=["ID", "Attributed_Workday"])
+    df["Attributed_Workday"] = pd.to_datetime(df["Attributed_Workday"])
+    ids = [f"E{emp:05d}" for emp in range(employees)]
+    cba_by_id = {e: bool(rng.random() < 0.5) for e in ids}
+    carryover_by_id = {e: int(rng.integers(0, 8)) for e in ids}
+    return df, cba_by_id, carryover_by_id
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main(employees: int = 5_000):
+    rng = np.random.default_rng(42)
+    args = (*make_case(rng, employees), 6, PERIOD_START - pd.Timedelta(days=1))
+    legacy, legacy_s = timed(legacy_streaks, *args)
+    current, current_s = timed(vectorized_streaks, *args)
+    assert np.array_equal(legacy, current), "vectorized streaks diverged from legacy output"
+
+    print(f"employees:   {employees:,} ({len(args[0]):,} daily rows)")
+    print(f"legacy loop: {legacy_s * 1000:,.1f} ms")
+    print(f"vectorized:  {current_s * 1000:,.1f} ms")
+    print(f"speedup:     {legacy_s / current_s:,.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5_000)
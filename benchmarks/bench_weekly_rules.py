@@ -0,0 +1,96 @@
+"""
+Wall time + peak memory benchmark for ta.ta_weekly_rules.apply_weekly_rules.
+
+Compares the former pipeline (per-employee / per-workweek groupby loops, each
+group copied, then pd.concat + sort_values + reset_index after steps 7 and 8;
+frozen in tests/legacy_ta_weekly_rules.py) against the current in-place,
+order-preserving pipeline on synthetic daily_df inputs, and checks both return
+the same frame.
+
+Carryover streaks are faked (no database needed).
+
+Run from the repo root:
+    python -m benchmarks.bench_weekly_rules [employees]
+"""
+
+import sys, time, tracemalloc
+import numpy as np
+import pandas as pd
+from ta import ta_weekly_rules
+from tests import legacy_ta_weekly_rules
+
+CLIENT_PARAMS = {
+    "global": {
+        "pay_period_length": 14,
+        "days_bet_payroll_end_and_pay_date": 6,
+        "ot_week_max": 40,
+        "workweek_start": "Sunday",
+        "cba_consec_anyweek": False,
+        "number_of_consec_days_before_ot": 6,
+    },
+    "locations": {
+        "2JT": {"cba_consec_anyweek": True},
+        "18F": {"ot_week_max": 38, "number_of_consec_days_before_ot": 5},
+    },
+}
+LOCATIONS = ["2JT", "18F", "18J", "ABC"]
+PAY_DATE = "2026-01-30"
+PERIOD_START = pd.Timestamp("2026-01-11")
+
+
+def fake_carryover_streaks(clientId, pay_date, client_params):
+    return {f"E{emp:05d}": emp % 7 for emp in range(0, 1_000_000, 3)}
+
+
+def make_daily_df(employees: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    rows = []
+    for emp in range(employees):
+        location = LOCATIONS[emp % len(LOCATIONS)]
+        for day in np.flatnonzero(rng.random(14) < 0.75):
+            rows.append((f"Employee {emp}", f"E{emp:05d}", location, day))
+    df = pd.DataFrame(rows, columns=["Employee", "ID", "Location", "day"])
+    df["Attributed_Workday"] = PERIOD_START + pd.to_timedelta(df.pop("day"), unit="D")
+    hours = rng.uniform(3.0, 13.0, size=len(df)).round(2)
+    df["Hours_Worked"] = hours
+    df["Regular_Hrs"] = np.minimum(hours, 8.0)
+    df["OT_Hrs"] = np.clip(hours - 8.0, 0.0, 4.0)
+    df["DT_Hrs"] = np.maximum(hours - 12.0, 0.0)
+    # Daily frames arrive unsorted by employee
+    return df.sample(frac=1.0, random_state=1).reset_index(drop=True)
+
+
+# ── Harness ───────────────────────────────────────────────────────────────────
+def measure(func, daily_df):
+    """Returns (result, wall seconds, peak traced MB); timed and traced in separate runs."""
+    start = time.perf_counter()
+    result = func(daily_df, CLIENT_PARAMS, "bench_client", PAY_DATE)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(daily_df, CLIENT_PARAMS, "bench_client", PAY_DATE)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024**2
+
+
+def main(employees: int = 5_000):
+    ta_weekly_rules.get_carryover_streaks = fake_carryover_streaks
+    legacy_ta_weekly_rules.get_carryover_streaks = fake_carryover_streaks
+    daily_df = make_daily_df(employees)
+
+    legacy, legacy_s, legacy_mb = measure(
+        legacy_ta_weekly_rules.apply_weekly_rules, daily_df
+    )
+    current, current_s, current_mb = measure(ta_weekly_rules.apply_weekly_rules, daily_df)
+
+    pd.testing.assert_frame_equal(legacy, current)
+
+    print(f"employees:   {employees:,} ({len(daily_df):,} daily rows)")
+    print(f"legacy:      {legacy_s * 1000:,.1f} ms, peak {legacy_mb:,.1f} MB")
+    print(f"in-place:    {current_s * 1000:,.1f} ms, peak {current_mb:,.1f} MB")
+    print(f"speedup:     {legacy_s / current_s:,.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5_000)
@@ -0,0 +1,230 @@
+"""
+Synthetic pay period for benchmarks: TA punches, WFN payroll and waiver intake
+frames for the demo_client systems ("Time and Attendance" / "ADP"), generated
+vectorized so million-punch periods build in seconds.
+
+Shifts mix normal (one meal break), long (two breaks), split (long gap), stapled
+(no gap) and short (single punch) patterns, overnight starts, and punches on the
+two days before the period (stragglers). Employees rotate through four locations
+with their own overrides; 2JT is a CBA location (rolling consecutive-day streaks,
+see make_carryover_streaks).
+"""
+
+import numpy as np
+import pandas as pd
+
+CLIENT_ID = "demo_client"
+TA_SYSTEM = "Time and Attendance"
+WFN_SYSTEM = "ADP"
+PAY_DATE = "2026-01-30"
+MIN_WAGE = 17.25
+STATE_MIN_WAGE = 16.5
+PAY_PERIODS_PER_YEAR = 26
+
+CLIENT_PARAMS = {
+    "global": {
+        "pay_period_length": 14,
+        "days_bet_payroll_end_and_pay_date": 6,
+        "min_wage": MIN_WAGE,
+        "state_min_wage": STATE_MIN_WAGE,
+        "pay_periods_per_year": PAY_PERIODS_PER_YEAR,
+        "ot_day_max": 8.0,
+        "ot_week_max": 40,
+        "dt_day_max": 12,
+        "workweek_start": "Sunday",
+        "cba_consec_anyweek": False,
+        "number_of_consec_days_before_ot": 6,
+        "time_gap_for_new_shift": 60,
+    },
+    "locations": {
+        "2JT": {
+            "ot_day_max": 8.5,
+            "dt_day_max": 12.5,
+            "cba_consec_anyweek": True,
+            "time_gap_for_new_shift": 45,
+        },
+        "18F": {"ot_week_max": 38, "number_of_consec_days_before_ot": 5},
+        "18J": {"min_wage": 18.0},
+    },
+}
+LOCATIONS = np.array(["2JT", "18F", "18J", "ABC"])
+FIRST_DAY = pd.Timestamp("2026-01-09")  # 2 straggler days before the period
+PERIOD_DAYS = 17
+PUNCHES_PER_EMPLOYEE = 28  # average, used to size a period by punch count
+
+# Shift patterns: (probability, segments per shift, gap choices after a segment in minutes)
+_PATTERNS = {
+    "normal": (0.45, 2, [20, 30, 35]),
+    "long": (0.15, 3, [25, 31, 40]),
+    "split": (0.10, 2, [90, 150, 240]),
+    "staple": (0.10, 3, [0]),
+    "short": (0.20, 1, [0]),
+}
+
+
+def employees_for_punches(punches: int) -> int:
+    return max(1, round(punches / PUNCHES_PER_EMPLOYEE))
+
+
+def _employee_frame(employees: int) -> pd.DataFrame:
+    emp = np.arange(employees)
+    location = LOCATIONS[emp % len(LOCATIONS)]
+    file_no = 1000 + emp
+    return pd.DataFrame(
+        {
+            "location": location,
+            "file_no": file_no,
+            "ID": np.char.add(
+                np.char.add(location.astype(str), "0"),
+                np.char.zfill(file_no.astype(str), 6),
+            ),
+            "Employee": np.char.add(
+                np.char.add("Last", emp.astype(str)),
+                np.char.add(", First", emp.astype(str)),
+            ),
+        }
+    )
+
+
+def make_ta(employees: int, seed: int = 0) -> pd.DataFrame:
+    """TA intake frame (one row per punch), as read from the punch export."""
+    rng = np.random.default_rng(seed)
+    emps = _employee_frame(employees)
+
+    # 1. Worked (employee, day) pairs and a pattern per shift
+    shift_emp = np.repeat(np.arange(employees), PERIOD_DAYS)
+    shift_day = np.tile(np.arange(PERIOD_DAYS), employees)
+    worked = rng.random(len(shift_emp)) < 0.8
+    shift_emp, shift_day = shift_emp[worked], shift_day[worked]
+    n_shifts = len(shift_emp)
+
+    names = list(_PATTERNS)
+    probs = [_PATTERNS[name][0] for name in names]
+    pattern = rng.choice(len(names), size=n_shifts, p=probs)
+
+    # 2. Shift start: morning/midday, or overnight for ~10% of shifts
+    start_minutes = rng.integers(5, 12, size=n_shifts) * 60 + rng.choice(
+        [0, 7, 15, 30, 45], size=n_shifts
+    )
+    overnight = rng.random(n_shifts) < 0.1
+    start_minutes[overnight] = 20 * 60 + rng.integers(0, 59, size=overnight.sum())
+
+    # 3. One row per segment
+    segments = np.array([_PATTERNS[name][1] for name in names])[pattern]
+    seg_shift = np.repeat(np.arange(n_shifts), segments)
+    seg_pattern = pattern[seg_shift]
+    lengths = rng.uniform(2.0, 5.0, size=len(seg_shift)) * 60
+    lengths[seg_pattern == names.index("short")] = rng.uniform(
+        60, 210, size=(seg_pattern == names.index("short")).sum()
+    )
+    gaps = np.zeros(len(seg_shift))
+    for code, name in enumerate(names):
+        mask = seg_pattern == code
+        gaps[mask] = rng.choice(_PATTERNS[name][2], size=mask.sum())
+
+    # Offset of each segment within its shift = sum of earlier (length + gap)
+    step = lengths + gaps
+    cum = np.cumsum(step) - step
+    shift_first = np.r_[0, np.cumsum(segments)[:-1]]
+    offsets = cum - cum[shift_first][seg_shift]
+
+    day_start = FIRST_DAY.value + shift_day[seg_shift] * 86_400 * 10**9
+    in_ns = day_start + (start_minutes[seg_shift] + offsets).astype(np.int64) * 60 * 10**9
+    out_ns = in_ns + (lengths * 60).astype(np.int64) * 10**9
+
+    # A trailing blank punch row that the system's drop_rows removes
+    emp_rows = emps.iloc[shift_emp[seg_shift]]
+    nat = np.array(["NaT"], dtype="datetime64[ns]")
+    in_punch = pd.to_datetime(in_ns).floor("min").to_numpy()
+    out_punch = pd.to_datetime(out_ns).floor("min").to_numpy()
+    comment = np.full(len(seg_shift) + 1, None, dtype=object)
+    comment[-1] = "c"
+    status_date = np.full(len(seg_shift) + 1, np.datetime64("2025-01-01", "ns"))
+    status_date[-1] = nat[0]
+    return pd.DataFrame(
+        {
+            "Employee": np.r_[emp_rows["Employee"].to_numpy(dtype=object), ["x"]],
+            "ID": np.r_[emp_rows["ID"].to_numpy(dtype=object), ["ABC0999999"]],
+            "In Punch": np.r_[in_punch, nat],
+            "Out Punch": np.r_[out_punch, nat],
+            "In Punch Comment": comment,
+            "Status": "Active",
+            "Status Date": status_date,
+        }
+    )
+
+
+def make_wfn(employees: int, seed: int = 0) -> pd.DataFrame:
+    """WFN payroll intake frame (one row per employee)."""
+    rng = np.random.default_rng(seed + 1)
+    emps = _employee_frame(employees)
+    n = len(emps)
+    wfn = pd.DataFrame(
+        {
+            "CO.": emps["location"].to_numpy(),
+            "FILE#": emps["file_no"].to_numpy(dtype=float),
+            "PAY DATE": pd.Timestamp(PAY_DATE),
+            "Payroll Name": emps["Employee"].to_numpy(),
+            "FLSA Code": rng.choice(["N", "E"], size=n, p=[0.85, 0.15]),
+            "Position Status": rng.choice(
+                ["Active", "Leave", "Terminated"], size=n, p=[0.9, 0.05, 0.05]
+            ),
+            "HIREDATE": pd.Timestamp("2020-01-01"),
+            "Job Title Description": "Cook",
+            "Termination Date": pd.NaT,
+            "Regular Rate Paid": rng.uniform(17, 30, size=n).round(2),
+            "REG": rng.uniform(50, 80, size=n).round(2),
+            "OT": rng.uniform(0, 8, size=n).round(2),
+            "DBLTIME HRS": rng.uniform(0, 2, size=n).round(2),
+            "Regular Earnings Total": rng.uniform(1000, 2000, size=n).round(2),
+            "Overtime Earnings Total": rng.uniform(0, 300, size=n).round(2),
+        }
+    )
+    for col in [
+        "A_MISC ADJUST_flsa earnings",
+        "B_Bonus_Additional Earnings",
+        "C_Ee Commission_Additional Earnings",
+        "E_Auto Gratuities_Additional Earnings",
+        "X_RESTR SVC CHG_Additional Earnings",
+        "Y_BELLMANSVCCHG_Additional Earnings",
+        "D_Double Time_Additional Earnings",
+        "J_Break Credits_Additional Hours",
+        "J_Break Credits_Additional Earnings",
+        "RC - Rest Credit Hours",
+        "RC_Rest Credit_Earnings",
+        "S_Sick Pay_Hours",
+        "S_Sick Pay_Earnings",
+        "V_Vacation_Hours",
+        "V_Vacation_Earnings",
+    ]:
+        wfn[col] = np.where(
+            rng.random(n) < 0.25, rng.uniform(1, 50, size=n), 0.0
+        ).round(2)
+    return wfn
+
+
+def make_waiver(employees: int, seed: int = 0) -> pd.DataFrame:
+    """Meal waiver intake frame (one row per employee)."""
+    rng = np.random.default_rng(seed + 2)
+    emps = _employee_frame(employees)
+    return pd.DataFrame(
+        {
+            "ID": emps["ID"].to_numpy(),
+            "Name": emps["Employee"].to_numpy(),
+            "Check": rng.choice(["x", "", " X "], size=len(emps)),
+        }
+    )
+
+
+def make_carryover_streaks(employees: int, seed: int = 0) -> dict:
+    """Prior-period streaks for the CBA (2JT) employees, as get_carryover_streaks returns them."""
+    rng = np.random.default_rng(seed + 3)
+    emps = _employee_frame(employees)
+    cba = emps[emps["location"] == "2JT"]
+    streaks = rng.integers(0, 7, size=len(cba))
+    return {emp_id: int(s) for emp_id, s in zip(cba["ID"], streaks) if s > 0}
+
+
+def make_pay_period(employees: int, seed: int = 0):
+    """Returns (ta_df, wfn_df, waiver_df) intake frames for one pay period."""
+    return make_ta(employees, seed), make_wfn(employees, seed), make_waiver(employees, seed)
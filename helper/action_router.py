@@ -10,7 +10,7 @@ from helper.aws import (
     delete_pay_period,
 )
 from helper.db_utils import handle_query_ta_records, handle_get_ta_columns
-from helper.file_processor import handle_file_upload
+from helper.file_processor import handle_file_upload, handle_reprocess_employee
 
 
 def route_action(action, params, event):
@@ -27,7 +27,13 @@ def route_action(action, params, event):
     # Use ELIF to prevent the "Default Fallthrough" to file upload
     if action == "query-ta-records":
         return handle_query_ta_records(
-            clientId, employeeId, startDate, endDate, selectedCols
+            clientId,
+            employeeId,
+            startDate,
+            endDate,
+            selectedCols,
+            params.get("cursor"),
+            params.get("pageSize"),
         )
     elif action == "get-ta-columns":
         # TODO (Phase 2): Future implementation. Currently the frontend UI just gets COLUMN_TO_KEEP_DB from the backend, which we use in the backend as well to specifically say which columns to save to the DB.
@@ -52,6 +58,8 @@ def route_action(action, params, event):
         return delete_pay_period(clientId, payDate)
     elif action == "process-files":
         return handle_file_upload(event, params)
+    elif action == "reprocess-employee":
+        return handle_reprocess_employee(event, params)
     else:
         # This will pass return dictionary to lambda_handler which will convert it to API Gateway response
         raise ValueError(f"Unknown action: {action}")
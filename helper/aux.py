@@ -1,7 +1,9 @@
-import time
+import time, resource, threading, tracemalloc
 import pandas as pd
 import json
+from contextlib import contextmanager
 from app_config import (
+    STAGE_PROFILE_MEMORY,
     DEFAULT_PAY_PERIOD_LENGTH,
     DEFAULT_DAYS_BET_PAYROLL_END_AND_PAY_DATE,
     DEFAULT_MIN_WAGE,
@@ -54,12 +56,15 @@ def parse_event_params(event):
         "startDate": body.get("startDate"),
         "endDate": body.get("endDate"),
         "selectedCols": body.get("selectedCols", []),
+        "cursor": body.get("cursor"),
+        "pageSize": body.get("pageSize"),
         "config": body.get("config"),
         "annotations": body.get("annotations"),
         "client_config": body.get("client_config", {}),
         "waiver_key": body.get("waiver_key"),
         "wfn_key": body.get("wfn_key"),
         "ta_key": body.get("ta_key"),
+        "punches": body.get("punches", []),
     }
     return params
 
@@ -107,9 +112,171 @@ def time_and_run_function(func, logs, *args, **kwargs):
     :param logs: list to append log messages
     :return: result of func
     """
-    start = time.time()
-    result = func(*args, **kwargs)
-    end = time.time()
-    elapsed_ms = round((end - start) * 1000, 2)
-    logs.append(f"{func.__name__} took {elapsed_ms} ms")
+    timings = []
+    result = profile_and_run_function(func, timings, *args, **kwargs)
+    logs.append(f"{func.__name__} took {timings[0]['wall_ms']} ms")
     return result
+
+
+def profile_and_run_function(func, timings, /, *args, **kwargs):
+    """
+    Runs func as a profiled stage named after it (see profile_stage) and returns its
+    result. Rows are taken from the result: a DataFrame, or the first DataFrame of a
+    returned tuple.
+    """
+    with profile_stage(timings, func.__name__) as record:
+        result = func(*args, **kwargs)
+        record["rows"] = _row_count(result)
+    return result
+
+
+@contextmanager
+def profile_stage(timings, stage):
+    """
+    Records one named stage into the `timings` list (summary.timing.stages): wall
+    time, rows (set record["rows"] inside the block) and peak memory delta in MB
+    (see STAGE_PROFILE_MEMORY). Stages nest per thread; each record names its
+    parent stage. Memory peaks are process-wide, so a stage overlapping a stage of
+    another thread (concurrent intake, threaded shards) reports None for memory.
+    No-op when timings is None.
+    """
+    if timings is None:
+        yield {}
+        return
+
+    frames = _stage_frames()
+    parent = frames[-1] if frames else None
+    frame = {"start": 0, "peak": 0}
+    _memory_start(frame, parent)
+    frames.append(frame)
+    record = {
+        "stage": stage,
+        "parent": parent["stage"] if parent else None,
+        "rows": None,
+        "wall_ms": None,
+        "peak_mem_delta_mb": None,
+    }
+    frame["stage"] = stage
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["wall_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        frames.pop()
+        record["peak_mem_delta_mb"] = _memory_delta(frame, parent)
+        timings.append(record)
+
+
+def current_stage():
+    """Name of the innermost open profiled stage in this thread (None outside stages)."""
+    frames = _stage_frames()
+    return frames[-1]["stage"] if frames else None
+
+
+_stage_state = threading.local()
+
+
+def _stage_frames():
+    """Open stages of the current thread, innermost last."""
+    if not hasattr(_stage_state, "frames"):
+        _stage_state.frames = []
+    return _stage_state.frames
+
+
+# Stages measuring memory, across threads (id(frame) -> frame)
+_memory_frames = {}
+_memory_lock = threading.Lock()
+
+
+def _memory_start(frame, parent):
+    if STAGE_PROFILE_MEMORY not in ("tracemalloc", "rss"):
+        return
+    with _memory_lock:
+        # The tracing / RSS peaks are process-wide, so a reset here would wipe the peak
+        # of a stage open in another thread: overlapping stages are not measured
+        thread = threading.get_ident()
+        others = [f for f in _memory_frames.values() if f["thread"] != thread]
+        for other in others:
+            other["overlapped"] = True
+        frame["thread"] = thread
+        frame["overlapped"] = bool(others)
+        frame["resettable"] = False
+        _memory_frames[id(frame)] = frame
+        if not frame["overlapped"]:
+            _reset_stage_peak(frame, parent)
+
+
+def _reset_stage_peak(frame, parent):
+    if STAGE_PROFILE_MEMORY == "tracemalloc":
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        current, peak = tracemalloc.get_traced_memory()
+        # The parent keeps the peak reached so far; this stage restarts the tracing peak
+        if parent:
+            parent["peak"] = max(parent["peak"], peak)
+        tracemalloc.reset_peak()
+        frame["start"] = frame["peak"] = current
+    elif STAGE_PROFILE_MEMORY == "rss":
+        current, peak = _rss_bytes()
+        # Same scheme on the kernel's RSS high-water mark, reset when it allows it
+        if parent:
+            parent["peak"] = max(
+                parent["peak"], peak if parent["resettable"] else current
+            )
+        frame["resettable"] = _reset_rss_peak()
+        frame["start"] = frame["peak"] = current
+
+
+def _memory_delta(frame, parent):
+    """
+    Peak memory growth over the stage in MB (None when memory profiling is off, or the
+    stage overlapped a stage of another thread).
+    """
+    with _memory_lock:
+        if _memory_frames.pop(id(frame), None) is None or frame["overlapped"]:
+            return None
+    if STAGE_PROFILE_MEMORY == "tracemalloc" and tracemalloc.is_tracing():
+        peak = max(tracemalloc.get_traced_memory()[1], frame["peak"])
+        if parent:
+            parent["peak"] = max(parent["peak"], peak)
+        return round((peak - frame["start"]) / 1024**2, 2)
+    if STAGE_PROFILE_MEMORY == "rss":
+        current, peak = _rss_bytes()
+        # Without a reset the high-water mark may predate the stage: use current RSS
+        peak = max(peak if frame["resettable"] else current, frame["peak"])
+        if parent:
+            parent["peak"] = max(parent["peak"], peak)
+        return round((peak - frame["start"]) / 1024**2, 2)
+    return None
+
+
+def _rss_bytes():
+    """(current RSS, RSS high-water mark) of the process in bytes."""
+    try:
+        with open("/proc/self/status") as status:
+            kb = {
+                key: int(value.split()[0])
+                for key, value in (line.split(":", 1) for line in status)
+                if key in ("VmRSS", "VmHWM")
+            }
+        return kb["VmRSS"] * 1024, kb["VmHWM"] * 1024
+    except (OSError, KeyError):
+        # No procfs (macOS dev boxes): only the lifetime peak is available
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        return peak, peak
+
+
+def _reset_rss_peak():
+    """Resets VmHWM to the current RSS (Linux clear_refs); False when not permitted."""
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _row_count(result):
+    if isinstance(result, tuple):
+        result = next((r for r in result if isinstance(r, pd.DataFrame)), None)
+    return len(result) if isinstance(result, pd.DataFrame) else None
@@ -1,14 +1,25 @@
-import json, boto3, io, json, traceback
+import json, boto3, io, json, traceback, hashlib, posixpath
 from datetime import datetime, timezone
+import numpy as np
 import pandas as pd
-from app_config import S3_BUCKET
-from client_config import CLIENT_CONFIGS
+from app_config import (
+    S3_BUCKET,
+    TA_STREAMING_READ,
+    INTAKE_CACHE_ENABLED,
+    INTAKE_CACHE_PREFIX,
+    TA_CONTEXT_WFN_COLUMNS,
+    TA_CONTEXT_WAIVER_COLUMNS,
+)
+from client_config import CLIENT_CONFIGS, TA_TARGET_SCHEMA
+import utility
 from io import StringIO
 from botocore.exceptions import ClientError
+from helper.excel_reader import read_excel_detect_system
 from helper.db_utils import (
     delete_ta_from_db,
     delete_daily_df_from_db,
     get_db_connection,
+    release_db_connection,
 )
 from exceptions import (
     AppError,
@@ -154,7 +165,7 @@ def delete_pay_period(client_id, pay_date):
             )
         finally:
             # This safely runs even if an AppError is raised inside the try block!
-            conn.close()
+            release_db_connection(conn)
 
         # --- RETURN PURE DATA ---
         # If we made it here, S3 and DB both succeeded!
@@ -349,16 +360,214 @@ def load_processed_results(client_id, pay_date):
             )
 
 
-def read_wfn_excel_from_s3(key, clientId, engine=None):
+def save_processed_results(client_id, pay_date, result):
+    """Overwrites the processed JSON in S3 (e.g. after patching one employee's rows)"""
+    key = f"clients/{client_id}/processed/{pay_date}/results.json"
+    s3_client.put_object(
+        Bucket=S3_BUCKET,
+        Key=key,
+        Body=json.dumps(result, default=str),
+        ContentType="application/json",
+    )
+    print(f"Saved 'result' as JSON to: s3://{S3_BUCKET}/{key}")
+    return key
+
+
+def _ta_context_key(client_id, pay_date, name):
+    return f"clients/{client_id}/processed/{pay_date}/ta_context/{name}.parquet"
+
+
+def _put_ta_context_frame(client_id, pay_date, name, df):
+    """Writes one TA context frame as Parquet. Best effort only."""
+    key = _ta_context_key(client_id, pay_date, name)
+    try:
+        buffer = io.BytesIO()
+        df.to_parquet(buffer, index=False)
+        s3_client.put_object(
+            Bucket=S3_BUCKET,
+            Key=key,
+            Body=buffer.getvalue(),
+            ContentType="application/vnd.apache.parquet",
+        )
+        print(f"Saved TA context to: s3://{S3_BUCKET}/{key}")
+    except Exception as e:
+        print(f"[WARN] Could not write TA context '{key}': {e}")
+
+
+def save_ta_context_to_s3(
+    client_id, pay_date, processed_wfn_df, processed_waiver_df, employee_rows_df=None
+):
     """
-    Reads WFN Excel file from S3, auto-detects system configuration,
-    and returns (df, system_name, config)
+    Stores the WFN / waiver lookup columns the TA stages read, so a single employee
+    can be reprocessed later without re-running intake, plus the per-employee row
+    counts (see results.employee_row_counts) that reprocessing corrects the summary
+    with. Best effort only.
+    """
+    frames = {"wfn": (processed_wfn_df, TA_CONTEXT_WFN_COLUMNS)}
+    if processed_waiver_df is not None:
+        frames["waiver"] = (processed_waiver_df, TA_CONTEXT_WAIVER_COLUMNS)
+
+    for name, (df, columns) in frames.items():
+        _put_ta_context_frame(
+            client_id, pay_date, name, df[[col for col in columns if col in df.columns]]
+        )
+    if employee_rows_df is not None:
+        save_ta_employee_rows_to_s3(client_id, pay_date, employee_rows_df)
+
+
+def save_ta_employee_rows_to_s3(client_id, pay_date, employee_rows_df):
+    """Stores the per-employee row counts (indexed by ID) of a pay period."""
+    _put_ta_context_frame(
+        client_id, pay_date, "employee_rows", employee_rows_df.reset_index()
+    )
+
+
+def load_ta_context_from_s3(client_id, pay_date):
     """
-    # Step 1: Download file into memory
+    Loads the stored WFN / waiver lookups and per-employee row counts for a pay period.
+    Returns (processed_wfn_df, processed_waiver_df, employee_rows_df); the waiver is
+    None if none was uploaded, the row counts if the period predates them.
+    """
+    frames = {}
+    for name in ("wfn", "waiver", "employee_rows"):
+        key = _ta_context_key(client_id, pay_date, name)
+        try:
+            obj = s3_client.get_object(Bucket=S3_BUCKET, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") != "NoSuchKey":
+                print(f"[ERROR] AWS Error loading S3 object {key}: {str(e)}")
+                raise AppError("Failed to load pay period context", status_code=500)
+            frames[name] = None
+            continue
+        frames[name] = pd.read_parquet(io.BytesIO(obj["Body"].read()))
+
+    if frames["wfn"] is None:
+        raise AppError(
+            "This pay period was processed before employee reprocessing was available. "
+            "Re-run the full file processing once, then retry.",
+            status_code=409,
+        )
+    if frames["employee_rows"] is not None:
+        frames["employee_rows"] = frames["employee_rows"].set_index("ID")
+    return frames["wfn"], frames["waiver"], frames["employee_rows"]
+
+
+def _intake_cache_key(client_id, etag, systems, stream_target_schema=None):
+    """
+    Deterministic cache object for one upload:
+    INTAKE_CACHE_PREFIX<client>/<ETag>.<hash>.parquet. The hash covers the client's
+    configured systems, so editing force_type/detection in CLIENT_CONFIGS invalidates
+    previously cached parses, and the intake columns a streaming read keeps per system
+    (None for a full read), so reduced and full parses, or reads for an older target
+    schema, never share an entry.
+    """
+    columns = None
+    if stream_target_schema is not None:
+        columns = {
+            name: sorted(utility.intake_columns(config, stream_target_schema))
+            for name, config in systems.items()
+        }
+    fingerprint_json = json.dumps(
+        {"systems": systems, "columns": columns}, sort_keys=True, default=str
+    )
+    fingerprint = hashlib.sha1(fingerprint_json.encode("utf-8")).hexdigest()[:10]
+    return f"{INTAKE_CACHE_PREFIX}{client_id}/{etag}.{fingerprint}.parquet"
+
+
+def _read_intake_cache(cache_key, etag, systems):
+    """
+    Loads a cached parse with a single GET; the matched system is stored in the
+    object's metadata. Returns (df, system_name, system_config), or None on a miss.
+    """
+    try:
+        obj = s3_client.get_object(Bucket=S3_BUCKET, Key=cache_key)
+    except ClientError:
+        # NoSuchKey (or AccessDenied when the role cannot list the bucket): a miss
+        return None
+
+    system_name = obj.get("Metadata", {}).get("system")
+    if system_name not in systems:
+        obj["Body"].close()
+        return None
+
+    df = pd.read_parquet(io.BytesIO(obj["Body"].read()))
+
+    # Parquet hands back missing strings as None; restore NaN like read_excel
+    obj_cols = df.select_dtypes(include="object").columns
+    df[obj_cols] = df[obj_cols].where(df[obj_cols].notna(), np.nan)
+
+    df.attrs["source_etag"] = etag
+    print(f"Intake cache hit ({system_name}): s3://{S3_BUCKET}/{cache_key}")
+    return df, system_name, systems[system_name]
+
+
+def _write_intake_cache(cache_key, df, system_name):
+    """Stores the parsed DataFrame as Parquet at cache_key. Best effort only."""
+    try:
+        buffer = io.BytesIO()
+        df.to_parquet(buffer, index=False)
+        s3_client.put_object(
+            Bucket=S3_BUCKET,
+            Key=cache_key,
+            Body=buffer.getvalue(),
+            ContentType="application/vnd.apache.parquet",
+            Metadata={"system": system_name},
+        )
+        print(f"Saved intake cache to: s3://{S3_BUCKET}/{cache_key}")
+    except Exception as e:
+        # e.g. pyarrow missing from the layer, or mixed-type object columns
+        print(f"[WARN] Could not write intake cache to '{cache_key}': {e}")
+
+
+def _read_excel_from_s3_cached(
+    key, systems, client_id, engine=None, stream_target_schema=None
+):
+    """
+    Content-addressed intake: if this exact upload (S3 ETag) was already parsed for the
+    client's configured systems, load the cached Parquet and skip Excel parsing entirely.
+    Otherwise parse the downloaded workbook, detecting its system, then cache the result.
+
+    Returns (df, system_name, system_config), or (None, None, None) if no system matched.
+    The source ETag is kept in df.attrs["source_etag"] (see save_csv_to_s3).
+    """
+    # The raw GET's headers carry the ETag; its body is only read on a cache miss
     obj = s3_client.get_object(Bucket=S3_BUCKET, Key=key)
+    etag = obj.get("ETag", "").strip('"') or None
+
+    cache_key = None
+    if INTAKE_CACHE_ENABLED and etag:
+        cache_key = _intake_cache_key(client_id, etag, systems, stream_target_schema)
+        try:
+            cached = _read_intake_cache(cache_key, etag, systems)
+        except Exception as e:
+            print(f"[WARN] Intake cache lookup failed for '{key}': {e}")
+            cached = None
+        if cached is not None:
+            obj["Body"].close()
+            return cached
+
+    # Cache miss: parse the downloaded file
     file_bytes = io.BytesIO(obj["Body"].read())
 
-    # Get WFN configurations for this client
+    df, system_name, system_config = read_excel_detect_system(
+        file_bytes, systems, engine=engine, stream_target_schema=stream_target_schema
+    )
+    if df is None:
+        return None, None, None
+
+    if cache_key:
+        _write_intake_cache(cache_key, df, system_name)
+        df.attrs["source_etag"] = etag
+
+    return df, system_name, system_config
+
+
+def read_wfn_excel_from_s3(key, clientId, engine=None):
+    """
+    Reads WFN Excel file from S3, auto-detects system configuration,
+    and returns (df, system_name, config)
+    """
+    # Step 1: Get WFN configurations for this client
     wfn_systems = CLIENT_CONFIGS.get(clientId, {}).get("wfn_systems", {})
 
     if not wfn_systems:
@@ -366,45 +575,18 @@ def read_wfn_excel_from_s3(key, clientId, engine=None):
             f"No 'wfn_systems' configured in CLIENT_CONFIGS for client '{clientId}'."
         )
 
-    # Step 2: Loop through WFN systems for detection
-    for wfn_system_name, wfn_config in wfn_systems.items():
-
-        # --- a. Detection inputs ---
-        header_row = wfn_config["detection"]["header"]
-        required_cols = wfn_config["detection"]["columns"]
-
-        # --- b. Peek at header row only ---
-        try:
-            file_bytes.seek(0)  # reset buffer before each read
-            df_header = pd.read_excel(
-                file_bytes, nrows=0, header=header_row, engine=engine
-            )
-        except Exception:
-            continue  # skip this system if read fails
-
-        # --- c. Normalize column names for robust matching ---
-        df_header.columns = df_header.columns.str.strip()
-
-        # --- d. Check required columns presence ---
-        if all(col in df_header.columns for col in required_cols):
-
-            # --- e. Read full DataFrame once the system is matched ---
-            file_bytes.seek(0)
-            force_type = wfn_config.get("force_type", {})  # from CLIENT_CONFIGS
-            df = pd.read_excel(
-                file_bytes,
-                header=header_row,
-                engine=engine,
-                dtype=force_type or None,
-            )
-            df.columns = df.columns.str.strip()  # normalize full DF too
-
-            # Return the dataframe and matched config details
-            return (
-                df,
-                wfn_system_name,
-                wfn_config,
-            )
+    # Step 2: Load from the intake cache, or download, detect the WFN system
+    #         from a single header preview and read the full file
+    df, wfn_system_name, wfn_config = _read_excel_from_s3_cached(
+        key, wfn_systems, clientId, engine=engine
+    )
+    if df is not None:
+        # Return the dataframe and matched config details
+        return (
+            df,
+            wfn_system_name,
+            wfn_config,
+        )
 
     # Step 3: No system matched
     print(
@@ -426,63 +608,38 @@ def read_waiver_excel_from_s3(key, header=0, engine=None):
 
 def read_ta_excel_from_s3(key, clientId, engine=None):
     """
-    Reads Excel file from S3, auto-detects system, and returns (system_name, df, config)
+    Reads Excel file from S3, auto-detects system, and returns (df, system_name, config)
 
     Steps:
-    1. Download the file from S3 into memory.
-    2. Loop through each system defined for the client.
-        a. For each system, get its detection header row and required columns.
-        b. Read only the header row (or nrows=0) to peek at columns.
-        c. Normalize column names (strip whitespace) for robust matching.
-        d. Check if all required columns are present.
-        e. If matched, read the full Excel file using this system's header.
+    1. Download the file. If this upload (same S3 ETag) was already parsed for the
+       configured systems, load the cached Parquet from intake-cache/ and skip steps 2-3.
+    2. Open the workbook once and detect the system (see helper/excel_reader.py):
+        a. Read a single preview of the first sheet, deep enough for every system's header row.
+        b. For each system, normalize its header row (strip whitespace) from the preview.
+        c. Check if all of its required detection columns are present.
+        d. If matched, read the full sheet using this system's header. With TA_STREAMING_READ
+           the sheet is streamed read-only and columns outside the TA intake set are skipped.
     3. If no system matches, raise an error.
     """
 
-    # Step 1: Download file into memory
-    obj = s3_client.get_object(Bucket=S3_BUCKET, Key=key)
-    file_bytes = io.BytesIO(obj["Body"].read())
-
     systems = CLIENT_CONFIGS[clientId]["ta_systems"]
 
-    # Step 2: Loop through systems for detection
-    for ta_system_name, ta_config in systems.items():
-
-        # --- a. Detection inputs ---
-        header_row = ta_config["detection"]["header"]
-        required_cols = ta_config["detection"]["columns"]
-        # ----------------------------
-
-        # --- b. Peek at header row only ---
-        try:
-            file_bytes.seek(0)  # reset buffer before each read
-            df_header = pd.read_excel(
-                file_bytes, nrows=0, header=header_row, engine=engine
-            )
-        except Exception:
-            continue  # skip this system if read fails
-
-        # --- c. Normalize column names for robust matching ---
-        df_header.columns = df_header.columns.str.strip()
-
-        # --- d. Check required columns presence ---
-        if all(col in df_header.columns for col in required_cols):
-
-            # --- e. Read full DataFrame once the system is matched ---
-            file_bytes.seek(0)
-            force_type = ta_config.get("force_type", {})  # from CLIENT_CONFIGS
-            df = pd.read_excel(
-                file_bytes,
-                header=header_row,
-                engine=engine,
-                dtype=force_type or None,
-            )
-            df.columns = df.columns.str.strip()  # normalize full DF too
-            return (
-                df,
-                ta_system_name,
-                ta_config,
-            )  # Return the matched system's config for downstream processing
+    # Step 1 & 2: Load from the intake cache, or download, detect the TA system from a
+    #             single header preview and read the full file. Large punch exports are
+    #             streamed, keeping only the columns TA normalization uses
+    df, ta_system_name, ta_config = _read_excel_from_s3_cached(
+        key,
+        systems,
+        clientId,
+        engine=engine,
+        stream_target_schema=TA_TARGET_SCHEMA if TA_STREAMING_READ else None,
+    )
+    if df is not None:
+        return (
+            df,
+            ta_system_name,
+            ta_config,
+        )  # Return the matched system's config for downstream processing
 
     # Step 3: No system matched
     print(
@@ -545,6 +702,17 @@ def save_csv_to_s3(df, file_type, event, s3_client=None):
     else:
         s3_key = f"clients/{clientID}/csv/{payDate}/{file_type}.csv"
 
+    # Skip re-serializing if this CSV was already written from the same upload (intake cache)
+    source_etag = df.attrs.get("source_etag")
+    if source_etag:
+        try:
+            existing = s3_client.head_object(Bucket=S3_BUCKET, Key=s3_key)
+            if existing.get("Metadata", {}).get("source-etag") == source_etag:
+                print(f"{file_type} CSV already up to date: s3://{S3_BUCKET}/{s3_key}")
+                return s3_key
+        except ClientError:
+            pass  # not written yet
+
     # Convert DataFrame to CSV string
     csv_buffer = StringIO()
     df.to_csv(csv_buffer, index=False)
@@ -555,12 +723,38 @@ def save_csv_to_s3(df, file_type, event, s3_client=None):
         Key=s3_key,
         Body=csv_buffer.getvalue(),
         ContentType="text/csv",
+        Metadata={"source-etag": source_etag} if source_etag else {},
     )
 
     print(f"Saved {file_type} as CSV to: s3://{S3_BUCKET}/{s3_key}")
     return s3_key
 
 
+def archive_raw_upload_to_s3(source_key, file_type, event, s3_client=None):
+    """
+    Archives the uploaded file itself next to the CSVs (server-side copy, nothing is
+    downloaded). Used for TA when the streamed intake frame only holds the
+    normalization columns, so the archive keeps every column of the upload.
+    """
+    if s3_client is None:
+        s3_client = boto3.client("s3")
+
+    body = json.loads(event.get("body", "{}"))
+    payDate = body.get("pay_date")
+    clientID = body.get("client_id")
+
+    extension = posixpath.splitext(source_key)[1] or ".xlsx"
+    s3_key = f"clients/{clientID}/csv/{payDate}/{file_type}{extension}"
+    s3_client.copy_object(
+        Bucket=S3_BUCKET,
+        Key=s3_key,
+        CopySource={"Bucket": S3_BUCKET, "Key": source_key},
+    )
+
+    print(f"Archived raw {file_type} upload to: s3://{S3_BUCKET}/{s3_key}")
+    return s3_key
+
+
 def save_waiver_json_s3(df, file_type, event, s3_client=None):
 
     if s3_client is None:
@@ -1,12 +1,14 @@
 # db_utils.py
 import pandas as pd
 import numpy as np
-import os, psycopg2, uuid, traceback, logging
+import base64, csv, hashlib, io, json, os, psycopg2, threading, uuid, traceback
+import logging, re, weakref
 from psycopg2 import sql
 from psycopg2.extras import execute_values
 import app_config
+import utility
 from datetime import datetime, timedelta
-from exceptions import AppError
+from exceptions import AppError, ValidationError
 
 # Consider extendind accross other files
 logger = logging.getLogger()
@@ -21,6 +23,38 @@ DB_PASSWORD = os.getenv("DB_PASSWORD")
 
 _last_db_connection_error: str | None = None
 
+# Connection pool: idle connections, most recent last. Module level, so connections
+# survive between warm Lambda invocations.
+_idle_connections: list = []
+_pool_lock = threading.Lock()
+
+# Schema registry: {table_name: {column: postgres type}} for the per-client tables whose
+# columns, constraint and indexes this process has already ensured. Saves whose columns
+# are all known skip the catalog checks and DDL.
+_schema_registry: dict[str, dict[str, str]] = {}
+
+# Server-side prepared statements: {connection: names PREPAREd on it}. Weak keys, so the
+# entry goes with its connection; pooled connections keep theirs between invocations.
+_prepared_statements = weakref.WeakKeyDictionary()
+_MAX_PREPARED_PER_CONNECTION = 64
+
+# Managed indexes, created when a table's schema is ensured: {name template: columns}.
+# {client} is the client ID, {table} the (lower-cased) daily_df table name.
+TA_INDEXES = {
+    # Pay-date wipes and delete-pay-period
+    "idx_{client}_pd": ("Pay Date",),
+    # query-ta-records: "In Punch" range without an ID, keyset order ("In Punch", "ID").
+    # Per-employee ranges use the ("ID", "In Punch") unique constraint.
+    "idx_{client}_in_punch": ("In Punch", "ID"),
+}
+DAILY_INDEXES = {
+    # Pay-date wipes and delete-pay-period
+    "idx_{table}_pay_date": ("Fiscal_Pay_Date",),
+    # query-ta-records "Attributed_Workday" range and keyset order; the carryover
+    # streak lookup ("Attributed_Workday" = ...). Per-employee: the primary key.
+    "idx_{table}_workday": ("Attributed_Workday", "ID"),
+}
+
 
 def get_last_db_connection_error() -> str | None:
     """Returns the reason for the most recent failed get_db_connection() call."""
@@ -57,14 +91,16 @@ def get_carryover_streaks(client_id, pay_date, client_params):
         ).strftime("%Y-%m-%d")
 
         # 2. Query the database (NEW: We added "Location" to the SELECT statement)
-        query = f"""
+        query = sql.SQL(
+            """
             SELECT "ID", "Days_Worked_In_Week", "Location"
-            FROM {client_id}_daily_df
+            FROM {table}
             WHERE "Attributed_Workday" = %s
         """
+        ).format(table=sql.Identifier(f"{client_id}_daily_df".lower()))
 
         with conn.cursor() as cur:
-            cur.execute(query, (last_day_prior_pay_period,))
+            _execute_prepared(cur, query, (last_day_prior_pay_period,))
 
             # 3. Filter the results dynamically based on the JSON config
             filtered_dict = {}
@@ -89,37 +125,52 @@ def get_carryover_streaks(client_id, pay_date, client_params):
         logger.error(f"Failed to fetch carryover streaks: {e}")
         return {}
     finally:
-        conn.close()
+        release_db_connection(conn)
 
 
-def worker_save_ta(df, clientId, pay_date):
+def worker_save_ta(df, clientId, pay_date, employee_id=None):
     """Worker thread for raw punches. Gets its own isolated connection."""
     conn = get_db_connection()
     if not conn:
         raise ConnectionError("Raw TA Worker: DB connection failed.")
     try:
-        save_ta_to_db(df, clientId, pay_date, conn)
+        try:
+            save_ta_to_db(df, clientId, pay_date, conn, employee_id)
+        except (psycopg2.errors.UndefinedTable, psycopg2.errors.UndefinedColumn):
+            # Table dropped / altered outside this process since the schema registry
+            # cached it; the failed save forgot the entry, so this re-runs the checks
+            save_ta_to_db(df, clientId, pay_date, conn, employee_id)
     finally:
-        conn.close()
+        release_db_connection(conn)
 
 
-def worker_save_daily(daily_df, clientId, pay_date):
+def worker_save_daily(daily_df, clientId, pay_date, employee_id=None):
     """Worker thread for daily totals. Gets its own isolated connection."""
     conn = get_db_connection()
     if not conn:
         raise ConnectionError("Daily DF Worker: DB connection failed.")
     try:
-        save_daily_df_to_db(daily_df, clientId, pay_date, conn)
+        try:
+            save_daily_df_to_db(daily_df, clientId, pay_date, conn, employee_id)
+        except (psycopg2.errors.UndefinedTable, psycopg2.errors.UndefinedColumn):
+            # Table dropped / altered outside this process since the schema registry
+            # cached it; the failed save forgot the entry, so this re-runs the checks
+            save_daily_df_to_db(daily_df, clientId, pay_date, conn, employee_id)
     finally:
-        conn.close()
+        release_db_connection(conn)
 
 
 def save_daily_df_to_db(
-    daily_df: pd.DataFrame, clientId: str, target_pay_date: str, conn
+    daily_df: pd.DataFrame,
+    clientId: str,
+    target_pay_date: str,
+    conn,
+    employee_id: str | None = None,
 ):
     """
     Saves the daily_df to PostgreSQL using a transactional Wipe & Reload pattern
     to prevent ghost records, and dynamically manages schema evolution.
+    With employee_id, only that employee's rows for the pay date are wiped.
     """
     if daily_df.empty:
         logger.info("daily_df is empty. Nothing to save.")
@@ -128,11 +179,9 @@ def save_daily_df_to_db(
     # 1. Prepare Metadata and Table Naming
     table_name = f"{clientId}_daily_df".lower()
 
-    df = daily_df.copy()
+    df = utility.categorical_to_object(daily_df.copy())
     df["Last_Updated"] = pd.Timestamp.now(tz="America/Los_Angeles")
-
-    # Critical: psycopg2 crashes on Pandas NaN/NaT. Convert them to Python None (SQL NULL)
-    df = df.where(pd.notnull(df), None)
+    temp_table = f"temp_daily_{uuid.uuid4().hex[:8]}"
 
     logger.info(f"Connected to DB - preparing to upsert to {table_name}")
 
@@ -143,74 +192,22 @@ def save_daily_df_to_db(
             with conn.cursor() as cursor:
 
                 # --- 2. DYNAMIC SCHEMA MANAGEMENT ---
-                def get_pg_type(dtype):
-                    dtype_str = str(dtype)
-                    if "int" in dtype_str:
-                        return "INTEGER"
-                    if "float" in dtype_str:
-                        return "NUMERIC"
-                    if "bool" in dtype_str:
-                        return "BOOLEAN"
-                    if "datetime" in dtype_str:
-                        return "TIMESTAMP WITH TIME ZONE"
-                    return "TEXT"
-
-                # Check if table exists
-                cursor.execute(
-                    """
-                    SELECT EXISTS (
-                        SELECT FROM information_schema.tables 
-                        WHERE table_schema = 'public' AND table_name = %s
-                    );
-                """,
-                    (table_name,),
-                )
-
-                table_exists = cursor.fetchone()[0]
-
-                if not table_exists:
-                    # Auto-create the table
-                    cols = [
-                        f'"{col}" {get_pg_type(dtype)}'
-                        for col, dtype in df.dtypes.items()
-                    ]
-                    create_query = f"""
-                        CREATE TABLE {table_name} (
-                            {', '.join(cols)}, 
-                            PRIMARY KEY ("ID", "Attributed_Workday")
-                        );
-                    """
-                    cursor.execute(create_query)
-                else:
-                    # Check for missing columns and auto-alter
-                    cursor.execute(
-                        """
-                        SELECT column_name 
-                        FROM information_schema.columns 
-                        WHERE table_name = %s;
-                    """,
-                        (table_name,),
-                    )
-                    existing_cols_lower = [row[0].lower() for row in cursor.fetchall()]
-
-                    for col in df.columns:
-                        if col.lower() not in existing_cols_lower:
-                            alter_query = f'ALTER TABLE {table_name} ADD COLUMN "{col}" {get_pg_type(df[col].dtype)};'
-                            cursor.execute(alter_query)
-
-                # --- 2.5 CREATE FAST LOOKUP INDEX ---
-                index_name = f"idx_{table_name}_pay_date"
-                index_query = f"""
-                    CREATE INDEX IF NOT EXISTS {index_name} 
-                    ON {table_name} ("Fiscal_Pay_Date");
-                """
-                cursor.execute(index_query)
+                # Catalog checks and DDL only run while the schema registry is missing
+                # one of the frame's columns
+                live_types = _known_column_types(table_name, df)
+                if live_types is None:
+                    _ensure_daily_schema(cursor, table_name, df)
+                    live_types = _register_table_schema(cursor, table_name)
 
                 # --- 3. WIPE AND RELOAD ---
-                delete_query = f'DELETE FROM {table_name} WHERE "Fiscal_Pay_Date" = %s;'
-                cursor.execute(delete_query, (str(target_pay_date),))
-
-                # --- 4. BULK UPSERT ---
+                delete_query = f'DELETE FROM {table_name} WHERE "Fiscal_Pay_Date" = %s'
+                delete_params = [str(target_pay_date)]
+                if employee_id is not None:
+                    delete_query += ' AND "ID" = %s'
+                    delete_params.append(employee_id)
+                cursor.execute(delete_query + ";", tuple(delete_params))
+
+                # --- 4. BULK UPSERT THROUGH A STAGING TABLE ---
                 columns = [f'"{col}"' for col in df.columns]
 
                 update_cols = [
@@ -219,25 +216,42 @@ def save_daily_df_to_db(
                     if col not in ("ID", "Attributed_Workday")
                 ]
 
-                insert_query = f"""
-                    INSERT INTO {table_name} ({', '.join(columns)}) 
-                    VALUES %s
-                    ON CONFLICT ("ID", "Attributed_Workday") 
+                # Staging table typed like the live table; the COPY serializer writes
+                # NaN / NaT / None as NULL, so the frame is never converted to object
+                temp_cols_sql = _build_temp_cols_sql(live_types, df)
+                cursor.execute(
+                    f'CREATE TEMP TABLE "{temp_table}" ({temp_cols_sql}) ON COMMIT DROP;'
+                )
+                if app_config.DB_COPY_LOAD:
+                    copy_df_to_table(cursor, df, temp_table)
+                else:
+                    # Critical: psycopg2 crashes on Pandas NaN/NaT. Convert them to Python None (SQL NULL)
+                    values = [
+                        tuple(row) for row in df.where(pd.notnull(df), None).to_numpy()
+                    ]
+                    stage_query = (
+                        f'INSERT INTO "{temp_table}" ({", ".join(columns)}) VALUES %s'
+                    )
+                    execute_values(cursor, stage_query, values)
+
+                upsert_query = f"""
+                    INSERT INTO {table_name} ({', '.join(columns)})
+                    SELECT {', '.join(columns)} FROM "{temp_table}"
+                    ON CONFLICT ("ID", "Attributed_Workday")
                     DO UPDATE SET {', '.join(update_cols)};
                 """
-
-                values = [tuple(row) for row in df.to_numpy()]
-                execute_values(cursor, insert_query, values)
+                cursor.execute(upsert_query)
 
                 logger.info(f"✓ Successfully upserted {len(df)} rows to {table_name}")
 
     except Exception as e:
-        # The 'with conn' block already handled the rollback!
+        # The 'with conn' block already handled the rollback (and any DDL with it)
+        _forget_table_schema(table_name)
         logger.error(f"Error saving daily_df to DB: {e}")
         raise e
 
 
-def save_ta_to_db(df, clientId, pay_date, conn):
+def save_ta_to_db(df, clientId, pay_date, conn, employee_id=None):
 
     pay_date = pd.Timestamp(pay_date)
 
@@ -266,7 +280,7 @@ def save_ta_to_db(df, clientId, pay_date, conn):
         cols_to_keep = [
             col for sublist in app_config.COLUMN_TO_KEEP_DB.values() for col in sublist
         ]
-        df = df[cols_to_keep].copy()
+        df = utility.categorical_to_object(df[cols_to_keep].copy())
     except KeyError as e:
         print(f"Column missing from DataFrame: {e}")
         raise
@@ -282,67 +296,42 @@ def save_ta_to_db(df, clientId, pay_date, conn):
             # ALL database steps must be inside this 'with cur' block
             with conn.cursor() as cur:
 
-                # 1. Create table
-                cols_sql = ", ".join(
-                    [f'"{c}" {get_pg_type(df[c].dtype)}' for c in df.columns]
-                )
-                cur.execute(
-                    f'CREATE TABLE IF NOT EXISTS "{full_table_name}" ({cols_sql});'
-                )
-
-                # 2. Schema evolution - add new cols if they don't exist
-                cur.execute(
-                    f"SELECT column_name FROM information_schema.columns WHERE table_name = %s",
-                    (full_table_name,),
-                )
-                existing_db_cols = {row[0] for row in cur.fetchall()}
-                new_cols = [c for c in df.columns if c not in existing_db_cols]
+                # 1-3. Schema: catalog checks and DDL only run while the schema
+                # registry is missing one of the frame's columns
+                live_types = _known_column_types(full_table_name, df)
+                if live_types is None:
+                    _ensure_ta_schema(cur, full_table_name, clientId, df)
+                    live_types = _register_table_schema(cur, full_table_name)
 
-                for col in new_cols:
-                    pg_type = get_pg_type(df[col].dtype)
-                    print(f"Adding new column: {col}")
+                # 3c. THE WIPE: Clear existing records for this pay period to prevent ghost records
+                # (only the reprocessed employee's records when employee_id is given)
+                if employee_id is None:
+                    print(f"Wiping existing records for pay date: {pay_date}")
                     cur.execute(
-                        f'ALTER TABLE "{full_table_name}" ADD COLUMN "{col}" {pg_type};'
+                        f'DELETE FROM "{full_table_name}" WHERE "Pay Date" = %s;',
+                        (pay_date,),
+                    )
+                else:
+                    print(f"Wiping existing records for {employee_id}, pay date: {pay_date}")
+                    cur.execute(
+                        f'DELETE FROM "{full_table_name}" WHERE "Pay Date" = %s AND "ID" = %s;',
+                        (pay_date, employee_id),
                     )
-
-                # 3. Constraint - ensure unique on ID + In Punch
-                constraint_name = f"uq_{full_table_name}"
-                cur.execute(
-                    f"""
-                    DO $$ BEGIN
-                        IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = '{constraint_name}') THEN
-                            ALTER TABLE "{full_table_name}" ADD CONSTRAINT "{constraint_name}" UNIQUE ("ID", "In Punch");
-                        END IF;
-                    END $$;
-                """
-                )
-
-                # 3b. Add Index on "Pay Date" for fast deletions if not created already
-                # We use the clientId in the name to keep it unique across the DB
-                index_name = f"idx_{clientId}_pd"
-                print(f"Ensuring index {index_name} exists on {full_table_name}")
-                cur.execute(
-                    f'CREATE INDEX IF NOT EXISTS "{index_name}" ON "{full_table_name}" ("Pay Date");'
-                )
-
-                # 3c. THE WIPE: Clear existing records for this pay period to prevent ghost records
-                print(f"Wiping existing records for pay date: {pay_date}")
-                cur.execute(
-                    f'DELETE FROM "{full_table_name}" WHERE "Pay Date" = %s;',
-                    (pay_date,),
-                )
 
                 # 4. Temp table for upsert — match live table types to avoid cast errors
-                temp_cols_sql = _build_temp_cols_sql(cur, full_table_name, df)
+                temp_cols_sql = _build_temp_cols_sql(live_types, df)
                 cur.execute(
                     f'CREATE TEMP TABLE "{temp_table}" ({temp_cols_sql}) ON COMMIT DROP;'
                 )
 
-                # 5. Bulk insert
-                data = [tuple(x) for x in df.replace({np.nan: None}).to_numpy()]
+                # 5. Bulk load into the temp table
                 cols_str = ", ".join([f'"{c}"' for c in df.columns])
-                insert_query = f'INSERT INTO "{temp_table}" ({cols_str}) VALUES %s'
-                execute_values(cur, insert_query, data, page_size=2000)
+                if app_config.DB_COPY_LOAD:
+                    copy_df_to_table(cur, df, temp_table)
+                else:
+                    data = [tuple(x) for x in df.replace({np.nan: None}).to_numpy()]
+                    insert_query = f'INSERT INTO "{temp_table}" ({cols_str}) VALUES %s'
+                    execute_values(cur, insert_query, data, page_size=2000)
 
                 # 6. Upsert
                 update_cols = [c for c in df.columns if c not in ["ID", "In Punch"]]
@@ -361,6 +350,7 @@ def save_ta_to_db(df, clientId, pay_date, conn):
 
     except Exception as e:
         # Re-raise the error so lambda_handler knows it failed
+        _forget_table_schema(full_table_name)
         print(f"Error during DB transaction: {e}")
         raise e
     finally:
@@ -368,24 +358,61 @@ def save_ta_to_db(df, clientId, pay_date, conn):
         print("Closing database cursor logic.")
 
 
+def _connect():
+    return psycopg2.connect(
+        host=os.getenv("DB_HOST"),
+        port=os.getenv("DB_PORT", "5432"),
+        database=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        connect_timeout=5,  # Reduced timeout for faster feedback
+    )
+
+
+def _is_healthy(conn) -> bool:
+    """
+    Pings a pooled connection before reuse: the server, a pooler or an idle-session
+    timeout can drop it at any time, and callers do not retry their first statement.
+    Autocommit keeps the ping a single round trip (no BEGIN / ROLLBACK).
+    """
+    if conn.closed:
+        return False
+    try:
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+        finally:
+            conn.autocommit = False
+        return True
+    except psycopg2.Error:
+        return False
+
+
 def get_db_connection():
     """
-    Attempts to connect to the DB, graceful exit continues code if unreachable.
-    Returns the connection object if successful, or None if the DB is unreachable.
+    Hands out a connection from the module-level pool, which outlives warm Lambda
+    invocations; a fresh connection is opened only when no healthy idle one is left
+    (e.g. after the serverless DB paused and dropped them). Give it back with
+    release_db_connection. Returns None if the DB is unreachable.
     """
     global _last_db_connection_error
     _last_db_connection_error = None
 
     try:
-        conn = psycopg2.connect(
-            host=os.getenv("DB_HOST"),
-            port=os.getenv("DB_PORT", "5432"),
-            database=os.getenv("DB_NAME"),
-            user=os.getenv("DB_USER"),
-            password=os.getenv("DB_PASSWORD"),
-            connect_timeout=5,  # Reduced timeout for faster feedback
-        )
-        return conn
+        # 1. Reuse the most recently released connection that still answers
+        while True:
+            with _pool_lock:
+                if not _idle_connections:
+                    break
+                conn = _idle_connections.pop()
+            if _is_healthy(conn):
+                return conn
+            logger.info("Discarding a dead pooled DB connection.")
+            conn.close()
+
+        # 2. Pool is empty: connect
+        return _connect()
     except psycopg2.OperationalError as e:
         # This catches "Connection Refused" (Instance paused)
         _last_db_connection_error = (
@@ -403,6 +430,136 @@ def get_db_connection():
         return None
 
 
+def release_db_connection(conn):
+    """
+    Returns a get_db_connection connection to the pool, rolling back whatever the
+    caller left open. Broken connections, and any beyond DB_POOL_SIZE, are closed.
+    """
+    if conn is None or conn.closed:
+        return
+    try:
+        if conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            conn.rollback()
+    except psycopg2.Error:
+        conn.close()  # server side is gone (UNKNOWN status) or rollback failed
+        return
+
+    with _pool_lock:
+        if len(_idle_connections) < app_config.DB_POOL_SIZE:
+            _idle_connections.append(conn)
+            return
+    conn.close()
+
+
+def _ensure_ta_schema(cur, full_table_name: str, clientId: str, df: pd.DataFrame):
+    """Creates / evolves the TA table, its constraint and indexes (catalog + DDL)."""
+    # 1. Create table
+    cols_sql = ", ".join([f'"{c}" {get_pg_type(df[c].dtype)}' for c in df.columns])
+    cur.execute(f'CREATE TABLE IF NOT EXISTS "{full_table_name}" ({cols_sql});')
+
+    # 2. Schema evolution - add new cols if they don't exist
+    cur.execute(
+        f"SELECT column_name FROM information_schema.columns WHERE table_name = %s",
+        (full_table_name,),
+    )
+    existing_db_cols = {row[0] for row in cur.fetchall()}
+    new_cols = [c for c in df.columns if c not in existing_db_cols]
+
+    for col in new_cols:
+        pg_type = get_pg_type(df[col].dtype)
+        print(f"Adding new column: {col}")
+        cur.execute(f'ALTER TABLE "{full_table_name}" ADD COLUMN "{col}" {pg_type};')
+
+    # 3. Constraint - ensure unique on ID + In Punch
+    constraint_name = f"uq_{full_table_name}"
+    cur.execute(
+        f"""
+        DO $$ BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = '{constraint_name}') THEN
+                ALTER TABLE "{full_table_name}" ADD CONSTRAINT "{constraint_name}" UNIQUE ("ID", "In Punch");
+            END IF;
+        END $$;
+    """
+    )
+
+    # 3b. Managed indexes (TA_INDEXES) if not created already
+    # We use the clientId in the names to keep them unique across the DB
+    _ensure_indexes(cur, full_table_name, TA_INDEXES, client=clientId)
+
+
+def _ensure_daily_schema(cursor, table_name: str, df: pd.DataFrame):
+    """Creates / evolves the daily_df table and its indexes (catalog + DDL)."""
+
+    def get_pg_type(dtype):
+        dtype_str = str(dtype)
+        if "int" in dtype_str:
+            return "INTEGER"
+        if "float" in dtype_str:
+            return "NUMERIC"
+        if "bool" in dtype_str:
+            return "BOOLEAN"
+        if "datetime" in dtype_str:
+            return "TIMESTAMP WITH TIME ZONE"
+        return "TEXT"
+
+    # 1. Create the table, or add the columns it is missing
+    cursor.execute(
+        """
+        SELECT EXISTS (
+            SELECT FROM information_schema.tables 
+            WHERE table_schema = 'public' AND table_name = %s
+        );
+    """,
+        (table_name,),
+    )
+
+    table_exists = cursor.fetchone()[0]
+
+    if not table_exists:
+        # Auto-create the table
+        cols = [f'"{col}" {get_pg_type(dtype)}' for col, dtype in df.dtypes.items()]
+        create_query = f"""
+            CREATE TABLE {table_name} (
+                {', '.join(cols)}, 
+                PRIMARY KEY ("ID", "Attributed_Workday")
+            );
+        """
+        cursor.execute(create_query)
+    else:
+        # Check for missing columns and auto-alter
+        cursor.execute(
+            """
+            SELECT column_name 
+            FROM information_schema.columns 
+            WHERE table_name = %s;
+        """,
+            (table_name,),
+        )
+        existing_cols_lower = [row[0].lower() for row in cursor.fetchall()]
+
+        for col in df.columns:
+            if col.lower() not in existing_cols_lower:
+                alter_query = f'ALTER TABLE {table_name} ADD COLUMN "{col}" {get_pg_type(df[col].dtype)};'
+                cursor.execute(alter_query)
+
+    # 2. Create fast lookup indexes (DAILY_INDEXES)
+    _ensure_indexes(cursor, table_name, DAILY_INDEXES, table=table_name)
+
+
+def _ensure_indexes(cur, table_name: str, indexes: dict, **names):
+    """CREATE INDEX IF NOT EXISTS for each managed index; names fill the templates."""
+    for template, columns in indexes.items():
+        index_name = template.format(**names)
+        print(f"Ensuring index {index_name} exists on {table_name}")
+        cur.execute(
+            sql.SQL("CREATE INDEX IF NOT EXISTS {} ON {} ({});").format(
+                sql.Identifier(index_name),
+                sql.Identifier(table_name),
+                sql.SQL(", ").join(map(sql.Identifier, columns)),
+            )
+        )
+
+
 def get_pg_type(dtype):
     """Maps pandas dtypes to PostgreSQL types."""
     if pd.api.types.is_integer_dtype(dtype):
@@ -418,7 +575,8 @@ def get_pg_type(dtype):
 
 def _fetch_pg_column_types(cur, table_name: str) -> dict[str, str]:
     """Returns {column_name: postgres_type} for an existing table."""
-    cur.execute(
+    _execute_prepared(
+        cur,
         """
         SELECT a.attname, pg_catalog.format_type(a.atttypid, a.atttypmod)
         FROM pg_catalog.pg_attribute a
@@ -434,21 +592,95 @@ def _fetch_pg_column_types(cur, table_name: str) -> dict[str, str]:
     return {row[0]: row[1] for row in cur.fetchall()}
 
 
-def _build_temp_cols_sql(cur, table_name: str, df: pd.DataFrame) -> str:
+def _known_column_types(table_name: str, df: pd.DataFrame) -> dict[str, str] | None:
+    """
+    Live column types from the schema registry, or None when the table has not been
+    ensured by this process yet or df brings a column the registry has not seen.
+    """
+    known = _schema_registry.get(table_name)
+    if known is None or not all(col in known for col in df.columns):
+        return None
+    return known
+
+
+def _register_table_schema(cur, table_name: str) -> dict[str, str]:
+    """Records the table's live column types once its schema DDL has run."""
+    _schema_registry[table_name] = _fetch_pg_column_types(cur, table_name)
+    return _schema_registry[table_name]
+
+
+def _forget_table_schema(table_name: str):
+    """Drops a registry entry, e.g. when the transaction that ensured it rolled back."""
+    _schema_registry.pop(table_name, None)
+
+
+def _build_temp_cols_sql(existing_types: dict[str, str], df: pd.DataFrame) -> str:
     """
     Build column definitions for a temp staging table.
-    Prefer types from the live table so INSERT...SELECT never hits text/timestamp mismatches.
+    Prefer types from the live table (existing_types, as _fetch_pg_column_types returns
+    them) so INSERT...SELECT never hits text/timestamp mismatches.
+    Timezone-aware columns are staged as timestamptz, so their offset is applied when
+    the upsert casts them to the live type (as psycopg2's timestamptz literals were).
     """
-    existing_types = _fetch_pg_column_types(cur, table_name)
     parts = []
     for col in df.columns:
-        if col in existing_types:
+        if isinstance(df[col].dtype, pd.DatetimeTZDtype):
+            parts.append(f'"{col}" TIMESTAMP WITH TIME ZONE')
+        elif col in existing_types:
             parts.append(f'"{col}" {existing_types[col]}')
         else:
             parts.append(f'"{col}" {get_pg_type(df[col].dtype)}')
     return ", ".join(parts)
 
 
+# NULL marker for COPY: every CSV field is quoted, so FORCE_NULL maps a quoted \N to
+# NULL while empty strings stay ''.
+_COPY_NULL = "\\N"
+
+
+def copy_df_to_table(cur, df: pd.DataFrame, table_name: str):
+    """
+    Streams df into table_name with COPY FROM STDIN (CSV), serializing
+    DB_COPY_CHUNK_ROWS rows at a time instead of building one tuple per row.
+    NaN / NaT / None load as NULL; the table's column types parse the values.
+    """
+    cols_str = ", ".join(f'"{c}"' for c in df.columns)
+    copy_query = (
+        f'COPY "{table_name}" ({cols_str}) FROM STDIN '
+        f"WITH (FORMAT csv, NULL '{_COPY_NULL}', FORCE_NULL ({cols_str}))"
+    )
+    cur.copy_expert(copy_query, _CsvCopyReader(df, app_config.DB_COPY_CHUNK_ROWS))
+
+
+class _CsvCopyReader:
+    """File-like object for copy_expert: yields the frame as CSV, one chunk of rows at a time."""
+
+    def __init__(self, df: pd.DataFrame, chunk_rows: int):
+        chunk_rows = max(chunk_rows, 1)
+        self._chunks = (
+            df.iloc[start : start + chunk_rows] for start in range(0, len(df), chunk_rows)
+        )
+        self._buffer = io.StringIO()
+
+    def read(self, size=-1):
+        # An empty read means end of data to psycopg2, so move on to the next chunk
+        while True:
+            data = self._buffer.read(size)
+            if data:
+                return data
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return ""
+            self._buffer = io.StringIO(
+                chunk.to_csv(
+                    header=False,
+                    index=False,
+                    quoting=csv.QUOTE_ALL,
+                    na_rep=_COPY_NULL,
+                )
+            )
+
+
 def delete_ta_from_db(conn, clientId, pay_date):
     """
     Deletes all rows for a specific pay date from ta table.
@@ -572,12 +804,151 @@ def handle_get_ta_columns(clientId):
         raise AppError(f"Failed to fetch columns: {str(e)}", status_code=500)
 
     finally:
-        # 3. THE SAFETY NET: Always close the connection!
-        if conn:
-            conn.close()
+        # 3. THE SAFETY NET: Always hand the connection back to the pool!
+        release_db_connection(conn)
+
+
+def _execute_prepared(cur, query, params=()):
+    """
+    Runs query (str or sql.Composable, %s placeholders) as a named prepared statement:
+    PREPAREd the first time a connection sees its text, then only EXECUTEd, so
+    Postgres skips parsing (and planning, once it settles on a generic plan).
+    Plain execute when DB_PREPARED_STATEMENTS is off. Meant for hot fixed-shape
+    queries; one-off statements would only use up the per-connection budget.
+    """
+    if not app_config.DB_PREPARED_STATEMENTS:
+        cur.execute(query, params)
+        return
+
+    statement, placeholders = _numbered_statement(cur, query)
+    if placeholders != len(params):
+        cur.execute(query, params)  # let psycopg2 report the mismatch
+        return
+
+    name = f"ps_{hashlib.md5(statement.encode()).hexdigest()[:16]}"
+    prepared = _prepared_statements.setdefault(cur.connection, set())
+    if name not in prepared:
+        if len(prepared) >= _MAX_PREPARED_PER_CONNECTION:
+            cur.execute("DEALLOCATE ALL")  # e.g. many selectedCols combinations
+            prepared.clear()
+        cur.execute(f"PREPARE {name} AS {statement}")
+        prepared.add(name)
+
+    if params:
+        cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+    else:
+        cur.execute(f"EXECUTE {name}")
+
+
+def _numbered_statement(cur, query) -> tuple[str, int]:
+    """
+    PREPARE body of query and its placeholder count. The %s of its SQL text and its
+    sql.Placeholder parts become $1..$n in order; sql.Identifier / sql.Literal parts
+    are rendered as they are, so a "%s" inside a column name is never renumbered. A str
+    query is taken as SQL text written in this module (no interpolated identifiers).
+    """
+    count = 0
+
+    def number():
+        nonlocal count
+        count += 1
+        return f"${count}"
+
+    def render(part):
+        if isinstance(part, sql.Composed):
+            return "".join(render(p) for p in part.seq)
+        if isinstance(part, sql.SQL):
+            if "%" not in part.string:
+                return part.string
+            return re.sub(
+                r"%%|%s", lambda m: "%" if m.group() == "%%" else number(), part.string
+            )
+        if isinstance(part, sql.Placeholder):
+            if part.name:
+                raise ValueError("Named placeholders cannot be prepared.")
+            return number()
+        return part.as_string(cur)
+
+    statement = render(query if isinstance(query, sql.Composable) else sql.SQL(query))
+    return statement, count
 
 
-def handle_query_ta_records(clientId, employeeId, startDate, endDate, selectedCols):
+def _encode_query_cursor(state: dict) -> str:
+    """Opaque continuation token: {stream: last key sent} for the unfinished streams."""
+    return base64.urlsafe_b64encode(json.dumps(state, default=str).encode()).decode()
+
+
+def _decode_query_cursor(cursor: str) -> dict:
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(state, dict) or not state or set(state) - {"raw", "daily"}:
+            raise ValueError("unexpected cursor state")
+        if any(not isinstance(key, list) or len(key) != 2 for key in state.values()):
+            raise ValueError("unexpected cursor key")
+        return state
+    except (ValueError, TypeError, AttributeError):
+        raise ValidationError("Invalid cursor. Restart the query from the first page.")
+
+
+def _fetch_keyset_page(
+    cur, table_name, fields, filters, params, key_cols, after, limit
+):
+    """
+    One page of table_name ordered by key_cols, starting after the `after` key (None
+    for the first page). Returns (rows as dicts, last key, or None on the last page).
+    """
+    where = list(filters)
+    params = list(params)
+    if after is not None:
+        where.append(
+            sql.SQL("({}) > ({})").format(
+                sql.SQL(", ").join(map(sql.Identifier, key_cols)),
+                sql.SQL(", ").join([sql.Placeholder()] * len(key_cols)),
+            )
+        )
+        params += after
+
+    query = sql.SQL(
+        "SELECT {fields} FROM {table} WHERE {where} ORDER BY {order} LIMIT %s"
+    ).format(
+        fields=sql.SQL(", ").join(map(sql.Identifier, fields)),
+        table=sql.Identifier(table_name),
+        where=sql.SQL(" AND ").join(where) if where else sql.SQL("TRUE"),
+        order=sql.SQL(", ").join(
+            sql.SQL("{} ASC").format(sql.Identifier(c)) for c in key_cols
+        ),
+    )
+    # One extra row tells whether another page follows
+    _execute_prepared(cur, query, (*params, limit + 1))
+
+    columns = [desc[0] for desc in cur.description]
+    rows = cur.fetchmany(limit)
+    has_more = cur.fetchone() is not None
+    records = [dict(zip(columns, row)) for row in rows]
+    last_key = [records[-1][c] for c in key_cols] if has_more else None
+    return records, last_key
+
+
+def handle_query_ta_records(
+    clientId, employeeId, startDate, endDate, selectedCols, cursor=None, pageSize=None
+):
+    """
+    Raw punches and daily totals for the DB UI, keyset-paginated on ("In Punch", "ID")
+    and ("Attributed_Workday", "ID"). Each call returns up to pageSize rows of each;
+    pass the returned next_cursor back (same filters) for the next page. next_cursor is
+    None once both are exhausted.
+    """
+    # 0. Page size and position
+    try:
+        page_size = int(pageSize or app_config.QUERY_PAGE_SIZE)
+    except (TypeError, ValueError):
+        raise ValidationError(f"pageSize must be a whole number, got {pageSize!r}.")
+    if page_size < 1:
+        raise ValidationError("pageSize must be at least 1.")
+    page_size = min(page_size, app_config.QUERY_MAX_PAGE_SIZE)
+    state = _decode_query_cursor(cursor) if cursor else {"raw": None, "daily": None}
+
+    conn = None
     try:
         conn = get_db_connection()
         if conn is None:
@@ -587,38 +958,42 @@ def handle_query_ta_records(clientId, employeeId, startDate, endDate, selectedCo
 
         cur = conn.cursor()
 
-        # ==========================================
-        # 1. FETCH RAW PUNCHES (The "Cause")
-        # ==========================================
-        raw_table_name = f"{clientId}_ta"
-        base_cols = ["ID", "In Punch", "Out Punch", "Employee"]
-        all_cols = base_cols + [c for c in selectedCols if c not in base_cols]
-
-        select_clause = sql.SQL(", ").join(map(sql.Identifier, all_cols))
-        raw_query = sql.SQL("SELECT {fields} FROM {table} WHERE 1=1").format(
-            fields=select_clause, table=sql.Identifier(raw_table_name)
-        )
-
-        raw_params = []
         exclusive_end = None
-
-        if employeeId:
-            raw_query += sql.SQL(' AND "ID" = %s')
-            raw_params.append(employeeId)
-
         if startDate and endDate:
             end_dt = datetime.strptime(endDate, "%Y-%m-%d") + timedelta(days=1)
             exclusive_end = end_dt.strftime("%Y-%m-%d")
 
-            raw_query += sql.SQL(' AND "In Punch" >= %s AND "In Punch" < %s')
-            raw_params.append(startDate)
-            raw_params.append(exclusive_end)
+        next_state = {}
 
-        raw_query += sql.SQL(' ORDER BY "In Punch" ASC LIMIT 300')
-        cur.execute(raw_query, tuple(raw_params))
+        # ==========================================
+        # 1. FETCH RAW PUNCHES (The "Cause")
+        # ==========================================
+        raw_results = []
+        if "raw" in state:
+            raw_table_name = f"{clientId}_ta"
+            base_cols = ["ID", "In Punch", "Out Punch", "Employee"]
+            all_cols = base_cols + [c for c in selectedCols if c not in base_cols]
 
-        raw_columns = [desc[0] for desc in cur.description]
-        raw_results = [dict(zip(raw_columns, row)) for row in cur.fetchall()]
+            raw_filters, raw_params = [], []
+            if employeeId:
+                raw_filters.append(sql.SQL('"ID" = %s'))
+                raw_params.append(employeeId)
+            if exclusive_end:
+                raw_filters.append(sql.SQL('"In Punch" >= %s AND "In Punch" < %s'))
+                raw_params += [startDate, exclusive_end]
+
+            raw_results, last_key = _fetch_keyset_page(
+                cur,
+                raw_table_name,
+                all_cols,
+                raw_filters,
+                raw_params,
+                ["In Punch", "ID"],
+                state["raw"],
+                page_size,
+            )
+            if last_key is not None:
+                next_state["raw"] = last_key
 
         # ==========================================
         # 2. FETCH DAILY TOTALS (The "Effect")
@@ -626,54 +1001,58 @@ def handle_query_ta_records(clientId, employeeId, startDate, endDate, selectedCo
         daily_results = []
         daily_table_name = f"{clientId}_daily_df"
 
-        # Safety Check: Does the daily_df table exist for this client yet?
-        cur.execute(
-            """
-            SELECT EXISTS (
-                SELECT FROM information_schema.tables 
-                WHERE table_schema = 'public' AND table_name = %s
-            );
-        """,
-            (daily_table_name,),
-        )
+        # Safety Check: the daily_df table may not exist for this client yet (no columns)
+        daily_types = {}
+        if "daily" in state:
+            daily_types = _fetch_pg_column_types(cur, daily_table_name)
 
-        if cur.fetchone()[0]:
-            # Table exists, let's grab the aggregated data
-            # Selecting all columns (*) so React has access to everything
-            daily_query = sql.SQL("SELECT * FROM {table} WHERE 1=1").format(
-                table=sql.Identifier(daily_table_name)
-            )
-            daily_params = []
+        if daily_types:
+            # Only the columns the UI shows, of those this client's table has
+            daily_cols = [c for c in app_config.DAILY_QUERY_COLUMNS if c in daily_types]
 
+            daily_filters, daily_params = [], []
             if employeeId:
-                daily_query += sql.SQL(' AND "ID" = %s')
+                daily_filters.append(sql.SQL('"ID" = %s'))
                 daily_params.append(employeeId)
-
-            if startDate and endDate and exclusive_end:
+            if exclusive_end:
                 # We can safely reuse the inclusive start and exclusive end
-                daily_query += sql.SQL(
-                    ' AND "Attributed_Workday" >= %s AND "Attributed_Workday" < %s'
+                daily_filters.append(
+                    sql.SQL('"Attributed_Workday" >= %s AND "Attributed_Workday" < %s')
                 )
-                daily_params.append(startDate)
-                daily_params.append(exclusive_end)
-
-            daily_query += sql.SQL(' ORDER BY "Attributed_Workday" ASC')
-            cur.execute(daily_query, tuple(daily_params))
-
-            daily_columns = [desc[0] for desc in cur.description]
-            daily_results = [dict(zip(daily_columns, row)) for row in cur.fetchall()]
+                daily_params += [startDate, exclusive_end]
+
+            daily_results, last_key = _fetch_keyset_page(
+                cur,
+                daily_table_name,
+                daily_cols,
+                daily_filters,
+                daily_params,
+                ["Attributed_Workday", "ID"],
+                state["daily"],
+                page_size,
+            )
+            if last_key is not None:
+                next_state["daily"] = last_key
 
         cur.close()
-        conn.close()
 
         # ==========================================
         # 3. PACKAGE AND RETURN SPLIT DATA
         # ==========================================
-        split_data = {"daily_totals": daily_results, "raw_punches": raw_results}
+        split_data = {
+            "daily_totals": daily_results,
+            "raw_punches": raw_results,
+            "next_cursor": _encode_query_cursor(next_state) if next_state else None,
+            "page_size": page_size,
+        }
         # lambda_handler will wrap this in a 200 OK and handle the json.dumps
         return split_data
 
+    except AppError:
+        raise
     except Exception as e:
         print(f"Query Error: {str(e)}")
         traceback.print_exc()  # Print full stack trace to CloudWatch!
         raise AppError(f"Database query failed: {str(e)}", status_code=500)
+    finally:
+        release_db_connection(conn)
@@ -0,0 +1,221 @@
+import numpy as np
+import pandas as pd
+import utility
+
+
+def detect_system(excel_file, systems):
+    """
+    Detects which configured system an uploaded workbook belongs to.
+
+    Reads a single preview of the first sheet (only as many rows as the deepest
+    configured detection.header needs) and checks every system's detection.columns
+    against that preview, instead of re-parsing the workbook once per system.
+
+    Returns (system_name, system_config), or (None, None) if no system matched.
+    """
+    if not systems:
+        return None, None
+
+    # 1. One preview covering every candidate header row
+    preview_rows = max(cfg["detection"]["header"] for cfg in systems.values()) + 1
+    try:
+        preview = excel_file.parse(header=None, nrows=preview_rows)
+    except Exception:
+        return None, None  # unreadable sheet - no system can match
+
+    # 2. Check each system's header row against the in-memory preview
+    for system_name, system_config in systems.items():
+        header_row = system_config["detection"]["header"]
+        required_cols = system_config["detection"]["columns"]
+
+        if header_row >= len(preview):
+            continue  # file is shorter than this system's header
+
+        # Normalize header cells (strip whitespace) for robust matching
+        header_cells = {
+            cell.strip() for cell in preview.iloc[header_row] if isinstance(cell, str)
+        }
+        if all(col in header_cells for col in required_cols):
+            return system_name, system_config
+
+    return None, None
+
+
+def read_excel_detect_system(file_bytes, systems, engine=None, stream_target_schema=None):
+    """
+    Opens the workbook once, detects the system from a header preview and,
+    if matched, reads the full sheet using that system's header row and force_type.
+
+    When stream_target_schema is given (openpyxl engine only), the full sheet is read
+    with the streaming reader instead, keeping only the intake columns normalization
+    needs for that schema (see utility.intake_columns).
+
+    Returns (df, system_name, system_config), or (None, None, None) if no system matched.
+    """
+    try:
+        excel_file = pd.ExcelFile(file_bytes, engine=engine)
+    except Exception:
+        return None, None, None  # not a readable workbook - no system can match
+
+    with excel_file:
+        system_name, system_config = detect_system(excel_file, systems)
+        if system_name is None:
+            return None, None, None
+
+        header_row = system_config["detection"]["header"]
+        force_type = system_config.get("force_type", {})  # from CLIENT_CONFIGS
+
+        if stream_target_schema is not None and excel_file.engine == "openpyxl":
+            usecols = utility.intake_columns(system_config, stream_target_schema)
+            df = read_xlsx_streaming(excel_file, header_row, usecols, force_type)
+        else:
+            df = excel_file.parse(header=header_row, dtype=force_type or None)
+
+    df.columns = df.columns.str.strip()  # normalize full DF too
+    return df, system_name, system_config
+
+
+# Mirrors pandas' default na_values so streamed columns see the same blanks as read_excel
+_NA_STRINGS = {
+    "",
+    "#N/A",
+    "#N/A N/A",
+    "#NA",
+    "-1.#IND",
+    "-1.#QNAN",
+    "-NaN",
+    "-nan",
+    "1.#IND",
+    "1.#QNAN",
+    "<NA>",
+    "N/A",
+    "NA",
+    "NULL",
+    "NaN",
+    "None",
+    "n/a",
+    "nan",
+    "null",
+}
+
+STREAM_CHUNK_ROWS = 50_000
+
+
+def _convert_cell(value):
+    """Converts a raw openpyxl cell value the same way pandas' openpyxl reader does."""
+    if value is None:
+        return np.nan
+    if isinstance(value, str):
+        return np.nan if value in _NA_STRINGS else value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _to_typed_array(values, dtype=None):
+    """Builds one typed column array from a chunk of converted cell values."""
+    if dtype is str:
+        # Same as read_excel(dtype=str): stringify values, keep blanks as NaN
+        return np.array(
+            [v if isinstance(v, float) and np.isnan(v) else str(v) for v in values],
+            dtype=object,
+        )
+    series = pd.Series(values)
+    if dtype is not None:
+        series = series.astype(dtype)
+    return series.to_numpy()
+
+
+def iter_xlsx_column_chunks(
+    worksheet, header_row, usecols=None, force_type=None, chunk_rows=STREAM_CHUNK_ROWS
+):
+    """
+    Streams a read-only openpyxl worksheet and yields {column: typed array} chunks.
+
+    Only columns in usecols are kept (all columns if None), force_type is applied per
+    column, and trailing blank rows are trimmed like read_excel does. Cell values never
+    go through the full DataFrame object model, so peak memory is one chunk of
+    Python objects plus the typed arrays already yielded.
+    """
+    force_type = force_type or {}
+    rows = worksheet.iter_rows(min_row=header_row + 1, values_only=True)
+
+    # 1. Header row → column positions to keep (first occurrence wins)
+    header = next(rows, ())
+    positions = {}
+    for idx, cell in enumerate(header):
+        name = str(cell).strip() if cell is not None else f"Unnamed: {idx}"
+        if name in positions:
+            continue
+        if usecols is None or name in usecols:
+            positions[name] = idx
+
+    # 2. Stream data rows into per-column buffers, flushing every chunk_rows
+    buffers = {name: [] for name in positions}
+    buffered = 0
+    yielded = False
+    pending_blank = 0
+    for row in rows:
+        if all(v is None or v == "" for v in row):
+            pending_blank += 1  # kept only if data follows (trailing blanks are trimmed)
+            continue
+        for values in buffers.values():
+            values.extend([np.nan] * pending_blank)
+        buffered += pending_blank
+        pending_blank = 0
+
+        width = len(row)
+        for name, idx in positions.items():
+            buffers[name].append(_convert_cell(row[idx]) if idx < width else np.nan)
+        buffered += 1
+
+        if buffered >= chunk_rows:
+            yield {
+                name: _to_typed_array(values, force_type.get(name))
+                for name, values in buffers.items()
+            }
+            buffers = {name: [] for name in positions}
+            buffered = 0
+            yielded = True
+
+    if buffered or not yielded:  # always yield once so headers survive an empty sheet
+        yield {
+            name: _to_typed_array(values, force_type.get(name))
+            for name, values in buffers.items()
+        }
+
+
+def read_xlsx_streaming(
+    excel_file, header_row, usecols=None, force_type=None, chunk_rows=STREAM_CHUNK_ROWS
+):
+    """
+    Reads the first sheet of an already opened (openpyxl, read-only) workbook with the
+    streaming reader and assembles the typed column chunks into a DataFrame.
+    """
+    worksheet = excel_file.book.worksheets[0]
+    if excel_file.book.read_only:
+        # Some exports carry stale dimension info; same safeguard pandas uses
+        worksheet.reset_dimensions()
+
+    chunks = list(
+        iter_xlsx_column_chunks(
+            worksheet, header_row, usecols, force_type, chunk_rows=chunk_rows
+        )
+    )
+    columns = list(chunks[0].keys()) if chunks else []
+
+    data = {}
+    for col in columns:
+        arrays = [chunk[col] for chunk in chunks]
+        if len({arr.dtype for arr in arrays}) == 1:
+            series = pd.Series(np.concatenate(arrays))
+        else:
+            series = pd.concat([pd.Series(arr) for arr in arrays], ignore_index=True)
+        if series.dtype == object and col not in (force_type or {}):
+            # Chunks typed independently (e.g. an all-blank chunk next to datetimes)
+            series = series.infer_objects()
+        data[col] = series
+        for chunk in chunks:
+            chunk[col] = None  # release each chunk array as soon as it is merged
+
+    return pd.DataFrame(data, columns=columns)
@@ -1,23 +1,38 @@
-from helper.aux import verify_files, extract_global_config
+from helper.aux import (
+    verify_files,
+    extract_global_config,
+    profile_and_run_function,
+    profile_stage,
+)
 from helper.aws import (
     read_wfn_excel_from_s3,
     read_ta_excel_from_s3,
     read_waiver_excel_from_s3,
     save_csv_to_s3,
+    archive_raw_upload_to_s3,
     save_waiver_json_s3,
     put_result_to_s3,
     delete_annotations,
+    load_processed_results,
+    save_processed_results,
+    save_ta_context_to_s3,
+    save_ta_employee_rows_to_s3,
+    load_ta_context_from_s3,
 )
-from helper.results import generate_results
-from ta.ta_process import process_data_ta
+from helper.results import generate_results, patch_ta_results, employee_row_counts
+from ta.ta_process import process_data_ta, process_employee_ta
 from waiver.waiver_process import process_waiver
 from wfn.wfn_process import process_data_wfn
-import json, time
+from exceptions import AppError
+from app_config import TA_STREAMING_READ
+import concurrent.futures, json, time
+import pandas as pd
 
 
 def handle_file_upload(event, params):
     """
-    Processes all three files in sequence: Waiver → WFN → TA
+    Processes all three files: Waiver and WFN are fetched and processed concurrently
+    with the TA fetch, then TA is processed using the results of the first two.
     Frontend ensures all three files are provided
     """
 
@@ -55,49 +70,84 @@ def handle_file_upload(event, params):
         print(f"Deleting annotations for {client_id}/{pay_date} b4 reprocessing.")
         del_annot_msg = delete_annotations(client_id, pay_date)
 
-    ### 6. Process WAIVER
-    if waiver_key:
-        waiver_start = time.time()
-        waiver_df = read_waiver_excel_from_s3(waiver_key)
-        processed_waiver_df = process_waiver(waiver_df)
-        waiver_process_time = round((time.time() - waiver_start) * 1000, 2)
-        print(f"Waiver processed: {len(processed_waiver_df)} rows")
-    else:
-        # No waiver file provided
-        waiver_df = None
-        processed_waiver_df = None
-        waiver_process_time = 0
-        print("No waiver file provided, skipping waiver processing.")
-
-    ### 7. Process WFN
-    wfn_df, wfn_system_name, wfn_system_config = read_wfn_excel_from_s3(
-        wfn_key, client_id
-    )
-    print(
-        f"Will normalize for WFN system: {wfn_system_name}, using {wfn_system_config} for client: {client_id}"
-    )
-    wfn_start = time.time()
-    processed_wfn_df, wfn_exceptions = process_data_wfn(
-        wfn_df,
-        client_params,
-        wfn_system_config,
-        min_wage,
-        state_min_wage,
-        pay_periods_per_year,
-        pay_date,
-    )
-    wfn_process_time = round((time.time() - wfn_start) * 1000, 2)
-    print(f"WFN processed: {len(processed_wfn_df)} rows")
-    if wfn_exceptions:
-        print(f"WFN restricted output blocks: {list(wfn_exceptions.keys())}")
+    ### 6 & 7. Fetch and parse Waiver, WFN and TA concurrently. The three S3 GETs and
+    # Excel parses are independent; Waiver and WFN processing also run in their own
+    # threads. Only process_data_ta (step 8) needs all three results.
+    # Threads (not processes): Lambda has no /dev/shm for multiprocessing, and the
+    # S3 reads release the GIL. Peak memory is the sum of the three parsed files.
+    # Every named stage below is recorded into summary.timing.stages
+    stage_timings = []
+    intake_start = time.time()
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=3)
+    try:
+        future_waiver = (
+            executor.submit(_read_and_process_waiver, waiver_key, stage_timings)
+            if waiver_key
+            else None
+        )
+        future_wfn = executor.submit(
+            _read_and_process_wfn,
+            wfn_key,
+            client_id,
+            client_params,
+            min_wage,
+            state_min_wage,
+            pay_periods_per_year,
+            pay_date,
+            stage_timings,
+        )
+        future_ta = executor.submit(
+            profile_and_run_function,
+            read_ta_excel_from_s3,
+            stage_timings,
+            ta_key,
+            client_id,
+        )
+
+        # Fail fast: on the first error, stop waiting for the other files (queued
+        # reads are cancelled, running ones finish in the background) and surface it
+        futures = [f for f in (future_waiver, future_wfn, future_ta) if f]
+        done, _ = concurrent.futures.wait(
+            futures, return_when=concurrent.futures.FIRST_EXCEPTION
+        )
+        failed = [f for f in futures if f in done and f.exception()]
+        if failed:
+            failed[0].result()  # raises; the finally below does not wait
+
+        if future_waiver:
+            waiver_df, processed_waiver_df, waiver_process_time = future_waiver.result()
+            print(f"Waiver processed: {len(processed_waiver_df)} rows")
+        else:
+            # No waiver file provided
+            waiver_df = None
+            processed_waiver_df = None
+            waiver_process_time = 0
+            print("No waiver file provided, skipping waiver processing.")
+
+        (
+            wfn_df,
+            processed_wfn_df,
+            wfn_exceptions,
+            wfn_process_time,
+        ) = future_wfn.result()
+        print(f"WFN processed: {len(processed_wfn_df)} rows")
+        if wfn_exceptions:
+            print(f"WFN restricted output blocks: {list(wfn_exceptions.keys())}")
+
+        ta_df, ta_system_name, ta_system_config = future_ta.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    intake_time = round((time.time() - intake_start) * 1000, 2)
+    print(f"Concurrent intake (Waiver, WFN, TA) took {intake_time} ms")
 
     ### 8. Process TA (using results from first two)
-    ta_df, ta_system_name, ta_system_config = read_ta_excel_from_s3(ta_key, client_id)
     print(
         f"Will normalize for TA system: {ta_system_name}, using {ta_system_config} for client: {client_id}"
     )
     ta_start = time.time()
-    processed_ta_df, daily_df, anomalies_df_new, db_write = process_data_ta(
+    processed_ta_df, daily_df, anomalies_df_new, db_write = profile_and_run_function(
+        process_data_ta,
+        stage_timings,
         ta_df,
         client_params,
         ta_system_config,
@@ -107,35 +157,55 @@ def handle_file_upload(event, params):
         processed_waiver_df,
         processed_wfn_df,
         ignore_warnings,
+        system_name=ta_system_name,
+        timings=stage_timings,
     )
     ta_process_time = round((time.time() - ta_start) * 1000, 2)
     print("TA processed")
 
-    ### 9. Store raw files to csv for future reference
+    ### 9. Store raw files to csv for future reference. A streamed TA frame only holds
+    # the normalization columns, so the raw workbook itself is archived instead
     if ta_df is not None:
-        save_csv_to_s3(ta_df, "ta", event)
+        if TA_STREAMING_READ:
+            archive_raw_upload_to_s3(ta_key, "ta", event)
+        else:
+            save_csv_to_s3(ta_df, "ta", event)
     if wfn_df is not None:
         save_csv_to_s3(wfn_df, "wfn", event)
     if waiver_df is not None:
         save_csv_to_s3(waiver_df, "waiver", event)
         save_waiver_json_s3(waiver_df, "waiver", event)
-
-    ### 10. Generate result for React front-end
-    result = generate_results(
-        processed_ta_df,
-        daily_df,
-        anomalies_df_new,
+    # WFN / waiver lookups the TA stages read and per-employee row counts, for later
+    # single-employee reprocessing
+    save_ta_context_to_s3(
+        client_id,
+        params["payDate"],
         processed_wfn_df,
         processed_waiver_df,
-        ta_process_time,
-        wfn_process_time,
-        waiver_process_time,
-        first_date,
-        last_date,
-        pay_date,
-        client_id,
-        wfn_exceptions=wfn_exceptions,
+        employee_row_counts(processed_ta_df, anomalies_df_new),
     )
+
+    ### 10. Generate result for React front-end (with the per-stage breakdown)
+    with profile_stage(stage_timings, "generate_results") as stage:
+        result = generate_results(
+            processed_ta_df,
+            daily_df,
+            anomalies_df_new,
+            processed_wfn_df,
+            processed_waiver_df,
+            ta_process_time,
+            wfn_process_time,
+            waiver_process_time,
+            first_date,
+            last_date,
+            pay_date,
+            client_id,
+            wfn_exceptions=wfn_exceptions,
+            intake_time=intake_time,
+        )
+        stage["rows"] = len(processed_ta_df) + len(daily_df)
+    result["summary"]["timing"]["stages"] = stage_timings
+    _log_stage_timings(stage_timings)
     put_result_to_s3(result, event)  # save JSON for ready-to-serve front consumption
 
     ### 11. Add any success details to the result dictionary so front-end can display it after processing
@@ -147,3 +217,129 @@ def handle_file_upload(event, params):
 
     # Return the flat dictionary so React finds exactly what it expects
     return result
+
+
+def handle_reprocess_employee(event, params):
+    """
+    Re-runs one employee's corrected punches through the TA, daily and weekly rule
+    stages without re-running intake for the whole pay period. Only that employee's
+    rows are replaced in the DB, and the stored results.json TA tables are patched.
+    """
+
+    ### 1. Verify the request targets one employee of an already processed pay period
+    client_id = params["clientId"]
+    pay_date_key = params["payDate"]
+    employee_id = str(params.get("employeeId") or "").strip()
+    if not (client_id and pay_date_key and employee_id):
+        raise AppError(
+            "clientId, payDate and employeeId are required.", status_code=400
+        )
+    client_params = params["client_config"]
+
+    ### 2. Extract user bypass
+    try:
+        raw_body = json.loads(event.get("body", "{}"))
+        ignore_warnings = raw_body.get("ignore_warnings", False)
+    except Exception:
+        ignore_warnings = params.get("ignore_warnings", False)
+
+    ### 3. Extract global parameters with default fallback
+    min_wage, _, _, pay_date, _, _ = extract_global_config(params)
+
+    ### 4. Load the stored results, the WFN / waiver lookups and per-employee row
+    ###    counts of this pay period
+    result = load_processed_results(client_id, pay_date_key)["results"]
+    processed_wfn_df, processed_waiver_df, employee_rows = load_ta_context_from_s3(
+        client_id, pay_date_key
+    )
+
+    ### 5. Process the employee's replacement punches (replaces their DB rows)
+    print(f"Reprocessing {employee_id} for {client_id}/{pay_date_key}")
+    ta_start = time.time()
+    processed_ta_df, daily_df, anomalies_df_new, db_write = process_employee_ta(
+        pd.DataFrame(params.get("punches") or []),
+        client_params,
+        min_wage,
+        pay_date,
+        client_id,
+        employee_id,
+        processed_waiver_df,
+        processed_wfn_df,
+        ignore_warnings,
+    )
+    ta_process_time = round((time.time() - ta_start) * 1000, 2)
+
+    ### 6. Patch the employee's rows in the stored results and save them back
+    patch_ta_results(
+        result, employee_id, processed_ta_df, daily_df, anomalies_df_new, employee_rows
+    )
+    save_processed_results(client_id, pay_date_key, result)
+    if employee_rows is not None:
+        save_ta_employee_rows_to_s3(client_id, pay_date_key, employee_rows)
+
+    ### 7. Add success details for the front-end
+    result["details"] = {
+        "db_write": db_write,
+        "employee_id": employee_id,
+        "ta_rows": len(processed_ta_df),
+        "daily_rows": len(daily_df),
+        "ta_process_time_ms": ta_process_time,
+    }
+    result.setdefault("summary", {})["db_write"] = db_write
+    return result
+
+
+def _read_and_process_waiver(waiver_key, timings=None):
+    """Intake worker: fetch + process the waiver. Returns (raw_df, processed_df, ms)."""
+    waiver_start = time.time()
+    waiver_df = profile_and_run_function(read_waiver_excel_from_s3, timings, waiver_key)
+    processed_waiver_df = profile_and_run_function(process_waiver, timings, waiver_df)
+    waiver_process_time = round((time.time() - waiver_start) * 1000, 2)
+    return waiver_df, processed_waiver_df, waiver_process_time
+
+
+def _read_and_process_wfn(
+    wfn_key,
+    client_id,
+    client_params,
+    min_wage,
+    state_min_wage,
+    pay_periods_per_year,
+    pay_date,
+    timings=None,
+):
+    """Intake worker: fetch + process WFN. Returns (raw_df, processed_df, exceptions, ms)."""
+    wfn_df, wfn_system_name, wfn_system_config = profile_and_run_function(
+        read_wfn_excel_from_s3, timings, wfn_key, client_id
+    )
+    print(
+        f"Will normalize for WFN system: {wfn_system_name}, using {wfn_system_config} for client: {client_id}"
+    )
+    wfn_start = time.time()
+    processed_wfn_df, wfn_exceptions = profile_and_run_function(
+        process_data_wfn,
+        timings,
+        wfn_df,
+        client_params,
+        wfn_system_config,
+        min_wage,
+        state_min_wage,
+        pay_periods_per_year,
+        pay_date,
+        system_name=wfn_system_name,
+        timings=timings,
+    )
+    wfn_process_time = round((time.time() - wfn_start) * 1000, 2)
+    return wfn_df, processed_wfn_df, wfn_exceptions, wfn_process_time
+
+
+def _log_stage_timings(stage_timings):
+    """Prints the slowest stages so CloudWatch shows where an intake spent its time."""
+    slowest = sorted(stage_timings, key=lambda record: record["wall_ms"], reverse=True)
+    print(
+        "Slowest stages: "
+        + ", ".join(
+            f"{record['stage']} {record['wall_ms']} ms ({record['peak_mem_delta_mb']} MB)"
+            for record in slowest[:5]
+        )
+    )
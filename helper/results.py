@@ -4,6 +4,7 @@ from ta import ta_masks
 from wfn import wfn_masks
 from wfn.wfn_capabilities import WFN_BLOCK_ORDER
 import app_config
+import utility
 from helper.aux import convert_datetime_columns_to_iso
 from datetime import datetime
 
@@ -47,6 +48,9 @@ def filter_and_sort_df_to_dict(
     if max_rows is not None:
         df_check = df_check.head(max_rows)
 
+    # Categorical columns (ID, Employee, Location) back to plain values
+    utility.categorical_to_object(df_check)
+
     # Convert Pandas datetime object to ISO
     safe_df_check = convert_datetime_columns_to_iso(df_check)
 
@@ -194,6 +198,114 @@ def _build_wfn_results(processed_wfn_df, wfn_exceptions):
     return {key: blocks[key]() for key in WFN_BLOCK_ORDER}
 
 
+# (sort column, ascending) per TA table; shared by generate_results and patch_ta_results
+TA_TABLE_ORDER = {
+    "break_credit_summary": ("Paid Break Credit (hrs)", False),
+    "short_break_earned_credits": ("Employee", True),
+    "did_not_break_meal_waiver_check": ("Employee", True),
+    "seven_consecutive": ("Employee", True),
+    "ot_vs_wfn": ("Employee", True),
+    "dt_vs_wfn": ("Employee", True),
+    "split_shift": ("Employee", True),
+    "short_shift": ("Employee", True),
+}
+TA_TABLE_MAX_ROWS = 200
+
+
+def _ta_table(table_key, df, base_filter, cols, rename_map=None):
+    """One TA table, sorted per TA_TABLE_ORDER and capped at TA_TABLE_MAX_ROWS."""
+    sort_col, ascending = TA_TABLE_ORDER[table_key]
+    return filter_and_sort_df_to_dict(
+        df=df,
+        sort_col=sort_col,
+        ascending=ascending,
+        base_filter=base_filter,
+        max_rows=TA_TABLE_MAX_ROWS,
+        cols=cols,
+        rename_map=rename_map,
+    )
+
+
+def _build_ta_results(processed_ta_df, daily_df, anomalies_df_new):
+    """Builds every TA table for the React front-end (see TA_TABLE_ORDER)."""
+    return {
+        ## "1. Break Credit Summary"
+        "break_credit_summary": _ta_table(
+            "break_credit_summary",
+            df=anomalies_df_new,
+            base_filter=ta_masks.non_zero_var(anomalies_df_new),
+            cols=app_config.COLS_ANOMALIES,
+        ),
+        ##1a. Short Break: Earned credits
+        "short_break_earned_credits": _ta_table(
+            "short_break_earned_credits",
+            df=processed_ta_df,
+            base_filter=ta_masks.break_less_than_30(processed_ta_df),
+            cols=app_config.COLS_PRINT3a,
+            rename_map={
+                "Regular Rate Paid": "Straight Rate ($)",
+            },
+        ),
+        ##1c. Did not take break: Meal Waiver Check
+        "did_not_break_meal_waiver_check": _ta_table(
+            "did_not_break_meal_waiver_check",
+            df=processed_ta_df,
+            base_filter=ta_masks.did_not_break_new(processed_ta_df),
+            cols=app_config.COLS_PRINT2_B,
+        ),
+        ## NEW ##
+        ##2. Employees with Seven Consecutive Days
+        "seven_consecutive": _ta_table(
+            "seven_consecutive",
+            df=daily_df,
+            base_filter=ta_masks.check_consec(daily_df),
+            cols=app_config.COLS_PRINT8,
+            rename_map={
+                "Attributed_Workday": "Trigger Date",
+            },
+        ),
+        ##3. Check Overtime (OT) hours versus WFN
+        "ot_vs_wfn": _ta_table(
+            "ot_vs_wfn",
+            df=daily_df,
+            base_filter=(
+                ta_masks.unique_ids(daily_df)
+                & ~ta_masks.zero_rows_ot_dt(daily_df)
+                & ta_masks.OT_var_mask(daily_df)
+            ),
+            cols=app_config.COLS_PRINT9,
+            # rename_map={"Total OT Hours Pay Period": "OT Hours on Time Card"},
+        ),
+        ##3a. Check Doubletime (DT) hours versus WFN
+        "dt_vs_wfn": _ta_table(
+            "dt_vs_wfn",
+            df=daily_df,
+            base_filter=(
+                ta_masks.unique_ids(daily_df)
+                & ~ta_masks.zero_rows_ot_dt(daily_df)
+                & ta_masks.DT_var_mask(daily_df)
+            ),
+            cols=app_config.COLS_PRINT9a,
+            # rename_map={"Total DT Hours Pay Period": "DT Hours on Time Card"},
+        ),
+        ##4. Split Shift Check
+        "split_shift": _ta_table(
+            "split_shift",
+            df=processed_ta_df,
+            base_filter=ta_masks.split_shift(processed_ta_df),
+            cols=app_config.COLS_PRINT5,
+            rename_map={"Regular Rate Paid": "Straight Rate ($)"},
+        ),
+        ##4. Short Shift Warning Check
+        "short_shift": _ta_table(
+            "short_shift",
+            df=processed_ta_df,
+            base_filter=processed_ta_df["RTP_Warning"] == True,
+            cols=app_config.COLS_PRINT3b,
+        ),
+    }
+
+
 def generate_results(
     processed_ta_df,
     daily_df,
@@ -208,6 +320,7 @@ def generate_results(
     pay_date,
     client_id,
     wfn_exceptions=None,
+    intake_time=None,
 ):
 
     if wfn_exceptions is None:
@@ -237,103 +350,92 @@ def generate_results(
                 "ta_process_time_ms": ta_process_time,
                 "wfn_process_time_ms": wfn_process_time,
                 "waiver_process_time_ms": waiver_process_time,
+                "intake_time_ms": intake_time,  # concurrent Waiver/WFN/TA fetch + parse
             },
             "wfn_exceptions": wfn_exceptions,
         },
         "db_cols": app_config.COLUMN_TO_KEEP_DB,
         "wfn": _build_wfn_results(processed_wfn_df, wfn_exceptions),
-        "ta": {
-            ## "1. Break Credit Summary"
-            "break_credit_summary": filter_and_sort_df_to_dict(
-                df=anomalies_df_new,
-                sort_col="Paid Break Credit (hrs)",
-                base_filter=ta_masks.non_zero_var(anomalies_df_new),
-                ascending=False,
-                max_rows=200,
-                cols=app_config.COLS_ANOMALIES,
-            ),
-            ##1a. Short Break: Earned credits
-            "short_break_earned_credits": filter_and_sort_df_to_dict(
-                df=processed_ta_df,
-                sort_col="Employee",
-                ascending=True,
-                base_filter=ta_masks.break_less_than_30(processed_ta_df),
-                max_rows=200,
-                cols=app_config.COLS_PRINT3a,
-                rename_map={
-                    "Regular Rate Paid": "Straight Rate ($)",
-                },
-            ),
-            ##1c. Did not take break: Meal Waiver Check
-            "did_not_break_meal_waiver_check": filter_and_sort_df_to_dict(
-                df=processed_ta_df,
-                sort_col="Employee",
-                ascending=True,
-                base_filter=ta_masks.did_not_break_new(processed_ta_df),
-                max_rows=200,
-                cols=app_config.COLS_PRINT2_B,
-            ),
-            ## NEW ##
-            ##2. Employees with Seven Consecutive Days
-            "seven_consecutive": filter_and_sort_df_to_dict(
-                df=daily_df,
-                sort_col="Employee",
-                ascending=True,
-                base_filter=ta_masks.check_consec(daily_df),
-                max_rows=200,
-                cols=app_config.COLS_PRINT8,
-                rename_map={
-                    "Attributed_Workday": "Trigger Date",
-                },
-            ),
-            ##3. Check Overtime (OT) hours versus WFN
-            "ot_vs_wfn": filter_and_sort_df_to_dict(
-                df=daily_df,
-                sort_col="Employee",
-                ascending=True,
-                base_filter=(
-                    ta_masks.unique_ids(daily_df)
-                    & ~ta_masks.zero_rows_ot_dt(daily_df)
-                    & ta_masks.OT_var_mask(daily_df)
-                ),
-                max_rows=200,
-                cols=app_config.COLS_PRINT9,
-                # rename_map={"Total OT Hours Pay Period": "OT Hours on Time Card"},
-            ),
-            ##3a. Check Doubletime (DT) hours versus WFN
-            "dt_vs_wfn": filter_and_sort_df_to_dict(
-                df=daily_df,
-                sort_col="Employee",
-                ascending=True,
-                base_filter=(
-                    ta_masks.unique_ids(daily_df)
-                    & ~ta_masks.zero_rows_ot_dt(daily_df)
-                    & ta_masks.DT_var_mask(daily_df)
-                ),
-                max_rows=200,
-                cols=app_config.COLS_PRINT9a,
-                # rename_map={"Total DT Hours Pay Period": "DT Hours on Time Card"},
-            ),
-            ##4. Split Shift Check
-            "split_shift": filter_and_sort_df_to_dict(
-                df=processed_ta_df,
-                sort_col="Employee",
-                ascending=True,
-                base_filter=ta_masks.split_shift(processed_ta_df),
-                max_rows=200,
-                cols=app_config.COLS_PRINT5,
-                rename_map={"Regular Rate Paid": "Straight Rate ($)"},
-            ),
-            ##4. Short Shift Warning Check
-            "short_shift": filter_and_sort_df_to_dict(
-                df=processed_ta_df,
-                sort_col="Employee",
-                ascending=True,
-                base_filter=processed_ta_df["RTP_Warning"] == True,
-                max_rows=200,
-                cols=app_config.COLS_PRINT3b,
-            ),
-        },
+        "ta": _build_ta_results(processed_ta_df, daily_df, anomalies_df_new),
     }
     print("Ready to serve tables generated from generate_results")
     return result
+
+
+def _sort_rows(rows, sort_col, ascending):
+    """Sorts JSON rows like DataFrame.sort_values: missing values (None) go last."""
+    present = [row for row in rows if row.get(sort_col) is not None]
+    missing = [row for row in rows if row.get(sort_col) is None]
+    present.sort(key=lambda row: row[sort_col], reverse=not ascending)
+    return present + missing
+
+
+def employee_row_counts(processed_ta_df, anomalies_df_new):
+    """
+    Per-employee ta_rows / anomalies_rows (indexed by ID), the shares of
+    summary.rows that patch_ta_results swaps out when an employee is reprocessed.
+    """
+    counts = pd.DataFrame(
+        {
+            "ta_rows": _rows_per_id(processed_ta_df),
+            "anomalies_rows": _rows_per_id(anomalies_df_new),
+        }
+    )
+    counts.index.name = "ID"
+    return counts.fillna(0).astype("int64")
+
+
+def _rows_per_id(df):
+    return df["ID"].astype(str).str.strip().value_counts()
+
+
+def patch_ta_results(
+    result, employee_id, processed_ta_df, daily_df, anomalies_df_new, employee_rows=None
+):
+    """
+    Patches the TA tables of a stored results.json in place after one employee was
+    reprocessed: drops that employee's rows from every table, merges in the rows
+    built from the employee's new frames, then re-sorts and re-caps each table.
+
+    Rows of other employees cut by the original row cap are not in results.json,
+    so they cannot come back here; a full process-files run rebuilds them.
+
+    summary.rows.ta_rows / anomalies_rows are corrected with employee_rows (see
+    employee_row_counts), which is updated in place for the next reprocess. Without
+    it (pay periods processed before the counts were stored) the employee's old share
+    is unknown, so both counts are dropped rather than left contradicting the tables.
+    """
+    new_tables = _build_ta_results(processed_ta_df, daily_df, anomalies_df_new)
+    ta_tables = result.setdefault("ta", {})
+
+    for table_key, (sort_col, ascending) in TA_TABLE_ORDER.items():
+        kept = [
+            row
+            for row in ta_tables.get(table_key, [])
+            if str(row.get("ID", "")).strip() != employee_id
+        ]
+        ta_tables[table_key] = _sort_rows(
+            kept + new_tables[table_key], sort_col, ascending
+        )[:TA_TABLE_MAX_ROWS]
+
+    rows = result.setdefault("summary", {}).setdefault("rows", {})
+    new_counts = {
+        "ta_rows": len(processed_ta_df),
+        "anomalies_rows": len(anomalies_df_new),
+    }
+    for count_key, new_count in new_counts.items():
+        if employee_rows is None or count_key not in rows:
+            rows.pop(count_key, None)
+            continue
+        old_count = 0
+        if employee_id in employee_rows.index:
+            old_count = int(employee_rows.at[employee_id, count_key])
+        rows[count_key] = rows[count_key] - old_count + new_count
+    if employee_rows is not None:
+        employee_rows.loc[employee_id] = [new_counts[c] for c in employee_rows.columns]
+
+    result.setdefault("metadata", {})["reprocessed_at"] = datetime.now().isoformat()
+    result["summary"].setdefault("reprocessed_employees", [])
+    if employee_id not in result["summary"]["reprocessed_employees"]:
+        result["summary"]["reprocessed_employees"].append(employee_id)
+    return result
@@ -1,25 +1,40 @@
 from helper.db_utils import (
     get_db_connection,
     get_last_db_connection_error,
+    release_db_connection,
     worker_save_daily,
     worker_save_ta,
 )
+from helper.aux import current_stage, profile_and_run_function, profile_stage
 from client_config import TA_TARGET_SCHEMA, CLIENT_CONFIGS
+import app_config
 import utility
 from . import ta_utility
 import logging
+import numpy as np
 import pandas as pd
 import concurrent.futures
+from functools import partial
 from . import ta_weekly_rules
 from exceptions import AppError
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+TA_DATETIME_COLUMNS = ("In Punch", "Out Punch", "Status Date")
+# Repeated text columns kept as categoricals through every stage (see utility.to_categorical)
+TA_CATEGORICAL_COLUMNS = ("ID", "Employee", "Location", "Status")
 
-def _save_to_database(df, daily_df, clientId, pay_date):
+# Compile every configured TA system's normalization plan once per container
+utility.precompile_normalization_plans(
+    CLIENT_CONFIGS, "ta_systems", TA_TARGET_SCHEMA, TA_DATETIME_COLUMNS
+)
+
+
+def _save_to_database(df, daily_df, clientId, pay_date, employee_id=None):
     """
     Attempts to persist punch and daily totals to PostgreSQL.
+    With employee_id, only that employee's rows for the pay date are replaced.
     Returns a status dict suitable for the frontend — never raises.
     """
     ta_rows = len(df)
@@ -43,13 +58,15 @@ def _save_to_database(df, daily_df, clientId, pay_date):
             "daily_rows_attempted": daily_rows,
         }
 
-    ping_conn.close()
+    release_db_connection(ping_conn)
 
     try:
         with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
-            future_ta = executor.submit(worker_save_ta, df, clientId, pay_date_ts)
+            future_ta = executor.submit(
+                worker_save_ta, df, clientId, pay_date_ts, employee_id
+            )
             future_daily = executor.submit(
-                worker_save_daily, daily_df, clientId, pay_date_ts
+                worker_save_daily, daily_df, clientId, pay_date_ts, employee_id
             )
             future_ta.result()
             future_daily.result()
@@ -95,12 +112,19 @@ def process_data_ta(
     processed_waiver_df=None,
     processed_wfn_df=None,
     ignore_warnings=False,
+    system_name=None,
+    timings=None,
 ):
+    # timings: optional list collecting a per-stage breakdown (helper.aux.profile_stage)
 
     ######### DF CLEANUP AND PREP #################
 
-    # 1. Normalization: Columns Rename, Transform & Drop. Doesn't crash if cols missing.
-    df = utility.normalize_client_data(df, ta_system_config)
+    # 1. Normalization: Columns Rename & Transform from the system's compiled plan.
+    #    Doesn't crash if cols missing.
+    plan = utility.get_normalization_plan(
+        system_name, ta_system_config, TA_TARGET_SCHEMA, TA_DATETIME_COLUMNS
+    )
+    df = profile_and_run_function(utility.apply_plan_mappings, timings, df, plan)
 
     # 2. Validation: Check if all neccesary columns post-mapping are present, if not stop processing.
     missing = [col for col in TA_TARGET_SCHEMA if col not in df.columns]
@@ -110,17 +134,135 @@ def process_data_ta(
         logger.error(error_msg)  # CloudWatch Logs trigger alerts if set up
         raise ValueError(error_msg)  # Raise stops execution in Lambda
 
-    # 3. Drops rows that are not punches base on client configuration
-    df = utility.drop_rows(df, ta_system_config)
-
+    # 3. Drops rows that are not punches base on client configuration (one combined mask)
     # 4. Re-order 'Core' columns are always first (makes the DB readable);
     #    drop any intake columns outside the target schema
-    df = utility.keep_target_schema_columns(df, TA_TARGET_SCHEMA)
-
     # 5. Assure timestamps are in Panda's datetime format
-    df = utility.to_pandas_datetime(df, "In Punch", "Out Punch", "Status Date")
+    df = profile_and_run_function(utility.apply_plan_filters, timings, df, plan)
 
     # 6. Ensure inputed Pay Date matches the contents of the file
+    with profile_stage(timings, "validate_pay_date") as stage:
+        _validate_pay_date(df, pay_date, client_params, clientId, ignore_warnings)
+        stage["rows"] = len(df)
+
+    # 7. Compact dtypes: identifiers become categoricals (before any sharding, so
+    #    every shard shares the same categories)
+    df = profile_and_run_function(
+        utility.to_categorical, timings, df, TA_CATEGORICAL_COLUMNS
+    )
+
+    ######### DF PROCESSING #################
+    if app_config.TA_SHARD_WORKERS > 1:
+        df, daily_df, anomalies_df_new = _run_ta_stages_sharded(
+            df,
+            client_params,
+            min_wage,
+            pay_date,
+            clientId,
+            processed_waiver_df,
+            processed_wfn_df,
+            workers=app_config.TA_SHARD_WORKERS,
+            executor_kind=app_config.TA_SHARD_EXECUTOR,
+            timings=timings,
+        )
+    else:
+        df, daily_df, anomalies_df_new = _run_ta_stages(
+            df,
+            client_params,
+            min_wage,
+            pay_date,
+            clientId,
+            processed_waiver_df,
+            processed_wfn_df,
+            timings=timings,
+        )
+
+    # Write to DB and capture status for the frontend
+    with profile_stage(timings, "save_to_database") as stage:
+        db_write = _save_to_database(df, daily_df, clientId, pay_date)
+        stage["rows"] = len(df) + len(daily_df)
+
+    return (
+        df,
+        daily_df,
+        anomalies_df_new,
+        db_write,
+    )
+
+
+def process_employee_ta(
+    df,
+    client_params,
+    min_wage,
+    pay_date,
+    clientId,
+    employee_id,
+    processed_waiver_df=None,
+    processed_wfn_df=None,
+    ignore_warnings=False,
+):
+    """
+    Reprocesses one employee's replacement punches (already in TA_TARGET_SCHEMA
+    column names, e.g. corrected by an auditor) through the TA, daily and weekly
+    rule stages, then upserts only that employee's rows.
+
+    Every stage groups by ID, so the employee's rows come out the same as in a
+    full pay period run over the corrected file.
+    """
+    # 1. Validation: same required columns as a normalized intake file
+    if df.empty:
+        raise AppError("No replacement punches provided.", status_code=400)
+    missing = [col for col in TA_TARGET_SCHEMA if col not in df.columns]
+    if missing:
+        raise AppError(
+            f"Replacement punches are missing required columns: {missing}",
+            status_code=400,
+        )
+
+    other_ids = sorted(set(df["ID"].astype(str).str.strip()) - {employee_id})
+    if other_ids:
+        raise AppError(
+            f"Replacement punches must all belong to {employee_id}. Found: {other_ids}",
+            status_code=400,
+        )
+
+    # 2. Core columns first, timestamps in Panda's datetime format
+    df = df.loc[:, TA_TARGET_SCHEMA].copy()
+    df["ID"] = employee_id
+    try:
+        for col in TA_DATETIME_COLUMNS:
+            df[col] = pd.to_datetime(df[col])
+    except (ValueError, TypeError) as e:
+        raise AppError(f"Invalid punch timestamp: {e}", status_code=400)
+
+    # 3. Ensure the punches belong to the pay period being reprocessed
+    _validate_pay_date(df, pay_date, client_params, clientId, ignore_warnings)
+    df = utility.to_categorical(df, TA_CATEGORICAL_COLUMNS)
+
+    # 4. TA, daily and weekly rule stages for this employee only
+    df, daily_df, anomalies_df_new = _run_ta_stages(
+        df,
+        client_params,
+        min_wage,
+        pay_date,
+        clientId,
+        processed_waiver_df,
+        processed_wfn_df,
+    )
+
+    # 5. Replace only this employee's rows in the DB
+    db_write = _save_to_database(df, daily_df, clientId, pay_date, employee_id)
+
+    return (
+        df,
+        daily_df,
+        anomalies_df_new,
+        db_write,
+    )
+
+
+def _validate_pay_date(df, pay_date, client_params, clientId, ignore_warnings):
+    """Raises AppError when the punches don't match the pay date (409 for stragglers)."""
     is_valid, msg, error_type = ta_utility.validate_intake_pay_date(
         df,
         pay_date,
@@ -136,7 +278,26 @@ def process_data_ta(
             # Standard hard error
             raise AppError(msg, status_code=400)
 
-    ######### DF PROCESSING #################
+
+def _run_ta_stages(
+    df,
+    client_params,
+    min_wage,
+    pay_date,
+    clientId,
+    processed_waiver_df=None,
+    processed_wfn_df=None,
+    carryover_streaks=None,
+    timings=None,
+):
+    """
+    Punch, daily and weekly rule stages on normalized, validated punches.
+    Returns (df, daily_df, anomalies_df_new). Each stage is recorded into
+    `timings` when given (see helper.aux.profile_stage).
+    """
+
+    # Resolve global + location overrides once; rule stages gather by location code
+    resolved_params = utility.resolve_client_params(client_params)
 
     # Add Location
     # df["Location"] = df["ID"].str[:3] Moved to normalization step. See client_config.py for details.
@@ -150,10 +311,12 @@ def process_data_ta(
     )
 
     # Add time helper columns
-    df = ta_utility.add_time_helper_cols(df)
+    df = profile_and_run_function(ta_utility.add_time_helper_cols, timings, df)
 
     # Add Break Credit from WFN File.
-    df = ta_utility.add_col_from_another_df_if_present(
+    df = profile_and_run_function(
+        ta_utility.add_col_from_another_df_if_present,
+        timings,
         home_df=df,
         lookup_df=processed_wfn_df,
         home_ref="ID",
@@ -163,7 +326,9 @@ def process_data_ta(
     )
 
     # Add Hire Date from WFN File.
-    df = ta_utility.add_col_from_another_df_if_present(
+    df = profile_and_run_function(
+        ta_utility.add_col_from_another_df_if_present,
+        timings,
         home_df=df,
         lookup_df=processed_wfn_df,
         home_ref="ID",
@@ -173,56 +338,185 @@ def process_data_ta(
     )
 
     # Adds Short ID, Waiver Lookup, Waiver on File? cols
-    df = ta_utility.add_waiver_check(df, processed_waiver_df)
+    df = profile_and_run_function(
+        ta_utility.add_waiver_check, timings, df, processed_waiver_df
+    )
 
     # Adds breaks check columns
-    df = ta_utility.add_break_time(df)
+    df = profile_and_run_function(ta_utility.add_break_time, timings, df)
 
-    # Add Hours Worked Shift and Shift ID, 12 hour check
-    df = ta_utility.add_hours_worked_shift_and_shift_id(df, client_params)
-    df = ta_utility.add_twelve_hour_check(df)
-
-    # Add Punch Length df by adding Punch Lenght (Raw) that have no break in between.
-    # Needs  Break Time (min), "Shift Number", "Punch Number in Shift", Punch Length (hrs) Raw
-    df = ta_utility.add_punch_length(df)
+    # Add Hours Worked Shift and Shift ID, 12 hour check and Punch Length (stapled
+    # Punch Length (hrs) Raw with no break in between) in one fused segmentation pass.
+    # Needs Break Time (min), Punch Length (hrs) Raw
+    df = profile_and_run_function(
+        ta_utility.add_shift_segmentation, timings, df, client_params, resolved_params
+    )
 
     # Add Regular Rate Paid (a.k.a "Straight Rate ($)") from wfn, Split Paid ($),
     # Split at Min Wage ($), Split Shift Due ($) cols.
-    df = ta_utility.add_split_shift(df, processed_wfn_df, min_wage)
+    df = profile_and_run_function(
+        ta_utility.add_split_shift, timings, df, processed_wfn_df, min_wage
+    )
 
     # Add Report Time Warning tag to df (short shift)
-    df = ta_utility.add_report_time_warning(df)
+    df = profile_and_run_function(ta_utility.add_report_time_warning, timings, df)
 
     # Create the Daily dataframe with OT and DT calculations (exclusing 40 hours and consecutive days OT)
-    daily_df = ta_utility.create_daily_df(df, client_params)
+    daily_df = profile_and_run_function(
+        ta_utility.create_daily_df, timings, df, client_params, resolved_params
+    )
 
     # Add to daily_df 40 hours and consecutive days calcs. This will make a db call to check for previous periods punches if the employee worked the last day of the previous period and has the cba_consec_anyweek boolean set to true.
-    daily_df = ta_weekly_rules.apply_weekly_rules(
-        daily_df, client_params, clientId, pay_date
+    daily_df = profile_and_run_function(
+        ta_weekly_rules.apply_weekly_rules,
+        timings,
+        daily_df,
+        client_params,
+        clientId,
+        pay_date,
+        resolved_params,
+        carryover_streaks,
     )
 
     # Add pay period totals
-    daily_df = ta_utility.apply_pay_period_totals(
-        daily_df, client_params, CLIENT_CONFIGS[clientId]["anchor_pay_date"]
+    daily_df = profile_and_run_function(
+        ta_utility.apply_pay_period_totals,
+        timings,
+        daily_df,
+        client_params,
+        CLIENT_CONFIGS[clientId]["anchor_pay_date"],
     )
     # Add OT and DT actually paid from WFN for variance analysis
-    daily_df = ta_utility.apply_ot_and_dt_paid_from_wfn(daily_df, processed_wfn_df)
+    daily_df = profile_and_run_function(
+        ta_utility.apply_ot_and_dt_paid_from_wfn, timings, daily_df, processed_wfn_df
+    )
 
     # Drop workdays that don't belong to the pay period
-    daily_df = ta_utility.filter_target_pay_period(daily_df, pay_date)
+    daily_df = profile_and_run_function(
+        ta_utility.filter_target_pay_period, timings, daily_df, pay_date
+    )
 
     # Add reporting columns for consecutive day calcs
-    daily_df = ta_utility.add_consec_day_reporting(daily_df)
+    daily_df = profile_and_run_function(
+        ta_utility.add_consec_day_reporting, timings, daily_df
+    )
 
     # Create anomalies DF - i.e. Break Credit Summary table
-    anomalies_df_new = ta_utility.create_anomalies_new(df)
+    anomalies_df_new = profile_and_run_function(
+        ta_utility.create_anomalies_new, timings, df
+    )
 
-    # Write to DB and capture status for the frontend
-    db_write = _save_to_database(df, daily_df, clientId, pay_date)
+    return df, daily_df, anomalies_df_new
 
-    return (
-        df,
-        daily_df,
-        anomalies_df_new,
-        db_write,
+
+def _run_ta_stages_sharded(
+    df,
+    client_params,
+    min_wage,
+    pay_date,
+    clientId,
+    processed_waiver_df=None,
+    processed_wfn_df=None,
+    workers=2,
+    executor_kind="thread",
+    timings=None,
+):
+    """
+    Same result as _run_ta_stages, with the punches hash-partitioned by ID into
+    `workers` shards that run the stages concurrently. Every stage is per employee,
+    so only the cross-employee pieces are rebuilt after concatenating the shards:
+    row order, Prev ID / Next ID and the anomalies index. Stage timings of each
+    shard are recorded with a "shard" number.
+    """
+    # 1. Hash-partition by ID: each employee's punches land in exactly one shard
+    shard_codes = (
+        pd.util.hash_pandas_object(df["ID"], index=False).to_numpy() % workers
+    )
+    shards = [df.take(np.flatnonzero(shard_codes == i)) for i in range(workers)]
+    shards = [shard for shard in shards if not shard.empty]
+    if len(shards) < 2:
+        return _run_ta_stages(
+            df,
+            client_params,
+            min_wage,
+            pay_date,
+            clientId,
+            processed_waiver_df,
+            processed_wfn_df,
+            timings=timings,
+        )
+
+    # 2. Carryover streaks are fetched once here, not once per shard
+    resolved_params = utility.resolve_client_params(client_params)
+    carryover_streaks = profile_and_run_function(
+        ta_weekly_rules.fetch_carryover_streaks,
+        timings,
+        client_params,
+        clientId,
+        pay_date,
+        resolved_params,
+    )
+
+    # 3. Run the stages per shard
+    run_shard = partial(
+        _run_ta_shard,
+        record_timings=timings is not None,
+        client_params=client_params,
+        min_wage=min_wage,
+        pay_date=pay_date,
+        clientId=clientId,
+        processed_waiver_df=processed_waiver_df,
+        processed_wfn_df=processed_wfn_df,
+        carryover_streaks=carryover_streaks,
+    )
+    with _shard_executor(executor_kind, len(shards)) as executor:
+        shard_results, shard_timings = zip(*executor.map(run_shard, shards))
+    shard_dfs, shard_dailies, shard_anomalies = zip(*shard_results)
+    if timings is not None:
+        # Shard threads have no open stage; nest their top-level stages under ours
+        parent = current_stage()
+        for shard, records in enumerate(shard_timings):
+            timings.extend(
+                dict(record, parent=record["parent"] or parent, shard=shard)
+                for record in records
+            )
+
+    # 4. Punches: IDs back in intake order, each ID's punches as its shard sorted them
+    out_df = pd.concat(shard_dfs)
+    id_order = pd.Index(pd.unique(df["ID"]))
+    out_df = out_df.take(
+        np.argsort(id_order.get_indexer(out_df["ID"]), kind="stable")
     )
+    out_df["Prev ID"] = out_df["ID"].shift(1)
+    out_df["Next ID"] = out_df["ID"].shift(-1)
+
+    # 5. Daily totals: same (ID, workday) order as the weekly rules leave them
+    daily_df = (
+        pd.concat(shard_dailies)
+        .sort_values(["ID", "Attributed_Workday"])
+        .reset_index(drop=True)
+    )
+
+    # 6. Anomalies: indexed by the employee's position among all sorted IDs
+    anomalies_df_new = pd.concat(shard_anomalies)
+    all_ids = pd.Index(np.sort(np.asarray(out_df["ID"].dropna().unique())))
+    anomalies_df_new.index = all_ids.get_indexer(anomalies_df_new["ID"])
+    anomalies_df_new = anomalies_df_new.sort_index()
+
+    return out_df, daily_df, anomalies_df_new
+
+
+def _run_ta_shard(shard_df, record_timings=False, **stage_kwargs):
+    """Shard worker: returns (_run_ta_stages result, the shard's stage timings or None)."""
+    timings = [] if record_timings else None
+    return _run_ta_stages(shard_df, timings=timings, **stage_kwargs), timings
+
+
+def _shard_executor(executor_kind, workers):
+    """Process pool when requested and available (not on Lambda), else a thread pool."""
+    if executor_kind == "process":
+        try:
+            return concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        except (OSError, NotImplementedError, ImportError) as e:
+            logger.warning(f"Process pool unavailable ({e}); sharding with threads.")
+    return concurrent.futures.ThreadPoolExecutor(max_workers=workers)
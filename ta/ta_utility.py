@@ -36,14 +36,14 @@ def add_consec_day_reporting(daily_df: pd.DataFrame) -> pd.DataFrame:
     # 2. Find the First Day of the Streak
     # We group by the specific Streak_ID so if there was a gap, the start date resets!
     if "Streak_ID" in df.columns:
-        first_days_of_week = df.groupby(["Employee", "ID", "Workweek_ID", "Streak_ID"])[
-            "Attributed_Workday"
-        ].transform("min")
+        first_days_of_week = df.groupby(
+            ["Employee", "ID", "Workweek_ID", "Streak_ID"], observed=True
+        )["Attributed_Workday"].transform("min")
     else:
         # Fallback just in case
-        first_days_of_week = df.groupby(["Employee", "ID", "Workweek_ID"])[
-            "Attributed_Workday"
-        ].transform("min")
+        first_days_of_week = df.groupby(
+            ["Employee", "ID", "Workweek_ID"], observed=True
+        )["Attributed_Workday"].transform("min")
 
     # Initialize the new columns with empty defaults
     df["First_Day_of_Streak"] = pd.NaT
@@ -297,8 +297,10 @@ def apply_pay_period_totals(
     group_cols = ["Employee", "ID", "Fiscal_Pay_Date"]
 
     # .transform('sum') calculates the group total and broadcasts it to every row in the group
-    df["OT_Hours_Pay_Period"] = df.groupby(group_cols)["OT_Hrs"].transform("sum")
-    df["DT_Hours_Pay_Period"] = df.groupby(group_cols)["DT_Hrs"].transform("sum")
+    # (observed=True: only employee combinations present in the rows, not every category)
+    groups = df.groupby(group_cols, observed=True)
+    df["OT_Hours_Pay_Period"] = groups["OT_Hrs"].transform("sum")
+    df["DT_Hours_Pay_Period"] = groups["DT_Hrs"].transform("sum")
 
     # Rounding for clean float math
     df["OT_Hours_Pay_Period"] = df["OT_Hours_Pay_Period"].round(4)
@@ -307,7 +309,9 @@ def apply_pay_period_totals(
     return df
 
 
-def create_daily_df(df: pd.DataFrame, client_params: dict) -> pd.DataFrame:
+def create_daily_df(
+    df: pd.DataFrame, client_params: dict, resolved_params: dict | None = None
+) -> pd.DataFrame:
     """
     Transforms the punch dataframe into a daily aggregated dataframe with  OT and DT calculations, applying dynamic thresholds based on the employee's Location.
     Columns created in this step are: Employee, ID, Location, Attributed_Workday, Hours_Worked, Regular_Hrs, OT_Hrs, DT_Hrs
@@ -323,21 +327,18 @@ def create_daily_df(df: pd.DataFrame, client_params: dict) -> pd.DataFrame:
     ]
     df = df[required_cols].copy()
 
-    # 2. Extract globals and create mapping dictionaries for locations
-    locs = client_params.get("locations", {})
-    g_ot_day = client_params["global"]["ot_day_max"]
-    g_dt_day = client_params["global"]["dt_day_max"]
-
-    ot_day_map = {
-        loc: config.get("ot_day_max", g_ot_day) for loc, config in locs.items()
-    }
-    dt_day_map = {
-        loc: config.get("dt_day_max", g_dt_day) for loc, config in locs.items()
-    }
+    # 2. Location-resolved limits (global value for unconfigured locations)
+    if resolved_params is None:
+        resolved_params = utility.resolve_client_params(client_params)
+    codes = utility.location_codes(resolved_params, df["Location"])
 
-    # 3. Map the custom limits to the dataframe (filling any unmapped locations with the global default)
-    df["limit_ot_day"] = df["Location"].map(ot_day_map).fillna(g_ot_day)
-    df["limit_dt_day"] = df["Location"].map(dt_day_map).fillna(g_dt_day)
+    # 3. Gather the custom limits per row by location code
+    df["limit_ot_day"] = utility.location_param_table(
+        resolved_params, "ot_day_max", dtype=np.float64
+    )[codes]
+    df["limit_dt_day"] = utility.location_param_table(
+        resolved_params, "dt_day_max", dtype=np.float64
+    )[codes]
 
     # 4. Create a boolean mask to identify shifts that cross midnight
     df["In_Date"] = df["In Punch"].dt.date
@@ -369,7 +370,7 @@ def create_daily_df(df: pd.DataFrame, client_params: dict) -> pd.DataFrame:
 
         df_splits = pd.concat([df_cross_1, df_cross_2], ignore_index=True)
     else:
-        df_splits = pd.DataFrame(columns=df_same.columns)
+        df_splits = df_same.iloc[:0]  # empty, same dtypes
 
     # 5. Concatenate and Aggregate
     cols_to_keep = [
@@ -386,7 +387,9 @@ def create_daily_df(df: pd.DataFrame, client_params: dict) -> pd.DataFrame:
     )
 
     daily_df = (
-        df_combined.groupby(["Employee", "ID", "Location", "Attributed_Workday"])
+        df_combined.groupby(
+            ["Employee", "ID", "Location", "Attributed_Workday"], observed=True
+        )
         .agg(
             {
                 "Hours_Worked": "sum",
@@ -423,7 +426,29 @@ def create_daily_df(df: pd.DataFrame, client_params: dict) -> pd.DataFrame:
 
 
 def add_time_helper_cols(df):
-    # Columns to shift within ID
+    """
+    Adds Prev/Next In Punch, Out Punch, Date and Punch Length columns (within ID)
+    plus Prev/Next ID, in a single pass:
+    1. Sort once so each ID is one contiguous block of chronological punches
+       (IDs keep their intake order; no-op when the intake is already sorted)
+    2. Compute the ID block boundaries once
+    3. Shift each source column and blank the values that crossed a boundary
+    """
+    # 1. Enforce the (ID, In Punch) order every neighbor feature relies on
+    id_codes = pd.factorize(df["ID"], use_na_sentinel=False)[0]
+    punch_keys = df["In Punch"].to_numpy(dtype="datetime64[ns]").view(np.int64)
+    punch_keys = np.where(df["In Punch"].isna(), np.iinfo(np.int64).max, punch_keys)
+    order = np.lexsort((punch_keys, id_codes))  # stable
+    if (order != np.arange(len(order))).any():
+        df = df.take(order)
+        id_codes = id_codes[order]
+
+    # 2. One boundary mask per direction: the neighbor row belongs to the same ID
+    same_id = (id_codes[1:] == id_codes[:-1]) & df["ID"].notna().to_numpy()[1:]
+    has_prev = np.r_[False, same_id]
+    has_next = np.r_[same_id, False]
+
+    # 3. Columns to shift within ID
     shift_config = {
         "Prev In Punch": ("In Punch", 1),
         "Prev Out Punch": ("Out Punch", 1),
@@ -435,9 +460,9 @@ def add_time_helper_cols(df):
         "Next Punch Length (hrs)": ("Punch Length (hrs) Raw", -1),
     }
 
-    # Apply all shifts in one loop
     for new_col, (source_col, shift_periods) in shift_config.items():
-        df[new_col] = df.groupby("ID")[source_col].shift(shift_periods)
+        valid = has_prev if shift_periods > 0 else has_next
+        df[new_col] = df[source_col].shift(shift_periods).where(valid)
 
     df["Prev ID"] = df["ID"].shift(1)
     df["Next ID"] = df["ID"].shift(-1)
@@ -459,48 +484,60 @@ def add_next_break_time(df):
     return df
 
 
-def add_hours_worked_shift_and_shift_id(df, client_params):
-    # 1. Get the global fallback threshold (defaulting to 60 if missing)
-    global_gap = float(
-        client_params.get("global", {}).get("time_gap_for_new_shift", 60.0)
-    )
-
-    # 2. Extract location specific overrides
-    location_params = client_params.get("locations", {})
-
-    # 3. Build a dictionary of just the locations that override this specific rule
-    loc_gap_mapping = {}
-    for loc, params in location_params.items():
-        if "time_gap_for_new_shift" in params:
-            loc_gap_mapping[loc] = float(params["time_gap_for_new_shift"])
-
-    # 4. Map the thresholds to the dataframe
-    # We look at the employee's Location. If it's in the mapping, use the override.
-    # If not (or if missing), fill it with the global_gap.
-    if "Location" in df.columns:
-        dynamic_thresholds = df["Location"].map(loc_gap_mapping).fillna(global_gap)
-    else:
-        dynamic_thresholds = global_gap
+def _segment_running_sum(values, segment_starts):
+    """
+    Running sum of values within each contiguous segment (segment_starts marks each
+    segment's first row). Returns (per-row running sums, per-segment totals).
 
-    # 5. Evaluate the gap using the dynamic thresholds rather than a hardcoded 60
-    df["New Shift?"] = (df["Break Time (min)"] >= dynamic_thresholds) | df[
-        "Break Time (min)"
-    ].isna()
+    Accumulates exactly like pandas' groupby cumsum / sum: Kahan-compensated and
+    skipping NaN (a NaN row gets NaN, an all-NaN segment totals 0). Segments are
+    advanced one row position at a time, longest first, so each row is touched once.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    running = np.full(n, np.nan)
+    starts = np.flatnonzero(segment_starts)
+    sizes = np.diff(np.append(starts, n))
+    totals = np.zeros(len(starts))
+    if n == 0:
+        return running, totals
+
+    by_size = np.argsort(-sizes, kind="stable")
+    starts, sorted_sizes = starts[by_size], sizes[by_size]
+    compensation = np.zeros(len(starts))
+    accum = np.zeros(len(starts))
+
+    for position in range(int(sorted_sizes[0])):
+        alive = int(np.searchsorted(-sorted_sizes, -position, side="left"))
+        rows = starts[:alive] + position
+        val = values[rows]
+        present = ~np.isnan(val)
+
+        y = val - compensation[:alive]
+        t = accum[:alive] + y
+        compensation[:alive] = np.where(
+            present, t - accum[:alive] - y, compensation[:alive]
+        )
+        accum[:alive] = np.where(present, t, accum[:alive])
+        running[rows] = np.where(present, t, np.nan)
 
-    # Create shift id per employee (1, 2, 3, ...)
-    df["Shift Number"] = df.groupby("ID")["New Shift?"].cumsum()
+    totals[by_size] = accum
+    return running, totals
 
-    # Compute shift length (sum of hours per shift)
-    df["Hours Worked Shift"] = (
-        df.groupby(["ID", "Shift Number"])["Punch Length (hrs) Raw"].transform("sum")
-    ).round(4)
 
-    return df
+def add_shift_segmentation(df, client_params, resolved_params=None):
+    """
+    Fused shift segmentation stage. In one pass over the (ID, In Punch) sorted frame
+    (see add_time_helper_cols) it finds shift and punch-block boundaries once and
+    fills every column with segment reductions instead of per-column groupbys:
 
+    Shifts:       New Shift?, Shift Number, Hours Worked Shift
+    12hr check:   Shift Start, First Punch of Shift?, Is Break?, Break Count,
+                  Break Order, 2nd Break Start, Hours to 2nd Break, 12hr Credit Due
+    Punch blocks: Is New Punch?, Punch Number in Shift, Punch Length (hrs)
 
-def add_twelve_hour_check(df):
     ##################
-    # The credit will be due when in a unique shift:
+    # The 12hr credit will be due when in a unique shift:
     # Condition 1: 1) Hours Worked Shift is equal or longer than 12 hours
     #              2) There are less than two punches with Break Time (min) > 0
     # OR
@@ -509,44 +546,117 @@ def add_twelve_hour_check(df):
     #                 however the second break started after 10 hours of work time
     #                 from the start of the shift (break gaps are excluded)
     ##################
+    """
+    # 0. Employee blocks must be contiguous (rows without an ID form one block)
+    id_codes = pd.factorize(df["ID"], use_na_sentinel=False)[0]
+    if len(id_codes) and (np.diff(id_codes) < 0).any():
+        order = np.argsort(id_codes, kind="stable")
+        df = df.take(order)
+        id_codes = id_codes[order]
+    n = len(df)
+    employee_start = np.r_[True, id_codes[1:] != id_codes[:-1]][:n]
+
+    break_min = df["Break Time (min)"].to_numpy(dtype=np.float64)
+    punch_hrs = df["Punch Length (hrs) Raw"].to_numpy(dtype=np.float64)
+
+    # 1. Location-resolved thresholds (global fallback defaults to 60 if missing)
+    if resolved_params is None:
+        resolved_params = utility.resolve_client_params(client_params)
+    gap_table = utility.location_param_table(
+        resolved_params, "time_gap_for_new_shift", default=60.0, dtype=np.float64
+    )
+    if "Location" in df.columns:
+        dynamic_thresholds = gap_table[
+            utility.location_codes(resolved_params, df["Location"])
+        ]
+    else:
+        dynamic_thresholds = gap_table[-1]
+
+    # 2. Evaluate the gap using the dynamic thresholds rather than a hardcoded 60
+    new_shift = (break_min >= dynamic_thresholds) | np.isnan(break_min)
+    df["New Shift?"] = new_shift
+
+    # Create shift id per employee (1, 2, 3, ...): cumsum restarted at each employee
+    new_shift_count = np.cumsum(new_shift)
+    employee_offset = np.repeat(
+        new_shift_count[employee_start] - new_shift[employee_start],
+        np.diff(np.append(np.flatnonzero(employee_start), n)),
+    )
+    df["Shift Number"] = new_shift_count - employee_offset
+
+    # 3. Shift segments: one per (ID, Shift Number)
+    shift_start = employee_start | new_shift
+    shift_starts = np.flatnonzero(shift_start)
+    shift_sizes = np.diff(np.append(shift_starts, n))
+    shift_id = np.cumsum(shift_start) - 1
+
+    # Compute shift length (sum of hours per shift); cumulative work hours within
+    # shift (excludes break gaps between punches)
+    cumulative_work_hrs, shift_hours = _segment_running_sum(punch_hrs, shift_start)
+    df["Hours Worked Shift"] = np.repeat(shift_hours, shift_sizes).round(4)
 
     # Shift start time (kept for display)
-    df["Shift Start"] = df.groupby(["ID", "Shift Number"])["In Punch"].transform("min")
+    in_punch = df["In Punch"].to_numpy()
+    if n:
+        in_punch_keys = np.where(
+            np.isnat(in_punch), np.iinfo(np.int64).max, in_punch.view(np.int64)
+        )
+        shift_min = np.minimum.reduceat(in_punch_keys, shift_starts)
+        df["Shift Start"] = np.repeat(
+            np.where(
+                shift_min == np.iinfo(np.int64).max, np.iinfo(np.int64).min, shift_min
+            ).view(in_punch.dtype),
+            shift_sizes,
+        )
+    else:
+        df["Shift Start"] = df["In Punch"]
 
     # Identify first punch of shift
-    df["First Punch of Shift?"] = df.groupby(["ID", "Shift Number"]).cumcount().eq(0)
+    df["First Punch of Shift?"] = shift_start
 
     # Identify break-causing punches
-    df["Is Break?"] = (df["Break Time (min)"] > 0) & (~df["First Punch of Shift?"])
+    is_break = (break_min > 0) & ~shift_start
+    df["Is Break?"] = is_break
 
     # Count breaks per shift
-    df["Break Count"] = df.groupby(["ID", "Shift Number"])["Is Break?"].transform("sum")
-
-    # Rank ONLY break-causing punches by Out Punch
-    df["Break Order"] = (
-        df.loc[df["Is Break?"]]
-        .groupby(["ID", "Shift Number"])["Out Punch"]
-        .rank(method="first")
+    break_count = (
+        np.add.reduceat(is_break.astype(np.int64), shift_starts)
+        if n
+        else np.zeros(0, dtype=np.int64)
     )
-
-    # Cumulative work hours within shift (excludes break gaps between punches)
-    df["Cumulative Work Hrs"] = df.groupby(["ID", "Shift Number"])[
-        "Punch Length (hrs) Raw"
-    ].cumsum()
-
-    # Out punch of the work segment ending when the 2nd meal break begins
-    second_break = df[(df["Break Count"] >= 2) & (df["Break Order"] == 1)][
-        ["ID", "Shift Number", "Out Punch", "Cumulative Work Hrs"]
-    ].rename(
-        columns={
-            "Out Punch": "2nd Break Start",
-            "Cumulative Work Hrs": "Hours to 2nd Break",
-        }
+    df["Break Count"] = np.repeat(break_count, shift_sizes)
+
+    # Rank ONLY break-causing punches by Out Punch (ties keep row order)
+    out_punch = df["Out Punch"].to_numpy()
+    ranked = np.flatnonzero(is_break & ~np.isnat(out_punch))
+    by_out = np.lexsort((ranked, out_punch[ranked].view(np.int64), shift_id[ranked]))
+    ranked = ranked[by_out]
+    rank_run_start = np.r_[True, shift_id[ranked][1:] != shift_id[ranked][:-1]][
+        : len(ranked)
+    ]
+    run_first = np.maximum.accumulate(
+        np.where(rank_run_start, np.arange(len(ranked)), 0)
     )
-
-    # Merge back to the original dataframe to create the columns
-    df = df.merge(second_break, on=["ID", "Shift Number"], how="left")
-    df = df.drop(columns=["Cumulative Work Hrs"])
+    break_order = np.full(n, np.nan)
+    break_order[ranked] = np.arange(len(ranked)) - run_first + 1
+    df["Break Order"] = break_order
+
+    # Out punch of the work segment ending when the 2nd meal break begins, and the
+    # work hours up to it: gathered per shift, then broadcast to the shift's rows by
+    # shift code into pre-allocated arrays (keeps the frame's index, no join)
+    second_break_rows = np.flatnonzero(
+        (np.repeat(break_count, shift_sizes) >= 2) & (break_order == 1)
+    )
+    shift_second_break_start = np.full(
+        len(shift_starts), np.datetime64("NaT"), out_punch.dtype
+    )
+    shift_hours_to_second_break = np.full(len(shift_starts), np.nan)
+    shift_second_break_start[shift_id[second_break_rows]] = out_punch[second_break_rows]
+    shift_hours_to_second_break[shift_id[second_break_rows]] = cumulative_work_hrs[
+        second_break_rows
+    ]
+    df["2nd Break Start"] = shift_second_break_start[shift_id]
+    df["Hours to 2nd Break"] = shift_hours_to_second_break[shift_id]
 
     # Condition 1: ≥ 12 hours and fewer than 2 breaks
     cond1 = (df["Hours Worked Shift"] >= 12) & (df["Break Count"] < 2)
@@ -560,6 +670,24 @@ def add_twelve_hour_check(df):
 
     df["12hr Credit Due"] = cond1 | cond2
 
+    # 4. Punch blocks: stapled punches (no break time in between) are one block.
+    # A true new punch starts if there is at lease some break time (Break Time (min) > 0)
+    # or if it's the first punch of the shift.
+    new_punch = shift_start | (break_min > 0)
+    df["Is New Punch?"] = new_punch
+
+    # Same "Punch Number" for consecutive rows of the same continuous working block
+    new_punch_count = np.cumsum(new_punch)
+    df["Punch Number in Shift"] = new_punch_count - np.repeat(
+        new_punch_count[shift_start] - 1, shift_sizes
+    )
+
+    # Aggregate into the Punch Length column
+    _, block_hours = _segment_running_sum(punch_hrs, new_punch)
+    df["Punch Length (hrs)"] = np.repeat(
+        block_hours, np.diff(np.append(np.flatnonzero(new_punch), n))
+    ).round(4)
+
     return df
 
 
@@ -571,8 +699,8 @@ def add_split_shift(df, processed_wfn_df, min_wage):
         processed_wfn_df is not None
         and "Regular Rate Paid" in processed_wfn_df.columns
     ):
-        df["Regular Rate Paid"] = df["ID"].map(
-            processed_wfn_df.set_index("IDX")["Regular Rate Paid"]
+        df["Regular Rate Paid"] = utility.map_values(
+            df["ID"], processed_wfn_df.set_index("IDX")["Regular Rate Paid"]
         )
     else:
         df["Regular Rate Paid"] = np.nan
@@ -620,7 +748,7 @@ def add_col_from_another_df(
         # you can drop them here:
         # mapper = mapper[~mapper.index.duplicated(keep='first')]
 
-    home_df[home_new_col] = home_df[home_ref].map(mapper)
+    home_df[home_new_col] = utility.map_values(home_df[home_ref], mapper)
 
     return home_df
 
@@ -758,7 +886,7 @@ def create_anomalies_new(df):
     df["Over Twelve"] = (ta_masks.over_twelve(df)).astype(int)
 
     # Step 2: Aggregate anomalies by Employee and ID
-    anomalies_df = df.groupby(["ID"], as_index=False).agg(
+    anomalies_df = df.groupby(["ID"], as_index=False, observed=True).agg(
         {
             "Employee": "first",  # keeps this column
             "Paid Break Credit (hrs)": "first",  # keeps this column
@@ -792,26 +920,6 @@ def create_anomalies_new(df):
     return anomalies_df
 
 
-def add_punch_length(df):
-    # This function calculates a "Punch Length (hrs)" column that accounts for stapled punches. It uses the "Punch Length (hrs) Raw" column, which is the unstapled punch length, and then aggregates it based on whether punches are considered part of the same continuous working block (i.e., stapled together) or not.
-    # A true new punch starts if there is at lease some break time (Break Time (min) > 0) or if it's the first punch of the shift.
-    df["Is New Punch?"] = (df.groupby(["ID", "Shift Number"]).cumcount() == 0) | (
-        df["Break Time (min)"] > 0
-    )
-    # By taking a cumulative sum of the boolean values "Is New Punch?" (True = 1, False = 0), this line assigns the exact same "Punch Number" to consecutive rows that belong to the same continuous working block.
-    df["Punch Number in Shift"] = df.groupby(["ID", "Shift Number"])[
-        "Is New Punch?"
-    ].cumsum()
-    # Aggregate into the Punch Length DataFrame
-    df["Punch Length (hrs)"] = (
-        df.groupby(["ID", "Shift Number", "Punch Number in Shift"])[
-            "Punch Length (hrs) Raw"
-        ].transform("sum")
-    ).round(4)
-
-    return df
-
-
 def merge_source_into_target_auto(source_df, target_df, key_col="ID"):
     """
     Merge source_df into target_df:
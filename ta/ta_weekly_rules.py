@@ -10,6 +10,7 @@ from __future__ import annotations
 import numpy as np
 import pandas as pd
 from typing import Any
+import utility
 from helper.db_utils import get_carryover_streaks
 
 # ── Type alias ────────────────────────────────────────────────────────────────
@@ -27,28 +28,6 @@ _WEEKDAY_MAP: dict[str, int] = {
 }
 
 
-# ─────────────────────────────────────────────────────────────────────────────
-# Helper: resolve a config key with location-level override
-# ─────────────────────────────────────────────────────────────────────────────
-def _resolve(
-    client_params: ClientParams,
-    location: str,
-    key: str,
-) -> Any:
-    """
-    Return the value for `key` using the following priority:
-        1. client_params["locations"][location][key]   (if present)
-        2. client_params["global"][key]                (fallback)
-
-    Leading/trailing whitespace is stripped from the location string before
-    the lookup so that DataFrame string inconsistencies don't cause misses.
-    """
-    loc_cfg: dict = client_params.get("locations", {}).get(location.strip(), {})
-    if key in loc_cfg:
-        return loc_cfg[key]
-    return client_params["global"][key]
-
-
 # ─────────────────────────────────────────────────────────────────────────────
 # Helper: assign Workweek_ID (Sunday-anchored by default, or custom)
 # ─────────────────────────────────────────────────────────────────────────────
@@ -74,142 +53,195 @@ def _assign_workweek_id(
 
 
 # ─────────────────────────────────────────────────────────────────────────────
-# Helper: compute consecutive-day streaks for one employee group
+# Helper: convert datetimes to int64 day numbers
 # ─────────────────────────────────────────────────────────────────────────────
-def _compute_streaks_for_employee(
-    group: pd.DataFrame,
-    cba_rolling: bool,
-    carryover_streak: int,
+def _to_day_numbers(dates: pd.Series | pd.Timestamp) -> np.ndarray | int:
+    """
+    Return whole days since 1970-01-01 (same as normalising to midnight).
+    Accepts a datetime Series (→ int64 array) or a single Timestamp (→ int).
+    """
+    if isinstance(dates, pd.Timestamp):
+        return int(np.datetime64(dates, "D").astype(np.int64))
+    return dates.to_numpy().astype("datetime64[D]").astype(np.int64)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Helper: compute consecutive-day streaks for all employees at once
+# ─────────────────────────────────────────────────────────────────────────────
+def _compute_streaks(
+    day_numbers: np.ndarray,
+    group_starts: np.ndarray,
+    cba_rolling: np.ndarray,
+    carryover: np.ndarray,
     workweek_start_dow: int,
-    prior_period_date: pd.Timestamp,
-) -> pd.Series:
+    prior_period_day: int,
+) -> np.ndarray:
     """
-    Given a single-employee DataFrame (already sorted by Attributed_Workday),
-    compute the Days_Worked_In_Week streak for every row.
+    Compute the Days_Worked_In_Week streak for every row of every employee.
 
     Parameters
     ----------
-    group              : DataFrame slice for one employee, sorted by date.
-    cba_rolling        : True  → CBA Rolling rule (ignore workweek boundary).
-                         False → Standard rule (reset at workweek boundary).
-    carryover_streak   : Streak the employee carried out of the prior period
+    day_numbers        : int64 day numbers (see _to_day_numbers), sorted by
+                         employee then date.
+    group_starts       : Row offset where each employee's rows begin.
+    cba_rolling        : Per employee. True  → CBA Rolling rule (ignore workweek boundary).
+                                       False → Standard rule (reset at workweek boundary).
+    carryover          : Per employee streak carried out of the prior period
                          (only meaningful when cba_rolling=True).
     workweek_start_dow : Integer 0–6 (Mon=0…Sun=6) of the workweek start day.
+    prior_period_day   : Day number the prior period ended on.
 
     Returns
     -------
-    pd.Series of int, same index as `group`, representing the streak value
-    for each row.
-    """
-    # Normalise dates once to avoid timezone / hour-offset bugs
-    dates: np.ndarray = (
-        group["Attributed_Workday"].dt.normalize().to_numpy()
-    )  # numpy datetime64
-
-    n = len(dates)
-    streaks = np.empty(n, dtype=np.int64)
+    int64 array, one streak value per row.
 
+    A streak restarts at an employee's first row, after a gap of more than one
+    day, and (Standard rule only) when the workweek start day is entered from
+    another weekday. Each row's streak is its distance from the last restart
+    plus that restart's value: 1, or carryover + 1 for a CBA employee whose
+    first shift is exactly 1 day after the prior period ended.
+    """
+    n = len(day_numbers)
     if n == 0:
-        return pd.Series(streaks, index=group.index, dtype="int64")
-
-    # ── First row ────────────────────────────────────────────────────────────
-    if cba_rolling:
-        first_date = pd.Timestamp(dates[0])
-        # Only continue the streak if the first shift is exactly 1 day after the prior period ended!
-        if carryover_streak > 0 and (first_date - prior_period_date).days == 1:
-            streaks[0] = carryover_streak + 1
-        else:
-            streaks[0] = 1
-    else:
-        streaks[0] = 1
-
-    # ── Subsequent rows ───────────────────────────────────────────────────────
-    for i in range(1, n):
-        prev_date = pd.Timestamp(dates[i - 1])
-        curr_date = pd.Timestamp(dates[i])
-
-        gap_days: int = (curr_date - prev_date).days  # always ≥ 1 (sorted unique dates)
-
-        if gap_days > 1:
-            # Gap in worked days → streak breaks
-            streaks[i] = 1
-        elif cba_rolling:
-            # CBA Rolling: only gap matters, no workweek boundary
-            streaks[i] = streaks[i - 1] + 1
-        else:
-            # Standard rule: also reset if we cross the workweek start boundary
-            crossed_boundary = (prev_date.dayofweek != workweek_start_dow) and (
-                curr_date.dayofweek == workweek_start_dow
-            )
-            if crossed_boundary:
-                streaks[i] = 1
-            else:
-                streaks[i] = streaks[i - 1] + 1
-
-    return pd.Series(streaks, index=group.index, dtype="int64")
+        return np.empty(0, dtype=np.int64)
+
+    day_numbers = np.asarray(day_numbers, dtype=np.int64)
+    group_starts = np.asarray(group_starts, dtype=np.int64)
+    cba_rolling = np.asarray(cba_rolling, dtype=bool)
+    carryover = np.asarray(carryover, dtype=np.int64)
+
+    # ── Per-row rule flag and weekday (1970-01-01 was a Thursday → 3) ────────
+    group_sizes = np.diff(np.append(group_starts, n))
+    row_cba = np.repeat(cba_rolling, group_sizes)
+    dow = (day_numbers + 3) % 7
+
+    # ── Restart points ───────────────────────────────────────────────────────
+    restart = np.zeros(n, dtype=bool)
+    restart[1:] = np.diff(day_numbers) > 1  # gap in worked days → streak breaks
+    crossed_boundary = np.zeros(n, dtype=bool)
+    crossed_boundary[1:] = (dow[:-1] != workweek_start_dow) & (
+        dow[1:] == workweek_start_dow
+    )
+    restart |= crossed_boundary & ~row_cba
+    restart[group_starts] = True
+
+    # ── Restart values: 1, or continue the carryover streak ──────────────────
+    restart_value = np.ones(n, dtype=np.int64)
+    continues = (
+        cba_rolling
+        & (carryover > 0)
+        & (day_numbers[group_starts] - prior_period_day == 1)
+    )
+    restart_value[group_starts] = np.where(continues, carryover + 1, 1)
+
+    # ── Distance from the last restart ───────────────────────────────────────
+    rows = np.arange(n)
+    last_restart = np.maximum.accumulate(np.where(restart, rows, 0))
+    return rows - last_restart + restart_value[last_restart]
 
 
 # ─────────────────────────────────────────────────────────────────────────────
-# Helper: apply consecutive-day premium to one employee-workweek group
+# Helper: apply consecutive-day premium to every row at once
 # ─────────────────────────────────────────────────────────────────────────────
-def _apply_consec_premium(group: pd.DataFrame, consec_threshold: int) -> pd.DataFrame:
+def _apply_consec_premium(df: pd.DataFrame, consec_threshold: np.ndarray) -> None:
     """
-    For rows where Days_Worked_In_Week > consec_threshold:
+    For rows where Days_Worked_In_Week > consec_threshold (one threshold per row):
         Regular_Hrs = 0
         OT_Hrs      = min(Hours_Worked, 8)
         DT_Hrs      = max(Hours_Worked - 8, 0)
 
-    Operates in-place on the group slice and returns it.
+    Operates in-place on the whole frame; row order is untouched.
     """
-    mask: pd.Series = group["Days_Worked_In_Week"] > consec_threshold
+    mask: np.ndarray = df["Days_Worked_In_Week"].to_numpy() > consec_threshold
 
     if mask.any():
-        hw = group.loc[mask, "Hours_Worked"]
-        group.loc[mask, "Regular_Hrs"] = 0.0
-        group.loc[mask, "OT_Hrs"] = hw.clip(upper=8.0)
-        group.loc[mask, "DT_Hrs"] = (hw - 8.0).clip(lower=0.0)
-        group.loc[mask, "Is_Consecutive_Day_Rule"] = True
-
-    return group
+        hw = df.loc[mask, "Hours_Worked"]
+        df.loc[mask, "Regular_Hrs"] = 0.0
+        df.loc[mask, "OT_Hrs"] = hw.clip(upper=8.0)
+        df.loc[mask, "DT_Hrs"] = (hw - 8.0).clip(lower=0.0)
+        df.loc[mask, "Is_Consecutive_Day_Rule"] = True
 
 
 # ─────────────────────────────────────────────────────────────────────────────
-# Helper: apply weekly OT spillover to one employee-workweek group
+# Helper: weekly OT spillover for all employee-workweeks at once
 # ─────────────────────────────────────────────────────────────────────────────
-def _apply_weekly_ot(group: pd.DataFrame, ot_week_max: float) -> pd.DataFrame:
+def _compute_weekly_ot(
+    regular_hrs: np.ndarray,
+    group_starts: np.ndarray,
+    ot_week_max: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
-    Rolling cumulative sum of Regular_Hrs within the workweek.
+    Rolling cumulative sum of Regular_Hrs within each employee-workweek.
     Once the employee's Regular_Hrs exceed ot_week_max, the overflow is:
         • Removed from Regular_Hrs
-        • Added to OT_Hrs
+        • Added to OT_Hrs (by the caller)
         • Recorded in Weekly_OT_Spillover
 
-    The group must be sorted chronologically before calling this helper.
+    Parameters
+    ----------
+    regular_hrs  : Regular_Hrs per row, sorted chronologically within each group.
+    group_starts : Row offset where each employee-workweek's rows begin.
+    ot_week_max  : Weekly regular-hours cap, one per group.
+
+    Returns
+    -------
+    (Regular_Hrs, Weekly_OT_Spillover, Cum_Reg_Hrs) arrays, one value per row.
+
+    Every group is advanced one row position at a time, so the loop runs once
+    per day of the longest workweek (not once per row) and the running totals
+    are accumulated in exactly the same order as a row-by-row loop.
     """
-    reg = group["Regular_Hrs"].values.copy()
-    spillover = np.zeros(len(reg), dtype=np.float64)
-    cum_reg = np.zeros(len(reg), dtype=np.float64)
+    reg = np.array(regular_hrs, dtype=np.float64)
+    n = len(reg)
+    spillover = np.zeros(n, dtype=np.float64)
+    cum_reg = np.zeros(n, dtype=np.float64)
+    if n == 0:
+        return reg, spillover, cum_reg
+
+    group_starts = np.asarray(group_starts, dtype=np.int64)
+    ot_week_max = np.asarray(ot_week_max, dtype=np.float64)
+    group_sizes = np.diff(np.append(group_starts, n))
+    running_total = np.zeros(len(group_starts), dtype=np.float64)
+
+    for position in range(int(group_sizes.max())):
+        groups = np.flatnonzero(group_sizes > position)
+        rows = group_starts[groups] + position
+        r = reg[rows]
+
+        total = running_total[groups] + r
+        cum_reg[rows] = total
 
-    running_total: float = 0.0
+        over = total > ot_week_max[groups]
+        # Cap how much we can spill from this single row
+        spill = np.where(over, np.minimum(total - ot_week_max[groups], r), 0.0)
+        spillover[rows] = spill
+        reg[rows] = r - spill
+        running_total[groups] = np.where(over, ot_week_max[groups], total)  # cap the counter
 
-    for i, r in enumerate(reg):
-        running_total += r
-        cum_reg[i] = running_total
+    return reg, spillover, cum_reg
 
-        if running_total > ot_week_max:
-            overflow = running_total - ot_week_max
-            # Cap how much we can spill from this single row
-            actual_spill = min(overflow, r)
-            spillover[i] = actual_spill
-            reg[i] -= actual_spill
-            running_total = ot_week_max  # cap the counter
 
-    group = group.copy()
-    group["Regular_Hrs"] = reg
-    group["OT_Hrs"] = group["OT_Hrs"] + spillover
-    group["Weekly_OT_Spillover"] = spillover
-    group["Cum_Reg_Hrs"] = cum_reg
-    return group
+# ─────────────────────────────────────────────────────────────────────────────
+# Carryover streaks from the prior pay period
+# ─────────────────────────────────────────────────────────────────────────────
+def fetch_carryover_streaks(
+    client_params: ClientParams,
+    clientId: str,
+    pay_date: str,
+    resolved_params: dict | None = None,
+) -> dict:
+    """
+    Prior-period streaks for CBA rolling employees (one DB call).
+    Returns {} without touching the DB when no location uses the CBA rolling rule.
+    """
+    if resolved_params is None:
+        resolved_params = utility.resolve_client_params(client_params)
+    cba_table = utility.location_param_table(
+        resolved_params, "cba_consec_anyweek", default=False, dtype=bool
+    )
+    if not cba_table.any():
+        return {}
+    return get_carryover_streaks(clientId, pay_date, client_params)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -220,6 +252,8 @@ def apply_weekly_rules(
     client_params: ClientParams,
     clientId: str,
     pay_date: str,
+    resolved_params: dict | None = None,
+    carryover_streaks: dict | None = None,
 ) -> pd.DataFrame:
     """
     Apply dynamic Weekly Overtime and Consecutive Day Premium rules to a
@@ -233,6 +267,10 @@ def apply_weekly_rules(
     client_params : Config dict with a 'global' block and a 'locations' block.
     clientId      : Client identifier string (e.g. "demo_client").
     pay_date      : Pay date string (e.g. "2026-04-10").
+    resolved_params : utility.resolve_client_params(client_params), if the
+                    caller already built it for this request.
+    carryover_streaks : fetch_carryover_streaks(...) result, if the caller
+                    already fetched it (sharded runs fetch once, not per shard).
 
     Returns
     -------
@@ -248,9 +286,10 @@ def apply_weekly_rules(
     df = daily_df.copy()
 
     # Strip whitespace from string columns to prevent lookup mismatches
+    # (categorical columns only strip their categories)
     for col in ("Employee", "ID", "Location"):
         if col in df.columns:
-            df[col] = df[col].astype(str).str.strip()
+            df[col] = utility.strip_text(df[col])
 
     # Ensure Attributed_Workday is datetime
     df["Attributed_Workday"] = pd.to_datetime(df["Attributed_Workday"])
@@ -262,18 +301,21 @@ def apply_weekly_rules(
     df["Cum_Reg_Hrs"] = 0.0
     df["Weekly_OT_Spillover"] = 0.0
 
-    # ── 1. Global config values ───────────────────────────────────────────────
+    # ── 1. Global config values & location-resolved parameters ──────────────
+    #
+    # Per-location overrides are gathered by location code (global slot for
+    # unconfigured locations), never looked up per employee.
+    if resolved_params is None:
+        resolved_params = utility.resolve_client_params(client_params)
     g_cfg: dict = client_params["global"]
     workweek_start_name: str = g_cfg["workweek_start"].strip()
     workweek_start_dow: int = _WEEKDAY_MAP[workweek_start_name.lower()]
 
-    # ── 2. Determine if ANY location uses CBA rolling rule ────────────────────
-    any_cba_rolling: bool = any(
-        loc_cfg.get("cba_consec_anyweek", g_cfg.get("cba_consec_anyweek", False))
-        for loc_cfg in client_params.get("locations", {}).values()
+    # ── 2. CBA rolling rule per location code ─────────────────────────────────
+    # (the table's last slot is the global fallback)
+    cba_table: np.ndarray = utility.location_param_table(
+        resolved_params, "cba_consec_anyweek", default=False, dtype=bool
     )
-    # Also check the global fallback
-    any_cba_rolling = any_cba_rolling or g_cfg.get("cba_consec_anyweek", False)
 
     # ── 3. Fetch carryover streaks if needed ──────────────────────────────────
     # Calculate exact prior period date for gap checking
@@ -282,10 +324,13 @@ def apply_weekly_rules(
     pay_length = g_cfg.get("pay_period_length", 14)
     prior_period_date = pay_date_obj - pd.Timedelta(days=days_gap + pay_length)
 
-    carryover_dict: dict[str, int] = {}
-    if any_cba_rolling:
-        raw_carryover = get_carryover_streaks(clientId, pay_date, client_params)
-        carryover_dict = {str(k).strip(): int(v) for k, v in raw_carryover.items()}
+    if carryover_streaks is None:
+        carryover_streaks = fetch_carryover_streaks(
+            client_params, clientId, pay_date, resolved_params
+        )
+    carryover_dict: dict[str, int] = {
+        str(k).strip(): int(v) for k, v in carryover_streaks.items()
+    }
 
     # ── 4. Assign Workweek_ID ─────────────────────────────────────────────────
     df["Workweek_ID"] = _assign_workweek_id(
@@ -293,74 +338,88 @@ def apply_weekly_rules(
     )
 
     # ── 5. Sort for correct streak & cumulative calculations ──────────────────
+    # The only sort: steps 6–8 work in place on this order.
     df.sort_values(["ID", "Attributed_Workday"], inplace=True)
     df.reset_index(drop=True, inplace=True)
 
     # ── 6. Compute per-employee consecutive-day streaks ───────────────────────
     #
-    # We iterate employee groups (not row-by-row) so Pandas alignment is safe.
-    # Each group is a contiguous slice after sort, so index is monotonic.
-
-    streak_parts: list[pd.Series] = []
-
-    for emp_id, emp_group in df.groupby("ID", sort=False):
-        # Resolve per-employee location (take first occurrence — location is
-        # assumed constant per employee within a pay period)
-        emp_location: str = emp_group["Location"].iloc[0]
-        cba_rolling: bool = bool(
-            _resolve(client_params, emp_location, "cba_consec_anyweek")
-        )
-
-        # Carryover streak: only meaningful for CBA rolling employees
-        carryover: int = (
-            carryover_dict.get(str(emp_id).strip(), 0) if cba_rolling else 0
-        )
-
-        streaks = _compute_streaks_for_employee(
-            emp_group,
-            cba_rolling=cba_rolling,
-            carryover_streak=carryover,
-            workweek_start_dow=workweek_start_dow,
-            prior_period_date=prior_period_date,
-        )
-        streak_parts.append(streaks)
+    # Rows are sorted by ID, so each employee is one contiguous block. Rule
+    # flags and carryover are resolved once per employee (location is assumed
+    # constant per employee within a pay period — take the first occurrence),
+    # then streaks for all employees are computed in one vectorized pass.
+
+    ids: np.ndarray = df["ID"].to_numpy()
+    group_starts = (
+        np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+        if len(df)
+        else np.empty(0, dtype=np.int64)
+    )
+    emp_ids = ids[group_starts]
+    emp_locations = df["Location"].to_numpy()[group_starts]
+
+    emp_codes = utility.location_codes(resolved_params, emp_locations)
+
+    cba_rolling = cba_table[emp_codes]
+    # Carryover streak: only meaningful for CBA rolling employees
+    carryover = np.array(
+        [
+            carryover_dict.get(str(emp_id).strip(), 0) if cba else 0
+            for emp_id, cba in zip(emp_ids, cba_rolling)
+        ],
+        dtype=np.int64,
+    )
 
-    df["Days_Worked_In_Week"] = pd.concat(streak_parts).astype("int64")
+    df["Days_Worked_In_Week"] = _compute_streaks(
+        _to_day_numbers(df["Attributed_Workday"]),
+        group_starts,
+        cba_rolling,
+        carryover,
+        workweek_start_dow,
+        _to_day_numbers(prior_period_date),
+    )
 
     # ── 7. Apply Consecutive Day Premium (per employee) ───────────────────────
     #
-    # We group by ID only (not workweek) because CBA rolling streaks can span
-    # workweek boundaries. The threshold check is per-row, so grouping by ID
-    # is sufficient and correct.
-
-    processed_parts: list[pd.DataFrame] = []
-
-    for emp_id, emp_group in df.groupby("ID", sort=False):
-        emp_location = emp_group["Location"].iloc[0]
-        consec_threshold: int = int(
-            _resolve(client_params, emp_location, "number_of_consec_days_before_ot")
-        )
-        emp_group = emp_group.copy()
-        emp_group = _apply_consec_premium(emp_group, consec_threshold)
-        processed_parts.append(emp_group)
-
-    df = pd.concat(processed_parts).sort_values(["ID", "Attributed_Workday"])
-    df.reset_index(drop=True, inplace=True)
+    # The threshold is per employee (not workweek) because CBA rolling streaks
+    # can span workweek boundaries; it is broadcast to the employee's rows and
+    # checked per row on the sorted frame, in place.
+
+    group_sizes = np.diff(np.append(group_starts, len(df)))
+    consec_threshold = np.repeat(
+        utility.location_param_table(
+            resolved_params, "number_of_consec_days_before_ot"
+        )[emp_codes].astype(int),
+        group_sizes,
+    )
+    _apply_consec_premium(df, consec_threshold)
 
     # ── 8. Apply Weekly OT Spillover (per employee × workweek) ───────────────
     #
-    # Standard OT is always workweek-bounded, even for CBA employees.
-
-    ot_parts: list[pd.DataFrame] = []
-
-    for (_, _), ww_group in df.groupby(["ID", "Workweek_ID"], sort=False):
-        emp_location = ww_group["Location"].iloc[0]
-        ot_week_max: float = float(_resolve(client_params, emp_location, "ot_week_max"))
-        ww_group = _apply_weekly_ot(ww_group, ot_week_max)
-        ot_parts.append(ww_group)
+    # Standard OT is always workweek-bounded, even for CBA employees. Rows are
+    # still sorted by ID then date, so each employee-workweek is one contiguous
+    # block; its cap is resolved from the block's first Location.
+
+    weeks = df["Workweek_ID"].to_numpy()
+    ww_starts = (
+        np.flatnonzero(np.r_[True, (ids[1:] != ids[:-1]) | (weeks[1:] != weeks[:-1])])
+        if len(df)
+        else np.empty(0, dtype=np.int64)
+    )
+    ww_codes = utility.location_codes(
+        resolved_params, df["Location"].to_numpy()[ww_starts]
+    )
+    ot_week_max = utility.location_param_table(
+        resolved_params, "ot_week_max", dtype=np.float64
+    )[ww_codes]
 
-    df = pd.concat(ot_parts).sort_values(["ID", "Attributed_Workday"])
-    df.reset_index(drop=True, inplace=True)
+    regular_hrs, spillover, cum_reg = _compute_weekly_ot(
+        df["Regular_Hrs"].to_numpy(), ww_starts, ot_week_max
+    )
+    df["Regular_Hrs"] = regular_hrs
+    df["OT_Hrs"] = df["OT_Hrs"] + spillover
+    df["Weekly_OT_Spillover"] = spillover
+    df["Cum_Reg_Hrs"] = cum_reg
 
     # ── 9. Final type enforcement ─────────────────────────────────────────────
     df["Days_Worked_In_Week"] = df["Days_Worked_In_Week"].astype("int64")
@@ -0,0 +1,132 @@
+"""
+Frozen reference: the shift segmentation stages of ta/ta_utility.py as they were
+before add_shift_segmentation fused them (one groupby pass per column, 2nd-break
+values merged back per shift). Equivalence tests compare the current module
+against them. Do not edit.
+"""
+
+import pandas as pd
+
+
+def add_hours_worked_shift_and_shift_id(df, client_params):
+    # 1. Get the global fallback threshold (defaulting to 60 if missing)
+    global_gap = float(
+        client_params.get("global", {}).get("time_gap_for_new_shift", 60.0)
+    )
+
+    # 2. Extract location specific overrides
+    location_params = client_params.get("locations", {})
+
+    # 3. Build a dictionary of just the locations that override this specific rule
+    loc_gap_mapping = {}
+    for loc, params in location_params.items():
+        if "time_gap_for_new_shift" in params:
+            loc_gap_mapping[loc] = float(params["time_gap_for_new_shift"])
+
+    # 4. Map the thresholds to the dataframe
+    # We look at the employee's Location. If it's in the mapping, use the override.
+    # If not (or if missing), fill it with the global_gap.
+    if "Location" in df.columns:
+        dynamic_thresholds = df["Location"].map(loc_gap_mapping).fillna(global_gap)
+    else:
+        dynamic_thresholds = global_gap
+
+    # 5. Evaluate the gap using the dynamic thresholds rather than a hardcoded 60
+    df["New Shift?"] = (df["Break Time (min)"] >= dynamic_thresholds) | df[
+        "Break Time (min)"
+    ].isna()
+
+    # Create shift id per employee (1, 2, 3, ...)
+    df["Shift Number"] = df.groupby("ID")["New Shift?"].cumsum()
+
+    # Compute shift length (sum of hours per shift)
+    df["Hours Worked Shift"] = (
+        df.groupby(["ID", "Shift Number"])["Punch Length (hrs) Raw"].transform("sum")
+    ).round(4)
+
+    return df
+
+
+def add_twelve_hour_check(df):
+    ##################
+    # The credit will be due when in a unique shift:
+    # Condition 1: 1) Hours Worked Shift is equal or longer than 12 hours
+    #              2) There are less than two punches with Break Time (min) > 0
+    # OR
+    # Condition 2: 1) Hours Worked Shift is equal or longer than 12 hours
+    #              2) There are two punches or more with Break Time (min) > 0,
+    #                 however the second break started after 10 hours of work time
+    #                 from the start of the shift (break gaps are excluded)
+    ##################
+
+    # Shift start time (kept for display)
+    df["Shift Start"] = df.groupby(["ID", "Shift Number"])["In Punch"].transform("min")
+
+    # Identify first punch of shift
+    df["First Punch of Shift?"] = df.groupby(["ID", "Shift Number"]).cumcount().eq(0)
+
+    # Identify break-causing punches
+    df["Is Break?"] = (df["Break Time (min)"] > 0) & (~df["First Punch of Shift?"])
+
+    # Count breaks per shift
+    df["Break Count"] = df.groupby(["ID", "Shift Number"])["Is Break?"].transform("sum")
+
+    # Rank ONLY break-causing punches by Out Punch
+    df["Break Order"] = (
+        df.loc[df["Is Break?"]]
+        .groupby(["ID", "Shift Number"])["Out Punch"]
+        .rank(method="first")
+    )
+
+    # Cumulative work hours within shift (excludes break gaps between punches)
+    df["Cumulative Work Hrs"] = df.groupby(["ID", "Shift Number"])[
+        "Punch Length (hrs) Raw"
+    ].cumsum()
+
+    # Out punch of the work segment ending when the 2nd meal break begins
+    second_break = df[(df["Break Count"] >= 2) & (df["Break Order"] == 1)][
+        ["ID", "Shift Number", "Out Punch", "Cumulative Work Hrs"]
+    ].rename(
+        columns={
+            "Out Punch": "2nd Break Start",
+            "Cumulative Work Hrs": "Hours to 2nd Break",
+        }
+    )
+
+    # Merge back to the original dataframe to create the columns
+    df = df.merge(second_break, on=["ID", "Shift Number"], how="left")
+    df = df.drop(columns=["Cumulative Work Hrs"])
+
+    # Condition 1: ≥ 12 hours and fewer than 2 breaks
+    cond1 = (df["Hours Worked Shift"] >= 12) & (df["Break Count"] < 2)
+
+    # Condition 2: ≥ 12 hours, ≥ 2 breaks, second break after 10 hours
+    cond2 = (
+        (df["Hours Worked Shift"] >= 12)
+        & (df["Break Count"] >= 2)
+        & (df["Hours to 2nd Break"] > 10)
+    )
+
+    df["12hr Credit Due"] = cond1 | cond2
+
+    return df
+
+
+def add_punch_length(df):
+    # This function calculates a "Punch Length (hrs)" column that accounts for stapled punches. It uses the "Punch Length (hrs) Raw" column, which is the unstapled punch length, and then aggregates it based on whether punches are considered part of the same continuous working block (i.e., stapled together) or not.
+    # A true new punch starts if there is at lease some break time (Break Time (min) > 0) or if it's the first punch of the shift.
+    df["Is New Punch?"] = (df.groupby(["ID", "Shift Number"]).cumcount() == 0) | (
+        df["Break Time (min)"] > 0
+    )
+    # By taking a cumulative sum of the boolean values "Is New Punch?" (True = 1, False = 0), this line assigns the exact same "Punch Number" to consecutive rows that belong to the same continuous working block.
+    df["Punch Number in Shift"] = df.groupby(["ID", "Shift Number"])[
+        "Is New Punch?"
+    ].cumsum()
+    # Aggregate into the Punch Length DataFrame
+    df["Punch Length (hrs)"] = (
+        df.groupby(["ID", "Shift Number", "Punch Number in Shift"])[
+            "Punch Length (hrs) Raw"
+        ].transform("sum")
+    ).round(4)
+
+    return df
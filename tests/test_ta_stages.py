@@ -0,0 +1,114 @@
+"""
+Equivalence tests for the TA punch stages and execution modes:
+  - add_shift_segmentation against the frozen per-column stages it fused
+    (tests/legacy_ta_utility.py), on randomized punches;
+  - sharded and categorical runs of ta_process._run_ta_stages against the plain
+    single-frame object-dtype run, on a synthetic pay period.
+Carryover streaks are faked (no database needed).
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+import utility
+from ta import ta_process, ta_utility, ta_weekly_rules
+from benchmarks import synthetic
+from benchmarks.bench_sharding import prepare_inputs
+from tests import legacy_ta_utility as legacy
+
+PUNCHES = 6_000
+SEGMENTATION_PARAMS = {
+    "global": {"time_gap_for_new_shift": 60},
+    "locations": {"A": {"time_gap_for_new_shift": 45}},
+}
+
+
+def make_punches(rng):
+    """Random punches with gaps around the shift thresholds, stapled and overnight."""
+    rows = []
+    for emp in range(int(rng.integers(1, 60))):
+        t = pd.Timestamp("2026-01-01") + pd.Timedelta(minutes=int(rng.integers(0, 600)))
+        location = str(rng.choice(["A", "B"]))
+        for _ in range(int(rng.integers(1, 30))):
+            gap = int(
+                rng.choice([0, 0, 10, 30, 31, 44, 45, 59, 60, 61, 120, 600, 1000])
+            )
+            t += pd.Timedelta(minutes=gap)
+            length = pd.Timedelta(minutes=int(rng.integers(1, 400)))
+            rows.append((f"E{emp}", location, t, t + length))
+            t += length
+    df = pd.DataFrame(rows, columns=["ID", "Location", "In Punch", "Out Punch"])
+    df["Date"] = df["In Punch"].dt.normalize()
+    df["Punch Length (hrs) Raw"] = (df["Out Punch"] - df["In Punch"]) / pd.Timedelta(
+        hours=1
+    )
+    return ta_utility.add_break_time(ta_utility.add_time_helper_cols(df))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_shift_segmentation_matches_legacy_stages(seed):
+    df = make_punches(np.random.default_rng(seed))
+
+    expected = legacy.add_hours_worked_shift_and_shift_id(
+        df.copy(), SEGMENTATION_PARAMS
+    )
+    expected = legacy.add_punch_length(legacy.add_twelve_hour_check(expected))
+    actual = ta_utility.add_shift_segmentation(df.copy(), SEGMENTATION_PARAMS)
+    pd.testing.assert_frame_equal(actual, expected, check_exact=True)
+
+
+@pytest.fixture(scope="module")
+def pay_period():
+    """Normalized synthetic punches plus processed waiver / WFN frames."""
+    return prepare_inputs(PUNCHES)
+
+
+@pytest.fixture
+def run_stages(pay_period, monkeypatch):
+    streaks = synthetic.make_carryover_streaks(synthetic.employees_for_punches(PUNCHES))
+    monkeypatch.setattr(
+        ta_weekly_rules,
+        "get_carryover_streaks",
+        lambda clientId, pay_date, client_params: streaks,
+    )
+    df, processed_waiver_df, processed_wfn_df, pay_date = pay_period
+
+    def run(stages, convert=None, **kwargs):
+        # Each stage run mutates its input frame, so every run gets a fresh copy
+        frame = convert(df.copy()) if convert else df.copy()
+        return stages(
+            frame,
+            synthetic.CLIENT_PARAMS,
+            synthetic.MIN_WAGE,
+            pay_date,
+            synthetic.CLIENT_ID,
+            processed_waiver_df,
+            processed_wfn_df,
+            **kwargs,
+        )
+
+    return run
+
+
+@pytest.mark.parametrize("workers", [2, 3])
+def test_sharded_stages_match_single_frame(run_stages, workers):
+    expected = run_stages(ta_process._run_ta_stages)
+    actual = run_stages(
+        ta_process._run_ta_stages_sharded, workers=workers, executor_kind="thread"
+    )
+    for result, reference in zip(actual, expected):
+        pd.testing.assert_frame_equal(result, reference, check_exact=True)
+
+
+def test_categorical_stages_match_object_dtypes(run_stages):
+    expected = run_stages(ta_process._run_ta_stages)
+    actual = run_stages(
+        ta_process._run_ta_stages,
+        convert=lambda df: utility.to_categorical(
+            df, ta_process.TA_CATEGORICAL_COLUMNS
+        ),
+    )
+    for result, reference in zip(actual, expected):
+        pd.testing.assert_frame_equal(
+            utility.categorical_to_object(result.copy()), reference, check_exact=True
+        )
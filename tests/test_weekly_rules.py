@@ -0,0 +1,113 @@
+"""
+Equivalence tests for ta.ta_weekly_rules against the frozen pre-vectorization
+module (tests/legacy_ta_weekly_rules.py): the vectorized streak engine (cases
+built as in benchmarks/bench_streaks.py) and the in-place apply_weekly_rules
+pipeline must reproduce the former loops exactly on randomized inputs. Carryover
+streaks are faked (no database needed).
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from ta import ta_weekly_rules
+from benchmarks import bench_streaks
+from tests import legacy_ta_weekly_rules as legacy
+
+PERIOD_START = pd.Timestamp("2026-01-04")
+PERIOD_DAYS = 14
+LOCATIONS = ["2JT", "18F", "18J", "ABC"]
+
+
+# ── Streak engine (step 6) ───────────────────────────────────────────────────
+@pytest.mark.parametrize("seed", range(8))
+def test_streaks_match_legacy_loop(seed):
+    rng = np.random.default_rng(seed)
+    for case in range(100):
+        df, cba_by_id, carryover_by_id = bench_streaks.make_case(
+            rng, int(rng.integers(0, 6)), duplicates=case % 3 == 0
+        )
+        workweek_start_dow = int(rng.integers(0, 7))
+        # Prior period ends 0–2 days before the period start (1 → streaks continue)
+        prior_period_date = bench_streaks.PERIOD_START - pd.Timedelta(
+            days=int(rng.integers(0, 3))
+        )
+        args = (df, cba_by_id, carryover_by_id, workweek_start_dow, prior_period_date)
+
+        expected = bench_streaks.legacy_streaks(*args)
+        actual = bench_streaks.vectorized_streaks(*args)
+        assert np.array_equal(expected, actual), (
+            f"case {case}\n{df.assign(expected=expected, actual=actual)}"
+        )
+
+
+# ── apply_weekly_rules (steps 6–9) ───────────────────────────────────────────
+def make_client_params(rng):
+    """Random rule mix: workweek start, CBA locations, thresholds and weekly caps."""
+    locations = {}
+    for location in LOCATIONS[:3]:
+        overrides = {}
+        if rng.random() < 0.5:
+            overrides["cba_consec_anyweek"] = bool(rng.random() < 0.5)
+        if rng.random() < 0.5:
+            overrides["number_of_consec_days_before_ot"] = int(rng.integers(2, 7))
+        if rng.random() < 0.5:
+            overrides["ot_week_max"] = float(rng.choice([20, 38, 40.5]))
+        locations[location] = overrides
+    return {
+        "global": {
+            "pay_period_length": PERIOD_DAYS,
+            "days_bet_payroll_end_and_pay_date": 6,
+            "ot_week_max": int(rng.choice([24, 32, 40])),
+            "workweek_start": str(
+                rng.choice(["Sunday", "Monday", "Wednesday", " saturday "])
+            ),
+            "cba_consec_anyweek": bool(rng.random() < 0.2),
+            "number_of_consec_days_before_ot": 6,
+        },
+        "locations": locations,
+    }
+
+
+def make_daily_df(rng, employees):
+    """Unsorted daily totals, one row per employee and worked day."""
+    rows = []
+    for emp in range(employees):
+        # Padded text exercises the whitespace stripping of both implementations
+        location = str(rng.choice(LOCATIONS))
+        location = f" {location}" if rng.random() < 0.1 else location
+        for day in np.flatnonzero(rng.random(PERIOD_DAYS) < rng.uniform(0.3, 1.0)):
+            rows.append((f"Employee {emp}", f"E{emp:05d}", location, day))
+    df = pd.DataFrame(rows, columns=["Employee", "ID", "Location", "day"])
+    df["Attributed_Workday"] = PERIOD_START + pd.to_timedelta(df.pop("day"), unit="D")
+    hours = rng.uniform(0.0, 14.0, size=len(df)).round(2)
+    df["Hours_Worked"] = hours
+    df["Regular_Hrs"] = np.minimum(hours, 8.0)
+    df["OT_Hrs"] = np.clip(hours - 8.0, 0.0, 4.0)
+    df["DT_Hrs"] = np.maximum(hours - 12.0, 0.0)
+    return df.sample(frac=1.0, random_state=int(rng.integers(0, 2**31))).reset_index(
+        drop=True
+    )
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_apply_weekly_rules_matches_legacy(seed, monkeypatch):
+    rng = np.random.default_rng(seed)
+    client_params = make_client_params(rng)
+    daily_df = make_daily_df(rng, int(rng.integers(1, 40)))
+    carryover = {f"E{emp:05d}": int(rng.integers(0, 8)) for emp in range(0, 40, 2)}
+
+    def fake_carryover_streaks(clientId, pay_date, client_params):
+        return carryover
+
+    monkeypatch.setattr(legacy, "get_carryover_streaks", fake_carryover_streaks)
+    monkeypatch.setattr(
+        ta_weekly_rules, "get_carryover_streaks", fake_carryover_streaks
+    )
+    # The period starts the day after the prior period ended, so carryover applies
+    pay_date = str((PERIOD_START + pd.Timedelta(days=PERIOD_DAYS + 5)).date())
+
+    expected = legacy.apply_weekly_rules(daily_df, client_params, "test", pay_date)
+    actual = ta_weekly_rules.apply_weekly_rules(
+        daily_df, client_params, "test", pay_date
+    )
+    pd.testing.assert_frame_equal(actual, expected, check_exact=True)
@@ -1,3 +1,5 @@
+import hashlib, json
+import numpy as np
 import pandas as pd
 import logging
 
@@ -10,138 +12,358 @@ def normalize_client_data(df, system_config):
     1. Apply mappings (simple renames or transformations)
 
     Column pruning to target schema happens later in process_data_* (after drop_rows).
+    process_data_* use the memoized plan directly (see get_normalization_plan).
     """
+    return apply_plan_mappings(df, compile_normalization_plan(system_config))
+
+
+def _apply_transform(df, target_col, rule):
+    """Evaluates one mapping transform rule into df[target_col] (in place)."""
+    transform_type = rule.get("transform")
+
+    # Transform type 1: Concatenation of multiple columns with a delimiter
+    if transform_type == "concat":
+        source_cols = rule.get("source_columns", [])
+        delimiter = rule.get("delimiter", "")
+        preprocess = rule.get("preprocess", {})
+
+        series_list = []
+        for col in source_cols:
+            if col not in df.columns:
+                df[col] = ""
+            series = df[col].fillna("")
+            fmt = preprocess.get(col, {})
+            if fmt.get("astype") == "int":
+                series = series.astype(int)
+            if "zfill" in fmt:
+                series = series.astype(str).str.zfill(fmt["zfill"])
+            else:
+                series = series.astype(str)
+            series_list.append(series)
+
+        # Vectorized string build: chained Series "+" instead of a per-row
+        # delimiter.join (see benchmarks/bench_concat_transform.py)
+        if series_list:
+            combined = series_list[0]
+            for series in series_list[1:]:
+                combined = combined + delimiter + series
+            df[target_col] = combined
+
+    # Transform type 2: Substring extraction from a source column
+    elif transform_type == "substring":
+        source_col = rule.get("source_column")
+
+        if source_col in df.columns:
+            # Use .get() to allow standard Python slicing defaults (None)
+            start = rule.get("start", None)
+            end = rule.get("end", None)
+
+            # Convert to string first to ensure .str accessor works safely
+            df[target_col] = df[source_col].astype(str).str[start:end]
+
+    # Additional transform types can be added here later:
+    # elif transform_type == "pad_left": ...
+    # elif transform_type == "upper": ...
+    # etc.
+
+
+def compile_normalization_plan(system_config, target_schema=(), datetime_columns=()):
+    """
+    Compiles a system config (mappings, drop_rows, target schema) into an execution plan:
+    - transforms: (target_col, rule) pairs; source columns resolved to intake names
+    - renames:    a single {intake name: final name} dict (chained renames composed)
+    - drop_rows:  (column, rule) pairs, evaluated into one combined mask
+    - target_schema / datetime_columns: one projection + datetime coercion
+
+    Transforms always read intake columns, so they see the same data whether they are
+    listed before or after a rename of their source. A transform must not target a
+    column name that an earlier mapping renames away.
+    """
+    renames = {}
+    transforms = []
 
-    # --- 1. Apply mappings (if provided) ---
-    mappings = system_config.get("mappings", {})
+    def resolve(name):
+        # A column renamed by an earlier mapping is still read under its intake name
+        for source, target in renames.items():
+            if target == name:
+                return source
+        return name
 
-    for target_col, rule in mappings.items():
+    for target_col, rule in system_config.get("mappings", {}).items():
         if isinstance(rule, str):
-            # Simple rename
-            if rule in df.columns:
-                df = df.rename(columns={rule: target_col})
+            if rule in renames and renames[rule] != rule:
+                continue  # already renamed away by an earlier mapping
+            renames[resolve(rule)] = target_col
 
         elif isinstance(rule, dict):
-            transform_type = rule.get("transform")
-
-            # Transform type 1: Concatenation of multiple columns with a delimiter
-            if transform_type == "concat":
-                source_cols = rule.get("source_columns", [])
-                delimiter = rule.get("delimiter", "")
-                preprocess = rule.get("preprocess", {})
-
-                series_list = []
-                for col in source_cols:
-                    if col not in df.columns:
-                        df[col] = ""
-                    series = df[col].fillna("")
-                    fmt = preprocess.get(col, {})
-                    if fmt.get("astype") == "int":
-                        series = series.astype(int)
-                    if "zfill" in fmt:
-                        series = series.astype(str).str.zfill(fmt["zfill"])
-                    else:
-                        series = series.astype(str)
-                    series_list.append(series)
-
-                df[target_col] = pd.concat(series_list, axis=1).agg(
-                    delimiter.join, axis=1
-                )
-
-            # Transform type 2: Substring extraction from a source column
-            elif transform_type == "substring":
-                source_col = rule.get("source_column")
-
-                if source_col in df.columns:
-                    # Use .get() to allow standard Python slicing defaults (None)
-                    start = rule.get("start", None)
-                    end = rule.get("end", None)
-
-                    # Convert to string first to ensure .str accessor works safely
-                    df[target_col] = df[source_col].astype(str).str[start:end]
-
-            # Additional transform types can be added here later:
-            # elif transform_type == "pad_left": ...
-            # elif transform_type == "upper": ...
-            # etc.
+            rule = dict(rule)
+            if "source_columns" in rule:
+                rule["source_columns"] = [resolve(c) for c in rule["source_columns"]]
+                rule["preprocess"] = {
+                    resolve(c): fmt for c, fmt in rule.get("preprocess", {}).items()
+                }
+            if rule.get("source_column"):
+                rule["source_column"] = resolve(rule["source_column"])
+
+            # The transform overwrites target_col, so an earlier rename onto it is moot
+            renames = {src: dst for src, dst in renames.items() if dst != target_col}
+            transforms.append((target_col, rule))
+
+    return {
+        "system_config": system_config,
+        "transforms": transforms,
+        "renames": {src: dst for src, dst in renames.items() if src != dst},
+        "drop_rows": list(system_config.get("drop_rows", {}).items()),
+        "target_schema": list(target_schema),
+        "target_schema_set": set(target_schema),
+        "datetime_columns": list(datetime_columns),
+    }
+
+
+# Compiled plans memoized per (system name, config hash, target schema, datetime
+# columns); see get_normalization_plan
+_NORMALIZATION_PLANS: dict = {}
+
+
+def _config_fingerprint(system_config):
+    """Stable hash of a system config's contents (not its identity)."""
+    config_json = json.dumps(system_config, sort_keys=True, default=str)
+    return hashlib.sha1(config_json.encode("utf-8")).hexdigest()
+
+
+def get_normalization_plan(
+    system_name, system_config, target_schema, datetime_columns=()
+):
+    """
+    Returns the memoized normalization plan for a system, compiling it on first use.
+    Keyed on the config's contents, so an edited or reloaded config gets its own plan.
+    """
+    key = (
+        system_name,
+        _config_fingerprint(system_config),
+        tuple(target_schema),
+        tuple(datetime_columns),
+    )
+    plan = _NORMALIZATION_PLANS.get(key)
+    if plan is None:
+        plan = compile_normalization_plan(
+            system_config, target_schema, datetime_columns
+        )
+        _NORMALIZATION_PLANS[key] = plan
+    return plan
 
-    return df
 
+def precompile_normalization_plans(
+    client_configs, systems_key, target_schema, datetime_columns=()
+):
+    """Compiles the plans of every configured system under systems_key (e.g. "ta_systems")."""
+    for client_config in client_configs.values():
+        for system_name, system_config in client_config.get(systems_key, {}).items():
+            get_normalization_plan(
+                system_name, system_config, target_schema, datetime_columns
+            )
 
-def keep_target_schema_columns(df, target_schema):
+
+def apply_plan_mappings(df, plan):
     """
-    Keeps only columns in target_schema, ordered as defined in the schema
-    (core columns first — makes the DB readable). Drops all other intake columns.
-    Run after drop_rows so non-schema columns used for row filters are still available.
+    Applies a plan's transforms and its single rename. Works on a shallow copy
+    (no data is copied), so the caller's intake frame keeps its original columns.
     """
-    extra_cols = [col for col in df.columns if col not in target_schema]
-    if extra_cols:
-        logger.info(
-            f"Dropped {len(extra_cols)} columns outside target schema: {extra_cols}"
-        )
-    return df[target_schema].copy()
+    df = df.copy(deep=False)
+
+    for target_col, rule in plan["transforms"]:
+        _apply_transform(df, target_col, rule)
+
+    if plan["renames"]:
+        df.columns = [plan["renames"].get(col, col) for col in df.columns]
+
+    return df
 
 
-def keep_available_schema_columns(df, target_schema):
+def apply_plan_filters(df, plan):
     """
-    Keeps target_schema columns that exist in df (in schema order).
-    Omits columns the client did not provide instead of failing.
+    Drops rows based on the plan's 'drop_rows' rules (one combined mask, OR basis),
+    keeps the target schema columns that are present (in schema order - core columns
+    first, makes the DB readable) and coerces datetime columns.
+    Rows and columns are selected in a single copy.
+    Supports "Blank" (NaN/NaT/Empty), single strings, or lists of strings.
     """
-    present = [col for col in target_schema if col in df.columns]
-    extra_cols = [col for col in df.columns if col not in target_schema]
+    # --- 1. One combined drop mask ---
+    drop_mask = np.zeros(len(df), dtype=bool)
+    for col, value in plan["drop_rows"]:
+        if col not in df.columns:
+            logger.warning(f"Column '{col}' defined in drop_rows not found in data.")
+            continue
+
+        series = df[col]
+        if isinstance(value, list):
+            drop_mask |= series.isin(value).to_numpy()
+        elif value == "Blank":
+            drop_mask |= series.isna().to_numpy()
+            # Only text-like columns can hold empty / whitespace-only strings
+            if not (
+                pd.api.types.is_numeric_dtype(series.dtype)
+                or pd.api.types.is_datetime64_any_dtype(series.dtype)
+            ):
+                drop_mask |= (series.astype(str).str.strip() == "").to_numpy()
+        else:
+            drop_mask |= (series == value).to_numpy()
+
+    dropped_count = int(drop_mask.sum())
+    if dropped_count > 0:
+        logger.info(
+            f"Dropped {dropped_count} rows based on drop_rows keys: {[col for col, _ in plan['drop_rows']]}"
+        )
+
+    # --- 2. One projection onto the target schema ---
+    present = [col for col in plan["target_schema"] if col in df.columns]
+    extra_cols = [col for col in df.columns if col not in plan["target_schema_set"]]
     if extra_cols:
         logger.info(
             f"Dropped {len(extra_cols)} columns outside target schema: {extra_cols}"
         )
-    missing = [col for col in target_schema if col not in df.columns]
+    missing = [col for col in plan["target_schema"] if col not in df.columns]
     if missing:
-        logger.info(f"WFN intake missing optional schema columns: {missing}")
-    return df[present].copy()
+        logger.info(f"Intake missing optional schema columns: {missing}")
+
+    if dropped_count:
+        df = df.loc[~drop_mask, present]
+    else:
+        df = df.loc[:, present]
+
+    # --- 3. Assure timestamps are in Panda's datetime format ---
+    for col in plan["datetime_columns"]:
+        if not pd.api.types.is_datetime64_any_dtype(df[col].dtype):
+            df[col] = pd.to_datetime(df[col])
+
+    return df
 
 
-def drop_rows(df, system_config):
+def intake_columns(system_config, target_schema):
     """
-    Drops rows based on the 'drop_rows' configuration.
-    Supports "Blank" (NaN/NaT/Empty), single strings, or lists of strings.
+    Returns the set of raw intake columns normalization can use: target_schema columns,
+    mapping sources, drop_rows filters and force_type columns. Every other intake
+    column would be dropped by the target schema projection anyway.
     """
-    drop_rules = system_config.get("drop_rows", {})
-    if not drop_rules:
-        return df
+    columns = set(target_schema)
 
-    initial_row_count = len(df)
-    combined_mask = pd.Series([False] * len(df), index=df.index)
+    for rule in system_config.get("mappings", {}).values():
+        if isinstance(rule, str):
+            columns.add(rule)
+        elif isinstance(rule, dict):
+            columns.update(rule.get("source_columns", []))
+            if rule.get("source_column"):
+                columns.add(rule["source_column"])
 
-    for col, value in drop_rules.items():
-        if col not in df.columns:
-            logger.warning(
-                f"Column '{col}' defined in drop_rows not found in data."
-            )
-            continue
+    columns.update(system_config.get("drop_rows", {}).keys())
+    columns.update(system_config.get("force_type", {}).keys())
+    return columns
 
-        if value == "Blank":
-            combined_mask |= df[col].isna() | (df[col].astype(str).str.strip() == "")
-        elif isinstance(value, list):
-            combined_mask |= df[col].isin(value)
-        else:
-            combined_mask |= df[col] == value
 
-    df_cleaned = df[~combined_mask].copy()
+def resolve_client_params(client_params):
+    """
+    Resolves client_params["global"] + ["locations"] once per request into:
+    - locations: pd.Index of configured location names (a location's code is its position)
+    - tables:    {param: list with one value per location + a trailing global slot}
 
-    dropped_count = initial_row_count - len(df_cleaned)
-    if dropped_count > 0:
-        logger.info(
-            f"Dropped {dropped_count} rows based on drop_rows keys: {list(drop_rules.keys())}"
-        )
+    A location without an override (or with a None override) takes the global value.
+    Rule stages gather per-row / per-employee thresholds by integer code
+    (see location_codes, location_param_table) instead of per-row dict lookups.
+    """
+    global_config = client_params.get("global", {})
+    locations_config = client_params.get("locations", {})
+
+    keys = set(global_config)
+    for loc_config in locations_config.values():
+        keys.update(loc_config)
 
-    return df_cleaned
+    tables = {}
+    for key in keys:
+        global_value = global_config.get(key)
+        tables[key] = [
+            loc_config.get(key) if loc_config.get(key) is not None else global_value
+            for loc_config in locations_config.values()
+        ] + [global_value]
+
+    return {
+        "locations": pd.Index(list(locations_config.keys()), dtype=object),
+        "tables": tables,
+    }
+
+
+def location_codes(resolved_params, locations):
+    """Integer code per location value; -1 (the global slot) for unconfigured or blank locations."""
+    return resolved_params["locations"].get_indexer(locations)
+
+
+def location_param_table(resolved_params, param_name, default=None, dtype=None):
+    """
+    Dense array of param_name per location code (global value in the last slot, so
+    code -1 gathers it). default fills a param missing from both global and location config.
+    Index it with location_codes(...) to resolve every row at once.
+    """
+    table = resolved_params["tables"].get(
+        param_name, [None] * (len(resolved_params["locations"]) + 1)
+    )
+    table = [default if value is None else value for value in table]
+    if any(value is None for value in table):
+        raise KeyError(param_name)
+    return np.array(table, dtype=dtype)
 
 
 def apply_override_else_global(
-    df, location_col, param_name, global_value, locations_config
+    df, location_col, param_name, global_value, locations_config, resolved_params=None
 ):
-    return df[location_col].map(
-        lambda x: locations_config.get(x, {}).get(param_name, global_value)
-    )
+    if resolved_params is None:
+        resolved_params = resolve_client_params({"locations": locations_config})
+    table = location_param_table(resolved_params, param_name, default=global_value)
+    codes = location_codes(resolved_params, df[location_col])
+    return pd.Series(table[codes], index=df.index)
+
+
+def to_categorical(df, columns):
+    """
+    Converts the present text columns to categoricals (in place): each distinct
+    value is stored once and rows hold small integer codes. Categories are sorted,
+    so sorting / grouping by a converted column keeps the plain string order.
+    """
+    for col in columns:
+        if col in df.columns and df[col].dtype == object:
+            df[col] = df[col].astype("category")
+    return df
+
+
+def categorical_to_object(df):
+    """Converts categorical columns back to plain values (in place), e.g. for JSON / DB rows."""
+    for col in df.columns[[isinstance(dtype, pd.CategoricalDtype) for dtype in df.dtypes]]:
+        df[col] = df[col].astype(object)
+    return df
+
+
+def strip_text(series):
+    """
+    .astype(str).str.strip() for a text column. A categorical stays categorical
+    (no-op when its categories are already stripped).
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories
+        if categories.dtype == object and categories.str.strip().equals(categories):
+            return series
+        return series.astype(object).str.strip().astype("category")
+    return series.astype(str).str.strip()
+
+
+def map_values(keys, mapper):
+    """
+    keys.map(mapper) that never returns a categorical: for categorical keys each
+    category is looked up once and the result is gathered by code (missing → NaN).
+    """
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        mapped = pd.Series(keys.cat.categories).map(mapper)
+        return pd.Series(
+            mapped.reindex(keys.cat.codes).to_numpy(), index=keys.index, name=keys.name
+        )
+    return keys.map(mapper)
 
 
 def to_pandas_datetime(df, *columns):
@@ -1,6 +1,7 @@
 import numpy as np
 import utility
-from client_config import WFN_TARGET_SCHEMA
+from helper.aux import profile_and_run_function
+from client_config import WFN_TARGET_SCHEMA, CLIENT_CONFIGS
 from exceptions import AppError
 from wfn.wfn_capabilities import (
     WFN_CORE_SCHEMA,
@@ -14,6 +15,13 @@ logger.setLevel(logging.INFO)
 
 MinE = 100
 
+WFN_DATETIME_COLUMNS = ("Pay Date",)
+
+# Compile every configured WFN system's normalization plan once per container
+utility.precompile_normalization_plans(
+    CLIENT_CONFIGS, "wfn_systems", WFN_TARGET_SCHEMA, WFN_DATETIME_COLUMNS
+)
+
 
 def process_data_wfn(
     df,
@@ -23,10 +31,17 @@ def process_data_wfn(
     state_min_wage,
     pay_periods_per_year,
     pay_date,
+    system_name=None,
+    timings=None,
 ):
+    # timings: optional list collecting a per-stage breakdown (helper.aux.profile_stage)
+
     ######### DF CLEANUP AND PREP #################
 
-    df = utility.normalize_client_data(df, wfn_system_config)
+    plan = utility.get_normalization_plan(
+        system_name, wfn_system_config, WFN_TARGET_SCHEMA, WFN_DATETIME_COLUMNS
+    )
+    df = profile_and_run_function(utility.apply_plan_mappings, timings, df, plan)
 
     missing_core = [col for col in WFN_CORE_SCHEMA if col not in df.columns]
     if missing_core:
@@ -35,9 +50,8 @@ def process_data_wfn(
         logger.error(error_msg)
         raise ValueError(error_msg)
 
-    df = utility.drop_rows(df, wfn_system_config)
-    df = utility.keep_available_schema_columns(df, WFN_TARGET_SCHEMA)
-    df = utility.to_pandas_datetime(df, "Pay Date")
+    # Drop rows, keep available schema columns (in schema order), coerce Pay Date
+    df = profile_and_run_function(utility.apply_plan_filters, timings, df, plan)
 
     is_valid, msg = utility.validate_wfn_pay_date(df, pay_date)
     if not is_valid:
@@ -49,6 +63,7 @@ def process_data_wfn(
         logger.info(f"WFN restricted blocks: {wfn_exceptions}")
 
     locations_config = client_params.get("locations", {})
+    resolved_params = utility.resolve_client_params(client_params)
 
     ######### SHARED RROP INPUTS (OT, DT, BREAK, REST, SICK) #################
 
@@ -172,10 +187,15 @@ def process_data_wfn(
 
     if "min_wage_check" in enabled_blocks:
         df["Min Wage"] = utility.apply_override_else_global(
-            df, "Location", "min_wage", min_wage, locations_config
+            df, "Location", "min_wage", min_wage, locations_config, resolved_params
         )
         df["Cal Min Wage"] = utility.apply_override_else_global(
-            df, "Location", "state_min_wage", state_min_wage, locations_config
+            df,
+            "Location",
+            "state_min_wage",
+            state_min_wage,
+            locations_config,
+            resolved_params,
         )
         df["Pay Periods per Year"] = utility.apply_override_else_global(
             df,
@@ -183,6 +203,7 @@ def process_data_wfn(
             "pay_periods_per_year",
             pay_periods_per_year,
             locations_config,
+            resolved_params,
         )
         df["Min Wage 40"] = (df["Cal Min Wage"] * 40 * 52 * 2) / df["Pay Periods per Year"]
 